@@ -0,0 +1,77 @@
+"""
+Streaming along-track mapping (iter_map_raster) against map_raster on a long
+diagonal track: 20 degrees of latitude and 15 of longitude, 4 variables.
+map_raster crops the raster and builds its intermediate grid over the bbox of
+the whole footprint; the streaming mode walks the image in bursts of lines,
+each with its own bbox. Peak memory is traced with tracemalloc.
+
+Usage: PYTHONPATH=. python benchmarks/bench_along_track.py
+"""
+
+import numpy as np
+import xarray as xr
+from common import peakmem, timeit
+from tools_test import build_footprint, fake_ecmwf_0100_1h
+
+from mapraster import iter_map_raster, map_raster
+
+N_LINES = 8000
+N_SAMPLES = 400
+BURSTS = (250, 1000, 4000)
+
+
+def long_track():
+    line, sample = np.meshgrid(
+        np.arange(N_LINES) / N_LINES, np.arange(N_SAMPLES) / N_SAMPLES, indexing="ij"
+    )
+    return xr.Dataset(
+        data_vars={
+            "longitude": (("line", "sample"), -40 + 15 * line + 2 * sample),
+            "latitude": (("line", "sample"), -50 + 20 * line - 0.5 * sample),
+        },
+        coords={"line": np.arange(N_LINES), "sample": np.arange(N_SAMPLES)},
+    )
+
+
+def stream(raster, dataset, burst_lines, **kwargs):
+    # blocks are dropped as they come, as if written to disk
+    for _ in iter_map_raster(raster, dataset, burst_lines=burst_lines, **kwargs):
+        pass
+
+
+def main():
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=False)
+    raster["W10"] = np.hypot(raster["U10"], raster["V10"])
+    raster["U10N"] = 1.02 * raster["U10"]
+    dataset = long_track()
+    footprint = build_footprint(dataset)
+    out_mb = 4 * N_LINES * N_SAMPLES * 8 / 1e6
+
+    print(f"image {N_LINES}x{N_SAMPLES}, 4 variables (output {out_mb:.0f} MB)")
+    print(f"{'mode':>9} {'call':>16} {'time [s]':>9} {'peak [MB]':>10}")
+    for name, intermediate_grid in (("two-pass", "image"), ("one-pass", None)):
+        kwargs = dict(intermediate_grid=intermediate_grid)
+        whole = map_raster(raster, dataset, footprint, **kwargs)
+        elapsed = timeit(map_raster, raster, dataset, footprint, repeat=1, **kwargs)
+        peak = peakmem(map_raster, raster, dataset, footprint, **kwargs)
+        print(f"{name:>9} {'map_raster':>16} {elapsed:9.2f} {peak:10.0f}")
+
+        for burst_lines in BURSTS:
+            blocks = [
+                block
+                for _, block in iter_map_raster(
+                    raster, dataset, burst_lines=burst_lines, **kwargs
+                )
+            ]
+            diff = abs(xr.concat(blocks, "line") - whole).max()
+            assert max(float(diff[var]) for var in diff) < 1e-3
+            del blocks
+
+            elapsed = timeit(stream, raster, dataset, burst_lines, repeat=1, **kwargs)
+            peak = peakmem(stream, raster, dataset, burst_lines, **kwargs)
+            label = f"bursts of {burst_lines}"
+            print(f"{name:>9} {label:>16} {elapsed:9.2f} {peak:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
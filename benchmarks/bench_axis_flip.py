@@ -0,0 +1,44 @@
+"""
+Descending-latitude global raster (ECMWF/ERA5 layout): label-based reindex
+of the whole raster, as map_raster used to do, versus reading the footprint
+window in the original orientation and flipping it as a strided view.
+
+Usage: PYTHONPATH=. python benchmarks/bench_axis_flip.py
+"""
+
+from common import peakmem, timeit
+from tools_test import build_footprint, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster import map_raster, read_footprint_window
+
+
+def reindex_then_crop(raster, footprint):
+    flipped = raster.reindex(y=raster.y[::-1])
+    return read_footprint_window(flipped, footprint)
+
+
+def crop_then_view(raster, footprint):
+    window = read_footprint_window(raster, footprint)
+    return window.isel(y=slice(None, None, -1))
+
+
+def main():
+    dataset = fake_dataset(cross_antimeridian=False)
+    footprint = build_footprint(dataset)
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=False)
+    raster = raster.isel(y=slice(None, None, -1))  # latitude descending
+    shape = "x".join(str(n) for n in raster["U10"].shape)
+
+    print(f"global raster {shape}, {len(raster.data_vars)} variables")
+    print(f"{'stage':>20} {'time [s]':>9} {'peak [MB]':>10}")
+    stages = {
+        "reindex + crop": lambda: reindex_then_crop(raster, footprint),
+        "crop + view flip": lambda: crop_then_view(raster, footprint),
+        "map_raster": lambda: map_raster(raster, dataset, footprint),
+    }
+    for stage, run in stages.items():
+        print(f"{stage:>20} {timeit(run):9.4f} {peakmem(run):10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Mapping one raster file (10 variables, with NaN) onto many scenes: a
+map_raster call per scene against a single map_raster_batch (window read,
+NaN inpainting and spline fitting done once), for the two-pass and the
+one-pass mapping.
+
+Usage: PYTHONPATH=. python benchmarks/bench_batch.py
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+from tools_test import build_footprint, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster import map_raster, map_raster_batch
+
+N_SCENES = 50
+N_VARIABLES = 10
+SHAPE = (500, 600)
+
+
+def scenes(n):
+    rng = np.random.default_rng(0)
+    for dlon, dlat in zip(rng.uniform(-20, 20, n), rng.uniform(-10, 10, n)):
+        dataset = fake_dataset(cross_antimeridian=False, shape=SHAPE)
+        dataset["longitude"] = dataset["longitude"] + dlon
+        dataset["latitude"] = dataset["latitude"] + dlat
+        yield dataset, build_footprint(dataset)
+
+
+def main():
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=True)
+    for i in range(N_VARIABLES - 2):
+        raster[f"VAR{i}"] = raster["U10"] + i
+    raster.attrs = {}
+    path = os.path.join(tempfile.mkdtemp(), "raster.nc")
+    raster.to_netcdf(path)
+    raster = path
+    batch = list(scenes(N_SCENES))
+
+    print(f"{N_SCENES} scenes of {SHAPE[0]}x{SHAPE[1]}, {N_VARIABLES} variables")
+    print(f"{'mode':>9} {'method':>22} {'time [s]':>9} {'per scene':>10}")
+    for name, intermediate_grid in (("two-pass", "image"), ("one-pass", None)):
+        runs = {
+            "map_raster loop": lambda: [
+                map_raster(
+                    raster, dataset, footprint, intermediate_grid=intermediate_grid
+                )
+                for dataset, footprint in batch
+            ],
+            "map_raster_batch": lambda: list(
+                map_raster_batch(raster, batch, intermediate_grid=intermediate_grid)
+            ),
+            "map_raster_batch x2 proc": lambda: list(
+                map_raster_batch(
+                    raster, batch, intermediate_grid=intermediate_grid, n_processes=2
+                )
+            ),
+        }
+        for method, run in runs.items():
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            print(f"{name:>9} {method:>22} {elapsed:9.2f} {elapsed / N_SCENES:10.4f}")
+
+
+if __name__ == "__main__":
+    main()
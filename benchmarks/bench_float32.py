@@ -0,0 +1,54 @@
+"""
+Float32 against float64 mapping, cached geometry plan (as in a time series),
+4 variables. Time, peak memory and max difference to the float64 output.
+
+Usage: PYTHONPATH=. python benchmarks/bench_float32.py
+"""
+
+import numpy as np
+from common import peakmem, timeit
+from tools_test import build_footprint, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster import PlanCache, map_raster
+
+SHAPES = ((500, 600), (2000, 2400))
+MODES = (("two-pass", "image"), ("one-pass", None))
+
+
+def main():
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=False)
+    raster["W10"] = np.hypot(raster["U10"], raster["V10"])
+    raster["U10N"] = 1.02 * raster["U10"]
+
+    print(
+        f"{'image':>10} {'mode':>9} {'dtype':>8} {'time [s]':>9} "
+        f"{'peak [MB]':>10} {'max diff':>9}"
+    )
+    for shape in SHAPES:
+        dataset = fake_dataset(cross_antimeridian=False, shape=shape)
+        footprint = build_footprint(dataset)
+
+        for name, intermediate_grid in MODES:
+            cache = PlanCache()
+            kwargs = dict(intermediate_grid=intermediate_grid, plan_cache=cache)
+            reference = map_raster(raster, dataset, footprint, **kwargs)
+            for dtype in ("float64", "float32"):
+                out = map_raster(raster, dataset, footprint, dtype=dtype, **kwargs)
+                elapsed = timeit(
+                    map_raster, raster, dataset, footprint, dtype=dtype, **kwargs
+                )
+                peak = peakmem(
+                    map_raster, raster, dataset, footprint, dtype=dtype, **kwargs
+                )
+                diff = max(
+                    float(np.abs(out[var].values - reference[var].values).max())
+                    for var in out
+                )
+                print(
+                    f"{'x'.join(map(str, shape)):>10} {name:>9} {dtype:>8} "
+                    f"{elapsed:9.3f} {peak:10.0f} {diff:9.1e}"
+                )
+
+
+if __name__ == "__main__":
+    main()
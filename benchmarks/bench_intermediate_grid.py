@@ -0,0 +1,80 @@
+"""
+Intermediate grid choices of map_raster: the default square grid sized from
+the image, the adaptive per-axis grid for several oversampling factors, and
+no intermediate grid (direct spline evaluation). Time, size of the
+intermediate grid and max error against the analytic fields.
+
+Usage: PYTHONPATH=. python benchmarks/bench_intermediate_grid.py
+"""
+
+import numpy as np
+from common import timeit
+from tools_test import build_footprint, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster import map_raster
+from mapraster.main import _build_geometry, _footprint_ranges, read_footprint_window
+
+MODES = [
+    ("image", 4),
+    ("adaptive", 2),
+    ("adaptive", 4),
+    ("adaptive", 8),
+    (None, 4),
+]
+
+
+def grid_size(raster, dataset, footprint, intermediate_grid, oversampling):
+    if intermediate_grid is None:
+        return "-"
+    window = read_footprint_window(raster, footprint)
+    lon_range, lat_range = _footprint_ranges(footprint, False)
+    geometry = _build_geometry(
+        window.x.values,
+        window.y.values,
+        dataset["longitude"].values,
+        dataset["latitude"].values,
+        lon_range,
+        lat_range,
+        False,
+        dataset["longitude"].shape,
+        intermediate_grid,
+        oversampling,
+    )
+    return f"{geometry.lats.size}x{geometry.lons.size}"
+
+
+def main():
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=False)
+
+    print(
+        f"{'image':>10} {'mode':>12} {'grid':>10} {'time [s]':>9} "
+        f"{'err U10':>9} {'err V10':>9}"
+    )
+    for shape in ((50, 60), (500, 600), (2000, 2400)):
+        dataset = fake_dataset(cross_antimeridian=False, shape=shape)
+        footprint = build_footprint(dataset)
+        lat = np.deg2rad(dataset["latitude"].values)
+        lon = np.deg2rad(dataset["longitude"].values)
+
+        for intermediate_grid, oversampling in MODES:
+            kwargs = dict(
+                intermediate_grid=intermediate_grid, oversampling=oversampling
+            )
+            elapsed = timeit(map_raster, raster, dataset, footprint, **kwargs)
+            out = map_raster(raster, dataset, footprint, **kwargs)
+            err_u = np.abs(out["U10"].values - 5 - 2 * np.cos(lat)).max()
+            err_v = np.abs(out["V10"].values - 2 * np.sin(lon)).max()
+            mode = (
+                f"{intermediate_grid}x{oversampling}"
+                if intermediate_grid == "adaptive"
+                else str(intermediate_grid)
+            )
+            size = grid_size(raster, dataset, footprint, **kwargs)
+            print(
+                f"{'x'.join(map(str, shape)):>10} {mode:>12} {size:>10} "
+                f"{elapsed:9.3f} {err_u:9.1e} {err_v:9.1e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
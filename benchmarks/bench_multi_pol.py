@@ -0,0 +1,46 @@
+"""
+Multi-polarisation geolocation grids (line, sample, pol): mapped once on the
+(line, sample) geometry and broadcast along pol, against the same grids with
+a per-pol geolocation (perturbed by 1e-9 degree), which are mapped on every
+pol as before. Time and peak memory, 2 variables.
+
+Usage: PYTHONPATH=. python benchmarks/bench_multi_pol.py
+"""
+
+import xarray as xr
+from common import peakmem, timeit
+from tools_test import build_footprint, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster import map_raster
+
+SHAPE = (2000, 2400)
+POLS = (1, 2, 4)
+
+
+def main():
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=False)
+    dataset = fake_dataset(cross_antimeridian=False, shape=SHAPE)
+    footprint = build_footprint(dataset)
+
+    print(f"image {SHAPE[0]}x{SHAPE[1]}")
+    print(f"{'pols':>4} {'geolocation':>12} {'time [s]':>9} {'peak [MB]':>10}")
+    for n_pols in POLS:
+        shared = xr.concat([dataset] * n_pols, "pol")
+        per_pol = xr.concat(
+            [
+                dataset.assign(longitude=dataset.longitude + 1e-9 * i)
+                for i in range(n_pols)
+            ],
+            "pol",
+        )
+        for name, grid in (("shared", shared), ("per pol", per_pol)):
+            if n_pols == 1 and name == "per pol":
+                continue
+            grid = grid.transpose("line", "sample", "pol")
+            elapsed = timeit(map_raster, raster, grid, footprint)
+            peak = peakmem(map_raster, raster, grid, footprint)
+            print(f"{n_pols:>4} {name:>12} {elapsed:9.3f} {peak:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
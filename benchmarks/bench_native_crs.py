@@ -0,0 +1,43 @@
+"""
+map_raster on a large projected raster: full reprojection (previous
+behaviour), clipped reprojection and native-CRS interpolation.
+
+Usage: PYTHONPATH=. python benchmarks/bench_native_crs.py
+"""
+
+import numpy as np
+from common import timeit
+from tools_test import build_footprint, fake_dataset, fake_projected_raster
+
+from mapraster import map_raster
+
+
+def full_reproject(raster, dataset, footprint):
+    return map_raster(raster.rio.reproject(4326), dataset, footprint)
+
+
+def main():
+    dataset = fake_dataset(cross_antimeridian=False)
+    footprint = build_footprint(dataset)
+    lat = np.deg2rad(dataset["latitude"].values)
+    reference = 5 + 2 * np.cos(lat)
+
+    print(f"{'raster':>12} {'mode':>16} {'time [s]':>9} {'max err':>9}")
+    for resolution in (5000.0, 2000.0):
+        raster = fake_projected_raster("EPSG:3857", resolution=resolution)
+        shape = "x".join(str(n) for n in raster["U10"].shape)
+        modes = {
+            "full reproject": lambda: full_reproject(raster, dataset, footprint),
+            "clip+reproject": lambda: map_raster(raster, dataset, footprint),
+            "native crs": lambda: map_raster(
+                raster, dataset, footprint, native_crs=True
+            ),
+        }
+        for mode, run in modes.items():
+            elapsed = timeit(run, repeat=2)
+            error = np.abs(run()["U10"].values - reference).max()
+            print(f"{shape:>12} {mode:>16} {elapsed:9.3f} {error:9.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Categorical variables (an int16 class map and a uint8 land/sea mask) mapped
+with the nearest-neighbour lookup against the cubic spline they used to go
+through, with and without a cached geometry plan. Time, peak memory, output
+dtype and fraction of image points holding a code absent from the raster
+(fractional class values).
+
+Usage: PYTHONPATH=. python benchmarks/bench_nearest.py
+"""
+
+import numpy as np
+import xarray as xr
+from common import peakmem, timeit
+from tools_test import build_footprint, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster import PlanCache, map_raster
+
+SHAPES = ((500, 600), (2000, 2400))
+
+
+def class_raster():
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=False)
+    x = xr.DataArray(np.arange(raster.sizes["x"]), dims="x")
+    y = xr.DataArray(np.arange(raster.sizes["y"]), dims="y")
+    raster["CLASS"] = ((x // 7 + 3 * (y // 5)) % 11).astype("int16")
+    raster["LAND"] = (raster["V10"] > 0).astype("uint8")
+    return raster[["CLASS", "LAND"]].transpose("y", "x")
+
+
+def main():
+    raster = class_raster()
+    codes = set(np.unique(raster["CLASS"].values))
+
+    print(
+        f"{'image':>10} {'method':>8} {'plan':>7} {'time [s]':>9} "
+        f"{'peak [MB]':>10} {'dtype':>8} {'bad codes':>10}"
+    )
+    for shape in SHAPES:
+        dataset = fake_dataset(cross_antimeridian=False, shape=shape)
+        footprint = build_footprint(dataset)
+
+        for method in ("cubic", "nearest"):
+            for plan in ("built", "cached"):
+                kwargs = dict(method=method)
+                if plan == "cached":
+                    kwargs["plan_cache"] = PlanCache()
+                out = map_raster(raster, dataset, footprint, **kwargs)
+                elapsed = timeit(map_raster, raster, dataset, footprint, **kwargs)
+                peak = peakmem(map_raster, raster, dataset, footprint, **kwargs)
+                bad = ~np.isin(out["CLASS"].values, list(codes))
+                print(
+                    f"{'x'.join(map(str, shape)):>10} {method:>8} {plan:>7} "
+                    f"{elapsed:9.3f} {peak:10.0f} {str(out['CLASS'].dtype):>8} "
+                    f"{bad.mean():10.1%}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+One-pass (spline evaluated directly at the image points) against two-pass
+(spline on an intermediate grid, then bilinear interpolation) mapping, as the
+image size grows. Cold: the geometry plan is built; cached: it is taken from a
+PlanCache, as in a time series. Max error against the analytic fields.
+
+Usage: PYTHONPATH=. python benchmarks/bench_one_pass.py
+"""
+
+import numpy as np
+from common import timeit
+from tools_test import build_footprint, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster import PlanCache, map_raster
+
+SHAPES = ((50, 60), (200, 240), (500, 600), (1000, 1200), (2000, 2400))
+MODES = (("two-pass", "image"), ("one-pass", None))
+
+
+def main():
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=False)
+
+    print(
+        f"{'image':>10} {'mode':>9} {'cold [s]':>9} {'cached [s]':>11} "
+        f"{'err U10':>9} {'err V10':>9}"
+    )
+    for shape in SHAPES:
+        dataset = fake_dataset(cross_antimeridian=False, shape=shape)
+        footprint = build_footprint(dataset)
+        lat = np.deg2rad(dataset["latitude"].values)
+        lon = np.deg2rad(dataset["longitude"].values)
+
+        for name, intermediate_grid in MODES:
+            cold = timeit(
+                map_raster,
+                raster,
+                dataset,
+                footprint,
+                intermediate_grid=intermediate_grid,
+            )
+            cache = PlanCache()
+            out = map_raster(
+                raster,
+                dataset,
+                footprint,
+                intermediate_grid=intermediate_grid,
+                plan_cache=cache,
+            )
+            cached = timeit(
+                map_raster,
+                raster,
+                dataset,
+                footprint,
+                intermediate_grid=intermediate_grid,
+                plan_cache=cache,
+            )
+            err_u = np.abs(out["U10"].values - 5 - 2 * np.cos(lat)).max()
+            err_v = np.abs(out["V10"].values - 2 * np.sin(lon)).max()
+            print(
+                f"{'x'.join(map(str, shape)):>10} {name:>9} {cold:9.4f} "
+                f"{cached:11.4f} {err_u:9.1e} {err_v:9.1e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
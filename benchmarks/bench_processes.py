@@ -0,0 +1,57 @@
+"""
+Throughput of map_raster_batch over a many-scene workload (10 variables, with
+NaN), serial and with 1 up to os.cpu_count() worker processes. Scenes per
+second and speed-up over the serial run.
+
+Usage: PYTHONPATH=. python benchmarks/bench_processes.py
+"""
+
+import os
+
+import numpy as np
+from common import timeit
+from tools_test import build_footprint, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster import map_raster_batch
+
+N_SCENES = 48
+N_VARIABLES = 10
+SHAPE = (500, 600)
+
+
+def scenes(n):
+    rng = np.random.default_rng(0)
+    for dlon, dlat in zip(rng.uniform(-20, 20, n), rng.uniform(-10, 10, n)):
+        dataset = fake_dataset(cross_antimeridian=False, shape=SHAPE)
+        dataset["longitude"] = dataset["longitude"] + dlon
+        dataset["latitude"] = dataset["latitude"] + dlat
+        yield dataset, build_footprint(dataset)
+
+
+def consume(raster, batch, **kwargs):
+    for _ in map_raster_batch(raster, batch, **kwargs):
+        pass
+
+
+def main():
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=True)
+    for i in range(N_VARIABLES - 2):
+        raster[f"VAR{i}"] = raster["U10"] + i
+    batch = list(scenes(N_SCENES))
+
+    print(
+        f"{N_SCENES} scenes of {SHAPE[0]}x{SHAPE[1]}, {N_VARIABLES} variables, {os.cpu_count()} CPU"
+    )
+    print(f"{'processes':>9} {'time [s]':>9} {'scenes/s':>9} {'speed-up':>9}")
+    serial = None
+    for n_processes in (None, *range(1, os.cpu_count() + 1)):
+        elapsed = timeit(consume, raster, batch, n_processes=n_processes, repeat=2)
+        serial = serial or elapsed
+        print(
+            f"{n_processes or '-':>9} {elapsed:9.2f} {N_SCENES / elapsed:9.1f} "
+            f"{serial / elapsed:9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
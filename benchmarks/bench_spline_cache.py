@@ -0,0 +1,101 @@
+"""
+Fitted-spline cache along an orbit: consecutive scenes overlap by most of
+their footprint. map_raster without cache against a shared SplineCache,
+on the 0.1 deg fake ECMWF raster and on a finer 0.02 deg raster, in memory
+(tiles identified by value) and from a NetCDF file (tiles identified by the
+file), for a few tile sizes. Reports total time, hit rate, fitting time
+saved and max difference to the uncached mapping.
+
+Usage: PYTHONPATH=. python benchmarks/bench_spline_cache.py
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+import xarray as xr
+from tools_test import build_footprint, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster import SplineCache, map_raster
+
+N_SCENES = 20
+N_VARIABLES = 6
+TILES = ((16, 12), (32, 12), (64, 16))
+
+
+def fine_raster(resolution=0.02):
+    lon = np.arange(-45, -10, resolution)
+    lat = np.arange(-45, -20, resolution)
+    lat2d = np.deg2rad(lat)[:, None]
+    lon2d = np.deg2rad(lon)[None, :]
+    raster = xr.Dataset(
+        {
+            "U10": (("y", "x"), 5 + 2 * np.cos(lat2d) + 0 * lon2d),
+            "V10": (("y", "x"), 2 * np.sin(lon2d) + 0 * lat2d),
+        },
+        coords={"x": lon, "y": lat},
+    )
+    return raster.rio.write_crs(4326)
+
+
+def orbit(n, shape=(500, 600)):
+    """Scenes moving along track by a fifth of their length."""
+    for i in range(n):
+        dataset = fake_dataset(cross_antimeridian=False, shape=shape)
+        dataset["longitude"] = dataset["longitude"] - 0.2 * i
+        dataset["latitude"] = dataset["latitude"] - 0.7 * i
+        yield dataset, build_footprint(dataset)
+
+
+def run(raster, scenes, **kwargs):
+    start = time.perf_counter()
+    out = [
+        map_raster(raster, dataset, footprint, **kwargs)
+        for dataset, footprint in scenes
+    ]
+    return time.perf_counter() - start, out
+
+
+def main():
+    scenes = list(orbit(N_SCENES))
+    rasters = {
+        "ecmwf 0.1": fake_ecmwf_0100_1h(to180=True, with_nan=True),
+        "fine 0.02": fine_raster(),
+    }
+    directory = tempfile.mkdtemp()
+
+    print(f"{N_SCENES} scenes along track, {N_VARIABLES} variables")
+    print(
+        f"{'raster':>16} {'tiles':>8} {'time [s]':>9} {'hit rate':>9} "
+        f"{'saved [s]':>10} {'cache MB':>9} {'max diff':>9}"
+    )
+    for label, raster in rasters.items():
+        for i in range(N_VARIABLES - 2):
+            raster[f"VAR{i}"] = raster["U10"] * (i + 1)
+        raster.attrs = {}
+        path = os.path.join(directory, f"{label.split()[0]}.nc")
+        raster.to_netcdf(path)
+
+        for source, data in (("memory", raster.load()), ("file", path)):
+            elapsed, reference = run(data, scenes)
+            name = f"{label} {source}"
+            print(f"{name:>16} {'-':>8} {elapsed:9.3f}")
+            for tile_size, halo in TILES:
+                cache = SplineCache(tile_size=tile_size, halo=halo)
+                elapsed, out = run(data, scenes, spline_cache=cache)
+                diff = max(
+                    float(np.nanmax(np.abs(o[var].values - r[var].values)))
+                    for o, r in zip(out, reference)
+                    for var in r
+                )
+                info = cache.info()
+                print(
+                    f"{name:>16} {f'{tile_size}+{halo}':>8} {elapsed:9.3f} "
+                    f"{info['hit_rate']:9.2f} {info['time_saved']:10.3f} "
+                    f"{info['nbytes'] / 2**20:9.1f} {diff:9.1e}"
+                )
+
+
+if __name__ == "__main__":
+    main()
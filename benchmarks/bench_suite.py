@@ -0,0 +1,241 @@
+"""
+Benchmark suite of the map_raster hot paths, stage by stage, on the synthetic
+datasets of the test suite (no I/O, no network).
+
+Each case maps a raster with a number of variables onto a fake_dataset image,
+for a scenario (geographic raster, with NaN, across the antimeridian, in a
+projected CRS) and a mapping mode (intermediate grid or one pass). The
+stages of map_raster (see `mapraster.StageProfiler`: read_window,
+reproject, flip, geometry, crop, fit, evaluate, interp, to_dataset) each get
+their best wall time and their peak memory, as well as the whole call
+("total").
+
+Results are printed, and written as JSON with ``--output`` (one file per
+commit, e.g. as a CI artifact). ``--compare`` flags the stages slower or taking
+more memory than in a previous result file by more than ``--threshold``, and
+exits with status 1 if any. Timings only compare across runs on the same
+machine; peak memory compares anywhere.
+
+Presets (``--preset``):
+
+- ci: images up to 500x600, 2 and 10 variables, a couple of minutes
+- default: images up to 2000x2400, 2 to 30 variables
+- full: images up to 20000x25000 (tens of GB of memory), 2 to 30 variables
+
+Usage: PYTHONPATH=. python benchmarks/bench_suite.py [--preset ci]
+           [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+
+import numpy as np
+import scipy
+import xarray as xr
+from common import peakmem, timeit
+from tools_test import (
+    build_footprint,
+    fake_dataset,
+    fake_ecmwf_0100_1h,
+    fake_projected_raster,
+)
+
+from mapraster import StageProfiler, map_raster
+
+PRESETS = {
+    "ci": dict(shapes=((50, 60), (500, 600)), variables=(2, 10), repeat=1),
+    "default": dict(
+        shapes=((50, 60), (500, 600), (2000, 2400)), variables=(2, 10, 30), repeat=3
+    ),
+    "full": dict(
+        shapes=((50, 60), (500, 600), (2000, 2400), (5000, 6000), (20000, 25000)),
+        variables=(2, 10, 30),
+        repeat=1,
+    ),
+}
+
+# name: (raster kind, with NaN, cross antimeridian)
+SCENARIOS = {
+    "geographic": ("geographic", False, False),
+    "geographic-nan": ("geographic", True, False),
+    "antimeridian": ("geographic", False, True),
+    "antimeridian-nan": ("geographic", True, True),
+    "projected": ("projected", False, False),
+}
+
+MODES = {"two-pass": "image", "one-pass": None}
+
+
+def make_raster(kind, with_nan, cross_antimeridian, n_variables):
+    """Raster of the scenario, with `n_variables` smooth variables."""
+    if kind == "projected":
+        raster = fake_projected_raster("EPSG:3857")
+    else:
+        raster = fake_ecmwf_0100_1h(to180=not cross_antimeridian, with_nan=with_nan)
+    u, v = raster["U10"], raster["V10"]
+    for i in range(2, n_variables):
+        # independent buffers, sharing the NaN of U10 and V10
+        raster[f"VAR{i}"] = (1 + 0.1 * i) * u + 0.05 * i * v
+    return raster
+
+
+def run_case(shape, n_variables, scenario, mode, repeat):
+    """
+    Time and peak memory per stage of one case, from a `StageProfiler`.
+
+    Returns
+    -------
+    list of dict
+        One record per stage, and one for the whole call ("total").
+    """
+    kind, with_nan, cross_antimeridian = SCENARIOS[scenario]
+    raster = make_raster(kind, with_nan, cross_antimeridian, n_variables)
+    dataset = fake_dataset(cross_antimeridian=cross_antimeridian, shape=shape)
+    footprint = build_footprint(dataset)
+    args = (raster, dataset, footprint, cross_antimeridian)
+    kwargs = dict(intermediate_grid=MODES[mode])
+
+    # best time per stage, profiled without memory tracing
+    times = {}
+    for _ in range(repeat):
+        with StageProfiler() as profiler:
+            total = timeit(map_raster, *args, repeat=1, **kwargs)
+        for stage, summary in profiler.summary().items():
+            times[stage] = min(times.get(stage, float("inf")), summary["time"])
+        times["total"] = min(times.get("total", float("inf")), total)
+
+    with StageProfiler(memory=True) as profiler:
+        map_raster(*args, **kwargs)
+    peaks = {
+        stage: summary["peak_bytes"] / 1e6
+        for stage, summary in profiler.summary().items()
+    }
+    peaks["total"] = peakmem(map_raster, *args, **kwargs)
+
+    case = dict(
+        image="x".join(map(str, shape)),
+        variables=n_variables,
+        scenario=scenario,
+        mode=mode,
+    )
+    return [
+        dict(case, stage=stage, time=times[stage], peak_mb=peaks[stage])
+        for stage in times
+    ]
+
+
+def case_key(record):
+    return tuple(
+        record[field] for field in ("image", "variables", "scenario", "mode", "stage")
+    )
+
+
+def regression(record, previous, threshold, min_time=0.005, min_mb=1.0):
+    """
+    Why a stage regressed against a previous result, or None.
+
+    Time and peak memory both count when more than `threshold` times the
+    previous ones. Differences below `min_time` seconds or `min_mb` MB are
+    taken as noise.
+    """
+    if (
+        record["time"] > threshold * previous["time"]
+        and record["time"] - previous["time"] > min_time
+    ):
+        return f"time {previous['time']:.4f} -> {record['time']:.4f} s"
+    if (
+        record["peak_mb"] > threshold * previous["peak_mb"]
+        and record["peak_mb"] - previous["peak_mb"] > min_mb
+    ):
+        return f"peak {previous['peak_mb']:.1f} -> {record['peak_mb']:.1f} MB"
+    return None
+
+
+def metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return dict(
+        commit=commit,
+        python=platform.python_version(),
+        numpy=np.__version__,
+        scipy=scipy.__version__,
+        xarray=xr.__version__,
+        machine=platform.machine(),
+        processor=platform.processor(),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="default")
+    parser.add_argument(
+        "--scenario", action="append", choices=sorted(SCENARIOS), dest="scenarios"
+    )
+    parser.add_argument("--mode", action="append", choices=sorted(MODES), dest="modes")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results file to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.5,
+        help="time or peak memory ratio above which a stage is flagged (default 1.5)",
+    )
+    args = parser.parse_args(argv)
+    preset = PRESETS[args.preset]
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {case_key(r): r for r in json.load(f)["results"]}
+
+    print(
+        f"{'image':>11} {'vars':>4} {'scenario':>16} {'mode':>8} {'stage':>11} "
+        f"{'time [s]':>9} {'peak [MB]':>10} {'ratio':>6}"
+    )
+    results, regressions = [], []
+    for shape in preset["shapes"]:
+        for n_variables in preset["variables"]:
+            for scenario in args.scenarios or SCENARIOS:
+                for mode in args.modes or MODES:
+                    records = run_case(
+                        shape, n_variables, scenario, mode, preset["repeat"]
+                    )
+                    for record in records:
+                        previous = baseline.get(case_key(record))
+                        ratio = ""
+                        if previous is not None:
+                            ratio = f"{record['time'] / previous['time']:6.2f}"
+                            reason = regression(record, previous, args.threshold)
+                            if reason is not None:
+                                regressions.append((record, reason))
+                        print(
+                            f"{record['image']:>11} {n_variables:>4} "
+                            f"{scenario:>16} {mode:>8} {record['stage']:>11} "
+                            f"{record['time']:9.4f} {record['peak_mb']:10.1f} "
+                            f"{ratio:>6}"
+                        )
+                    results.extend(records)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                dict(metadata(), preset=args.preset, results=results), f, indent=1
+            )
+
+    if regressions:
+        print(f"{len(regressions)} stage(s) regressed against {args.compare}:")
+        for record, reason in regressions:
+            print("  " + " ".join(str(field) for field in case_key(record)), reason)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""
+Thread scaling of map_raster: n_workers from 1 to 32 on a large image with
+several variables, for the two-pass and the one-pass mapping. Plans are
+cached so that only the per-call work (spline fitting and interpolation) is
+timed.
+
+Usage: PYTHONPATH=. python benchmarks/bench_threads.py
+"""
+
+import os
+
+import numpy as np
+from common import timeit
+from tools_test import build_footprint, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster import PlanCache, map_raster
+
+WORKERS = (1, 2, 4, 8, 16, 32)
+N_VARIABLES = 8
+
+
+def main():
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=True)
+    for i in range(N_VARIABLES - 2):
+        raster[f"VAR{i}"] = raster["U10"] + i
+    dataset = fake_dataset(cross_antimeridian=False, shape=(2000, 2400))
+    footprint = build_footprint(dataset)
+
+    print(f"cpu count: {os.cpu_count()}, {N_VARIABLES} variables, image 2000x2400")
+    print(f"{'mode':>9} {'workers':>8} {'time [s]':>9} {'speedup':>8}")
+    for name, intermediate_grid in (("two-pass", "image"), ("one-pass", None)):
+        cache = PlanCache()
+        kwargs = dict(intermediate_grid=intermediate_grid, plan_cache=cache)
+        serial = map_raster(raster, dataset, footprint, **kwargs)
+        reference = None
+        for n_workers in WORKERS:
+            elapsed = timeit(
+                map_raster, raster, dataset, footprint, n_workers=n_workers, **kwargs
+            )
+            out = map_raster(raster, dataset, footprint, n_workers=n_workers, **kwargs)
+            for var in serial:
+                np.testing.assert_array_equal(out[var].values, serial[var].values)
+            reference = reference or elapsed
+            print(f"{name:>9} {n_workers:8d} {elapsed:9.3f} {reference / elapsed:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
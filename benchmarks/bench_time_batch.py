@@ -0,0 +1,45 @@
+"""
+Throughput of map_raster on (time, y, x) forecast cubes: one batched call
+versus one call per time step.
+
+Usage: PYTHONPATH=. python benchmarks/bench_time_batch.py
+"""
+
+import numpy as np
+import xarray as xr
+from common import timeit
+from tools_test import build_footprint, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster import map_raster
+
+
+def forecast_cube(nsteps):
+    # regional cut of the global raster, to keep 48-step cubes in memory
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=False)
+    raster = raster.sel(x=slice(-50, 10), y=slice(-45, -10))
+    steps = xr.DataArray(np.arange(nsteps), dims="step")
+    cube = raster * (1 + 0.01 * steps)
+    return cube.rio.write_crs("EPSG:4326")
+
+
+def loop(cube, dataset, footprint):
+    return [
+        map_raster(cube.isel(step=k), dataset, footprint)
+        for k in range(cube.sizes["step"])
+    ]
+
+
+def main():
+    dataset = fake_dataset(cross_antimeridian=False)
+    footprint = build_footprint(dataset)
+
+    print(f"{'steps':>6} {'loop [s]':>10} {'batched [s]':>12} {'speedup':>8}")
+    for nsteps in (1, 24, 48):
+        cube = forecast_cube(nsteps)
+        t_loop = timeit(loop, cube, dataset, footprint)
+        t_batch = timeit(map_raster, cube, dataset, footprint)
+        print(f"{nsteps:6d} {t_loop:10.3f} {t_batch:12.3f} {t_loop / t_batch:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Vector mode against mapping U10/V10 and rotating them afterwards, as a
+separate full-array pass with xarray: into the image (range, azimuth) frame
+from a ground heading, and into the geographic frame for a polar
+stereographic raster (components along its x/y axes). Cached geometry plan,
+as in a time series. Time, peak memory and max difference between the two.
+
+Usage: PYTHONPATH=. python benchmarks/bench_vectors.py
+"""
+
+import numpy as np
+import xarray as xr
+from common import peakmem, timeit
+from tools_test import (
+    build_footprint,
+    fake_dataset,
+    fake_ecmwf_0100_1h,
+    fake_projected_raster,
+)
+
+from mapraster import PlanCache, map_raster
+from mapraster.main import _grid_north
+
+SHAPES = ((500, 600), (2000, 2400))
+VECTORS = [("U10", "V10")]
+
+
+def with_heading(dataset):
+    line, sample = xr.broadcast(dataset.line, dataset.sample)
+    return dataset.assign(ground_heading=-170 + 0.01 * line + 0.001 * sample)
+
+
+def rotate_after(raster, dataset, footprint, angle, **kwargs):
+    """Previous workflow: map, then rotate the whole arrays."""
+    out = map_raster(raster, dataset, footprint, **kwargs)
+    cos, sin = np.cos(angle), np.sin(angle)
+    u, v = out["U10"], out["V10"]
+    out["U10"], out["V10"] = u * cos - v * sin, u * sin + v * cos
+    return out
+
+
+def main():
+    geographic = fake_ecmwf_0100_1h(to180=True, with_nan=False)
+    polar = fake_projected_raster("EPSG:3031", resolution=10000.0)
+
+    print(
+        f"{'image':>10} {'frame':>10} {'mode':>13} {'time [s]':>9} "
+        f"{'peak [MB]':>10} {'max diff':>9}"
+    )
+    for shape in SHAPES:
+        dataset = with_heading(fake_dataset(cross_antimeridian=False, shape=shape))
+        footprint = build_footprint(dataset)
+        lon, lat = dataset["longitude"], dataset["latitude"]
+
+        cases = (
+            (
+                "range/az",
+                geographic,
+                dict(heading="ground_heading"),
+                np.deg2rad(dataset["ground_heading"]),
+            ),
+            (
+                "geographic",
+                polar,
+                {},
+                xr.apply_ufunc(lambda x, y: _grid_north("EPSG:3031", x, y), lon, lat),
+            ),
+        )
+        for frame, raster, options, angle in cases:
+            kwargs = dict(plan_cache=PlanCache())
+            fused_kwargs = dict(kwargs, vectors=VECTORS, **options)
+            reference = rotate_after(raster, dataset, footprint, angle, **kwargs)
+            fused = map_raster(raster, dataset, footprint, **fused_kwargs)
+            diff = max(
+                float(abs(fused[var] - reference[var]).max()) for var in VECTORS[0]
+            )
+            for mode, func, args, func_kwargs in (
+                ("rotate after", rotate_after, (angle,), kwargs),
+                ("vectors", map_raster, (), fused_kwargs),
+            ):
+                elapsed = timeit(func, raster, dataset, footprint, *args, **func_kwargs)
+                peak = peakmem(func, raster, dataset, footprint, *args, **func_kwargs)
+                print(
+                    f"{'x'.join(map(str, shape)):>10} {frame:>10} {mode:>13} "
+                    f"{elapsed:9.3f} {peak:10.0f} {diff:9.1e}"
+                )
+
+
+if __name__ == "__main__":
+    main()
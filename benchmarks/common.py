@@ -0,0 +1,43 @@
+"""Shared helpers for the mapraster benchmark scripts."""
+
+import os
+import sys
+import time
+import tracemalloc
+
+# reuse the synthetic datasets of the test suite
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tests"))
+
+
+def timeit(func, *args, repeat=3, **kwargs):
+    """
+    Best wall time of `repeat` calls of ``func(*args, **kwargs)``.
+
+    Returns
+    -------
+    float
+        Seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def peakmem(func, *args, **kwargs):
+    """
+    Peak memory allocated by one call of ``func(*args, **kwargs)``.
+
+    Returns
+    -------
+    float
+        Megabytes, as traced by `tracemalloc` (numpy allocations included).
+    """
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
@@ -1,10 +1,31 @@
 # type: ignore[attr-defined]
 """mapraster is a Python lib to interpolate xarray raster field on image geometry (e.g. line/sample)"""
 
+__all__ = [
+    "map_raster",
+    "map_raster_batch",
+    "iter_map_raster",
+    "open_raster",
+    "read_footprint_window",
+    "MappingPlan",
+    "SplinePlan",
+    "NearestPlan",
+    "GeometryPlan",
+    "PlanCache",
+    "SplineCache",
+    "StageProfiler",
+]
 
-__all__ = ["map_raster"]
-
-from .main import map_raster
+from .cache import PlanCache, SplineCache
+from .main import (
+    iter_map_raster,
+    map_raster,
+    map_raster_batch,
+    open_raster,
+    read_footprint_window,
+)
+from .plan import GeometryPlan, MappingPlan, NearestPlan, SplinePlan
+from .profiling import StageProfiler
 
 try:
     from importlib import metadata
@@ -0,0 +1,307 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .plan import GeometryPlan
+
+
+def geometry_key(*parts):
+    """
+    Hash geometry inputs into a cache key.
+
+    Parameters
+    ----------
+    *parts
+        Arrays, shapely geometries, scalars or strings. Arrays are hashed by
+        dtype, shape and content, geometries by their WKB.
+
+    Returns
+    -------
+    str
+        Hex digest.
+    """
+    digest = hashlib.sha1()  # nosec: not used for security
+    for part in parts:
+        if hasattr(part, "wkb"):
+            digest.update(b"geom")
+            digest.update(part.wkb)
+        elif isinstance(part, (np.ndarray, list, tuple)) or hasattr(part, "values"):
+            arr = np.ascontiguousarray(getattr(part, "values", part))
+            digest.update(f"{arr.dtype.str}{arr.shape}".encode())
+            digest.update(arr.tobytes())
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b"|")
+    return digest.hexdigest()
+
+
+class PlanCache:
+    """
+    LRU cache of `GeometryPlan` objects, optionally spilled to disk.
+
+    Plans are kept in memory up to `maxsize` entries. If `directory` is set,
+    every stored plan is also written there as a ``.npz`` file, so that other
+    processes (or later runs) can reuse it; at most `max_disk_entries` files
+    are kept, oldest first removed.
+
+    Parameters
+    ----------
+    maxsize : int, default 32
+        Maximum number of plans kept in memory.
+    directory : str, optional
+        Directory used to spill plans to disk.
+    max_disk_entries : int, optional
+        Maximum number of plans kept on disk. Unlimited if None.
+
+    Examples
+    --------
+    >>> cache = PlanCache(maxsize=4)
+    >>> cache.info()
+    {'hits': 0, 'disk_hits': 0, 'misses': 0, 'size': 0, 'maxsize': 4}
+    """
+
+    def __init__(self, maxsize=32, directory=None, max_disk_entries=None):
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        self.maxsize = maxsize
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self._plans)
+
+    def __contains__(self, key):
+        return key in self._plans
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def _remember(self, key, plan):
+        self._plans[key] = plan
+        self._plans.move_to_end(key)
+        while len(self._plans) > self.maxsize:
+            self._plans.popitem(last=False)
+
+    def get(self, key):
+        """
+        Get a plan from the cache.
+
+        Parameters
+        ----------
+        key : str
+
+        Returns
+        -------
+        GeometryPlan or None
+            None if the key is not cached.
+        """
+        with self._lock:
+            if key in self._plans:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return self._plans[key]
+
+            if self.directory is not None and os.path.exists(self._path(key)):
+                with np.load(self._path(key)) as arrays:
+                    plan = GeometryPlan.from_arrays(dict(arrays))
+                self._remember(key, plan)
+                self.disk_hits += 1
+                return plan
+
+            self.misses += 1
+            return None
+
+    def put(self, key, plan):
+        """
+        Store a plan in the cache.
+
+        Parameters
+        ----------
+        key : str
+        plan : GeometryPlan
+        """
+        with self._lock:
+            self._remember(key, plan)
+            if self.directory is not None:
+                np.savez(self._path(key), **plan.to_arrays())
+                self._evict_disk()
+
+    def _evict_disk(self):
+        if self.max_disk_entries is None:
+            return
+        files = [
+            os.path.join(self.directory, f)
+            for f in os.listdir(self.directory)
+            if f.endswith(".npz")
+        ]
+        files.sort(key=os.path.getmtime)
+        for path in files[: max(0, len(files) - self.max_disk_entries)]:
+            os.remove(path)
+
+    def clear(self):
+        """
+        Drop all in-memory plans and reset counters. Disk entries are kept.
+        """
+        with self._lock:
+            self._plans.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def info(self):
+        """
+        Cache statistics.
+
+        Returns
+        -------
+        dict
+            hits, disk_hits, misses, current size and maxsize.
+        """
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "size": len(self._plans),
+            "maxsize": self.maxsize,
+        }
+
+
+class SplineCache:
+    """
+    LRU cache of fitted spline coefficients over raster tiles, bounded in memory.
+
+    The raster is cut into tiles of `tile_size` pixels on a grid anchored to
+    the raster coordinates, so that overlapping footprints (e.g. consecutive
+    scenes along an orbit) share tiles. Each tile is fitted with `halo` extra
+    pixels on each side and only the coefficients of its core are kept. The
+    influence of far data on a cubic spline coefficient decays as about
+    0.27 per pixel, so the assembled coefficients differ from a spline fitted
+    on the whole window by about ``0.27 ** halo`` times the field variations.
+
+    Entries are keyed by variable, tile index and the raster identity: path,
+    modification time and size of a raster file, identity of the arrays (not
+    their values) and coordinates of an in-memory or dask-backed raster, else
+    a digest of the tile values and coordinates. A new raster never hits
+    stale coefficients, as long as in-memory arrays are not modified in
+    place.
+
+    Parameters
+    ----------
+    max_bytes : int, default 256 MiB
+        Maximum total size of the cached coefficients.
+    tile_size : int, default 64
+        Tile size in raster pixels.
+    halo : int, default 16
+        Extra pixels on each side of a tile used for its fit.
+
+    Examples
+    --------
+    >>> cache = SplineCache(max_bytes=2**20)
+    >>> cache.info()["hit_rate"]
+    0.0
+    """
+
+    def __init__(self, max_bytes=256 * 2**20, tile_size=64, halo=16):
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be >= 0")
+        if tile_size < 1 or halo < 2:
+            raise ValueError("tile_size must be >= 1 and halo >= 2")
+        self.max_bytes = max_bytes
+        self.tile_size = tile_size
+        self.halo = halo
+        self.hits = 0
+        self.misses = 0
+        self.time_saved = 0.0
+        self.nbytes = 0
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def __contains__(self, key):
+        return key in self._tiles
+
+    def get(self, key):
+        """
+        Get the coefficients of a tile.
+
+        Parameters
+        ----------
+        key : tuple
+            (variable, tile y index, tile x index, digest).
+
+        Returns
+        -------
+        numpy.ndarray or None
+            None if the tile is not cached.
+        """
+        with self._lock:
+            if key not in self._tiles:
+                self.misses += 1
+                return None
+            self._tiles.move_to_end(key)
+            coeffs, fit_time = self._tiles[key]
+            self.hits += 1
+            self.time_saved += fit_time
+            return coeffs
+
+    def put(self, key, coeffs, fit_time=0.0):
+        """
+        Store the coefficients of a tile.
+
+        Parameters
+        ----------
+        key : tuple
+        coeffs : numpy.ndarray
+        fit_time : float, default 0
+            Time spent fitting the tile, in seconds, counted in `time_saved`
+            at each hit.
+        """
+        with self._lock:
+            if key in self._tiles:
+                self.nbytes -= self._tiles.pop(key)[0].nbytes
+            if coeffs.nbytes > self.max_bytes:
+                return
+            self._tiles[key] = (coeffs, fit_time)
+            self.nbytes += coeffs.nbytes
+            while self.nbytes > self.max_bytes:
+                self.nbytes -= self._tiles.popitem(last=False)[1][0].nbytes
+
+    def clear(self):
+        """
+        Drop all tiles and reset counters.
+        """
+        with self._lock:
+            self._tiles.clear()
+            self.hits = self.misses = self.nbytes = 0
+            self.time_saved = 0.0
+
+    def info(self):
+        """
+        Cache statistics.
+
+        Returns
+        -------
+        dict
+            hits, misses, hit_rate, time_saved (seconds of fitting avoided),
+            number of tiles, nbytes and max_bytes.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "time_saved": self.time_saved,
+            "size": len(self._tiles),
+            "nbytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -1,12 +1,31 @@
+import contextlib
+import functools
+import itertools
+import os
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 import numpy as np
+import shapely
 import xarray as xr
-from scipy.interpolate import RectBivariateSpline
+from pyproj import Transformer
+from scipy.interpolate import BSpline, make_interp_spline
+from scipy.ndimage import distance_transform_edt
+from shapely.geometry import box
+
+from .cache import SplineCache, geometry_key
+from .plan import GeometryPlan, MappingPlan, NearestPlan, SplinePlan, _spline_knots
+from .profiling import _stage
+from .shared import _attach, _nbytes, _SharedArrays
 
 
 def _get_image_dims(ds):
     """
     Infer image dimensions from longitude/latitude variables,
-    excluding 'pol' if present.
+    excluding 'pol' if present, and other dims along which the
+    geolocation is constant if more than two dims remain.
     """
     if "longitude" in ds:
         lon_da = ds["longitude"]
@@ -15,49 +34,266 @@ def _get_image_dims(ds):
     else:
         raise ValueError("originalDataset must contain longitude or owiLon")
 
-    return tuple(d for d in lon_da.dims if d != "pol")
+    dims = [d for d in lon_da.dims if d != "pol"]
+    if len(dims) > 2:
+        _, lat_da = _target_coords(ds)
+        # extra dims come last, usually
+        for dim in reversed(lon_da.dims):
+            if len(dims) > 2 and dim in dims and _constant_along(lon_da, lat_da, dim):
+                dims.remove(dim)
+    return tuple(dims)
 
 
-def map_raster(
-    raster_ds,
-    originalDataset,
-    footprint,
-    cross_antimeridian=False,
-):
+def _constant_along(lon, lat, dim):
     """
-    Map a raster onto an image grid defined by originalDataset.
+    Whether image longitudes and latitudes are the same along a dimension.
 
     Parameters
     ----------
-    raster_ds : xarray.Dataset or xarray.DataArray
-        Raster with valid `.rio` accessor.
-    originalDataset : xarray.Dataset
-        Dataset defining the target image grid (lon/lat in image dims).
-    footprint : shapely.geometry.Polygon
-        Footprint of the target grid.
-    cross_antimeridian : bool, default False
+    lon : xarray.DataArray
+    lat : xarray.DataArray
+    dim : str
 
     Returns
     -------
-    xarray.Dataset or xarray.DataArray
+    bool
+        NaN compare equal.
     """
+    for da in (lon, lat):
+        first = da.isel({dim: 0})
+        same = (da == first) | (da.isnull() & first.isnull())
+        if not bool(same.all()):
+            return False
+    return True
 
-    # --- target lon/lat ---
-    if "longitude" in originalDataset:
-        target_lon = originalDataset["longitude"]
-        target_lat = originalDataset["latitude"]
+
+def _spline_coefficients(y, x, values):
+    """
+    Cubic interpolating spline coefficients of a regular grid.
+
+    The tensor-product spline (same as `scipy.interpolate.RectBivariateSpline`
+    with ``s=0``) is solved separably along y then x, so any leading
+    dimensions of `values` (e.g. time) share the knots and are solved at once.
+
+    Parameters
+    ----------
+    y : numpy.ndarray
+        Increasing source latitudes.
+    x : numpy.ndarray
+        Increasing source longitudes.
+    values : numpy.ndarray
+        Array of shape (..., y, x).
+
+    Returns
+    -------
+    tuple
+        Coefficients of shape (..., y, x), y knots and x knots.
+    """
+    # BSpline.c holds the interpolation axis first
+    spline_y = make_interp_spline(y, values, k=3, axis=-2)
+    coeffs = np.moveaxis(spline_y.c, 0, -2)
+    spline_x = make_interp_spline(x, coeffs, k=3, axis=-1)
+    coeffs = np.moveaxis(spline_x.c, 0, -1)
+    return coeffs, spline_y.t, spline_x.t
+
+
+def _has_nan(values):
+    """
+    Whether an array has NaN, by reduction (no full boolean temporary).
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+
+    Returns
+    -------
+    bool
+    """
+    # a sum is NaN as soon as one element is (or with +inf and -inf, in
+    # which case the caller's NaN mask is simply empty)
+    return values.dtype.kind in "fc" and bool(np.isnan(np.sum(values)))
+
+
+def _float_dtype(dtype):
+    """
+    Floating point dtype the mapping is computed and returned in.
+
+    Parameters
+    ----------
+    dtype : data-type
+
+    Returns
+    -------
+    numpy.dtype
+    """
+    dtype = np.dtype(dtype)
+    if dtype.kind != "f":
+        raise ValueError(f"dtype must be a floating point type, got {dtype}")
+    return dtype
+
+
+def _variable_methods(raster_ds, method=None):
+    """
+    Interpolation method of each variable of a raster.
+
+    Parameters
+    ----------
+    raster_ds : xarray.Dataset
+    method : {"cubic", "nearest"} or dict, optional
+        See `map_raster`.
+
+    Returns
+    -------
+    dict
+        Method per variable name.
+    """
+    if method is None or isinstance(method, str):
+        default, per_variable = method, {}
     else:
-        target_lon = originalDataset["owiLon"]
-        target_lat = originalDataset["owiLat"]
+        default, per_variable = None, dict(method)
+        unknown = set(per_variable) - set(raster_ds.data_vars)
+        if unknown:
+            raise ValueError(f"method given for unknown variables {sorted(unknown)}")
 
-    # --- ensure geographic CRS ---
-    if not raster_ds.rio.crs.is_geographic:
-        raster_ds = raster_ds.rio.reproject(4326)
+    methods = {}
+    for var in raster_ds:
+        var_method = per_variable.get(var, default)
+        if var_method is None:
+            # interpolated class codes are meaningless
+            var_method = "nearest" if raster_ds[var].dtype.kind in "iub" else "cubic"
+        if var_method not in ("cubic", "nearest"):
+            raise ValueError(f"method must be 'cubic' or 'nearest', got {var_method!r}")
+        methods[var] = var_method
+    return methods
+
+
+def _check_vectors(raster_ds, vectors, methods):
+    """
+    Validate the ``(u, v)`` pairs of `map_raster`.
+
+    Parameters
+    ----------
+    raster_ds : xarray.Dataset
+    vectors : sequence of tuple of str
+    methods : dict
+        Method per variable (see `_variable_methods`).
+
+    Returns
+    -------
+    list of tuple of str
+    """
+    vectors = [tuple(pair) for pair in vectors]
+    for pair in vectors:
+        if len(pair) != 2:
+            raise ValueError(f"vectors must be (u, v) pairs, got {pair!r}")
+        missing = [var for var in pair if var not in raster_ds.data_vars]
+        if missing:
+            raise ValueError(f"vector components {missing} not in the raster")
+        u, v = (raster_ds[var] for var in pair)
+        if u.shape != v.shape:
+            raise ValueError(f"vector components {pair} differ in shape")
+        # rotated in place: floating point outputs, mapped the same way
+        method = methods[pair[0]]
+        floats = method == "cubic" or (u.dtype.kind == "f" and v.dtype == u.dtype)
+        if methods[pair[1]] != method or not floats:
+            raise ValueError(
+                f"vector components {pair} must be mapped with the same method, "
+                "into the same floating point type"
+            )
+    return vectors
+
+
+def _fill_nan(values, nan_mask, n_iter=20):
+    """
+    Inpaint NaN, per (y, x) slice.
+
+    Holes are first filled with the nearest valid value, then smoothed by a
+    few Jacobi iterations of the Laplace equation (mean of the 4 neighbours),
+    so the spline does not ring around them.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Array of shape (..., y, x).
+    nan_mask : numpy.ndarray
+        `numpy.isnan(values)`.
+    n_iter : int, default 20
+        Number of smoothing iterations.
+
+    Returns
+    -------
+    numpy.ndarray
+        Filled copy of `values` (zeros for all-NaN slices).
+    """
+    filled = np.where(nan_mask, 0.0, values)
+    for index in np.ndindex(values.shape[:-2]):
+        mask = nan_mask[index]
+        if not mask.any() or mask.all():
+            continue
+        nearest = distance_transform_edt(
+            mask, return_distances=False, return_indices=True
+        )
+        field = values[index][tuple(nearest)]
+
+        # flat indices of the holes and of their 4 neighbours (edge clipped)
+        rows, cols = np.nonzero(mask)
+        ny, nx = mask.shape
+        holes = rows * nx + cols
+        neighbours = np.stack(
+            [
+                np.maximum(rows - 1, 0) * nx + cols,
+                np.minimum(rows + 1, ny - 1) * nx + cols,
+                rows * nx + np.maximum(cols - 1, 0),
+                rows * nx + np.minimum(cols + 1, nx - 1),
+            ]
+        )
+        flat = field.reshape(-1)
+        for _ in range(n_iter):
+            flat[holes] = 0.25 * flat[neighbours].sum(axis=0)
+        filled[index] = field
+    return filled
 
-    # --- ensure dims ordering ---
-    raster_ds = raster_ds.transpose("y", "x")
 
-    # --- lon/lat bounds from footprint ---
+def _nan_cells(nan_mask):
+    """
+    Raster cells with at least one NaN corner.
+
+    This is the NaN mask dilated by the 2x2 bilinear stencil: a point falling
+    in such a cell is NaN, as with linear interpolation.
+
+    Parameters
+    ----------
+    nan_mask : numpy.ndarray
+        Boolean array of shape (..., y, x).
+
+    Returns
+    -------
+    numpy.ndarray
+        Boolean array of shape (..., y - 1, x - 1).
+    """
+    return (
+        nan_mask[..., :-1, :-1]
+        | nan_mask[..., 1:, :-1]
+        | nan_mask[..., :-1, 1:]
+        | nan_mask[..., 1:, 1:]
+    )
+
+
+def _footprint_ranges(footprint, cross_antimeridian):
+    """
+    Lon/lat bounds of the footprint.
+
+    Parameters
+    ----------
+    footprint : shapely.geometry.Polygon
+    cross_antimeridian : bool
+        If True, longitudes are returned in [0, 360).
+
+    Returns
+    -------
+    tuple of list
+        lon_range, lat_range
+    """
     if cross_antimeridian:
         x_vals = np.asarray(footprint.exterior.xy[0]) % 360
         lon_range = [x_vals.min(), x_vals.max()]
@@ -67,80 +303,2700 @@ def map_raster(
         lon1, lat1, lon2, lat2 = footprint.exterior.bounds
         lon_range = [lon1, lon2]
         lat_range = [lat1, lat2]
+    return lon_range, lat_range
 
-    # --- ensure increasing raster coords ---
-    for coord in ("x", "y"):
-        if raster_ds[coord].values[-1] < raster_ds[coord].values[0]:
-            raster_ds = raster_ds.reindex({coord: raster_ds[coord][::-1]})
 
-    # --- restrict raster to footprint bbox ---
-    ilon_range = [
-        max(1, np.searchsorted(raster_ds.x.values, lon_range[0])),
-        min(np.searchsorted(raster_ds.x.values, lon_range[1]), raster_ds.x.size),
-    ]
-    ilat_range = [
-        max(1, np.searchsorted(raster_ds.y.values, lat_range[0])),
-        min(np.searchsorted(raster_ds.y.values, lat_range[1]), raster_ds.y.size),
-    ]
+def _crosses_antimeridian(lon):
+    """
+    Whether longitudes wrap around the antimeridian.
 
-    ilon_range, ilat_range = [[rg[0] - 1, rg[1] + 1] for rg in (ilon_range, ilat_range)]
+    Longitudes of a footprint (or of image points), brought back to
+    [-180, 180), spanning more than 180 degrees are taken as jumping by 360
+    at the antimeridian. Longitudes in [0, 360) jumping at Greenwich do not
+    cross it.
+
+    Parameters
+    ----------
+    lon : array_like
+
+    Returns
+    -------
+    bool
+    """
+    lon = (np.asarray(lon) + 180) % 360 - 180
+    return bool(np.nanmax(lon) - np.nanmin(lon) > 180)
+
+
+def _greenwich_footprint(footprint, cross_antimeridian):
+    """
+    Footprint with longitudes in [0, 360) jumping at Greenwich brought back
+    to [-180, 180).
+
+    As for the antimeridian (see `_crosses_antimeridian`), longitudes
+    spanning more than 180 degrees are taken as jumping by 360.
+
+    Parameters
+    ----------
+    footprint : shapely.geometry.Polygon
+    cross_antimeridian : bool
+
+    Returns
+    -------
+    tuple
+        The footprint, and whether it was brought back (then so must be the
+        image longitudes).
+    """
+    lon = np.asarray(footprint.exterior.xy[0])
+    span = np.nanmax(lon) - np.nanmin(lon)
+    if cross_antimeridian or np.nanmin(lon) < 0 or not 180 < span < 360:
+        return footprint, False
+
+    def lon180(coords):
+        return np.column_stack([(coords[:, 0] + 180) % 360 - 180, coords[:, 1]])
+
+    return shapely.transform(footprint, lon180), True
 
-    raster_ds = raster_ds.isel(
-        x=slice(*ilon_range),
-        y=slice(*ilat_range),
+
+@functools.lru_cache(maxsize=16)
+def _get_transformer(crs_from, crs_to):
+    """
+    Cached `pyproj.Transformer` between two CRS (as WKT or EPSG strings).
+    """
+    return Transformer.from_crs(crs_from, crs_to, always_xy=True)
+
+
+def _transform_coords(transformer, lon, lat):
+    """
+    Transform image lon/lat DataArrays (numpy or dask backed) with a transformer.
+
+    Returns
+    -------
+    tuple of xarray.DataArray
+        x, y with the same dims and coords as `lon`.
+    """
+    return xr.apply_ufunc(
+        transformer.transform,
+        lon,
+        lat,
+        output_core_dims=[[], []],
+        dask="parallelized",
+        output_dtypes=["f8", "f8"],
     )
 
-    # --- intermediate grid size from image dims ---
-    az_dim, ra_dim = _get_image_dims(originalDataset)
-    ny = originalDataset.sizes[az_dim]
-    nx = originalDataset.sizes[ra_dim]
 
-    num = min((ny + nx) // 2, 1000)
+def _projected_ranges(transformer, lon_range, lat_range):
+    """
+    Bounds in a projected CRS of a lon/lat bbox (densified).
 
-    lons = np.linspace(*lon_range, num=num)
-    lats = np.linspace(*lat_range, num=num)
+    Parameters
+    ----------
+    transformer : pyproj.Transformer
+        From EPSG:4326 to the projected CRS.
+    lon_range : list of float
+        Longitude bounds, in [-180, 180) or [0, 360).
+    lat_range : list of float
 
-    # --- DataArray → Dataset ---
-    name = None
-    if isinstance(raster_ds, xr.DataArray):
-        name = raster_ds.name or "_tmp_name"
-        raster_ds = raster_ds.to_dataset(name=name)
+    Returns
+    -------
+    tuple of list
+        x_range, y_range
+    """
+    # back to [-180, 180): west > east means crossing the antimeridian
+    west, east = (((lon + 180) % 360) - 180 for lon in lon_range)
+    if lon_range[1] - lon_range[0] >= 360:
+        west, east = -180, 180
 
-    if cross_antimeridian:
-        target_lon = target_lon % 360
+    left, bottom, right, top = transformer.transform_bounds(
+        west, lat_range[0], east, lat_range[1], densify_pts=21
+    )
+    return [left, right], [bottom, top]
 
-    mapped = []
 
-    for var in raster_ds:
-        da = raster_ds[var]
+def _native_ranges(transformer, footprint, densify_pts=21):
+    """
+    Bounds of the footprint itself in a projected CRS.
 
-        # first interpolation step
-        if np.any(np.isnan(da.values)):
-            upscaled = da.interp(x=lons, y=lats)
-        else:
-            spline = RectBivariateSpline(
-                da.y.values,
-                da.x.values,
-                da.values,
-                kx=3,
-                ky=3,
-            )
-            upscaled = xr.DataArray(
-                spline(lats, lons),
-                dims=("y", "x"),
-                coords={"x": lons, "y": lats},
-                name=var,
-            )
+    Edges are densified, since straight lon/lat edges are curved in the
+    projected CRS.
+
+    Parameters
+    ----------
+    transformer : pyproj.Transformer
+        From EPSG:4326 to the projected CRS.
+    footprint : shapely.geometry.Polygon
+    densify_pts : int, default 21
+        Number of points per edge.
 
-        # final interpolation on image grid
-        mapped.append(upscaled.interp(x=target_lon, y=target_lat).drop_vars(("x", "y")))
+    Returns
+    -------
+    tuple of list
+        x_range, y_range
+    """
+    lon, lat = (np.asarray(c) for c in footprint.exterior.xy)
+    lon = np.unwrap(lon, period=360)
 
-    mapped_ds = xr.merge(mapped)
+    t = np.linspace(0, 1, densify_pts)
+    lon = (lon[:-1, None] + t * np.diff(lon)[:, None]).ravel()
+    lat = (lat[:-1, None] + t * np.diff(lat)[:, None]).ravel()
 
-    # --- Dataset → DataArray ---
-    if name is not None:
-        mapped_ds = mapped_ds[name]
-        if name == "_tmp_name":
-            mapped_ds.name = None
+    x, y = transformer.transform(lon, lat)
+    return [np.min(x), np.max(x)], [np.min(y), np.max(y)]
 
-    return mapped_ds
+
+def _grid_north(crs, lon, lat):
+    """
+    Angle of true north from the y axis of a projected CRS, at lon/lat points.
+
+    Parameters
+    ----------
+    crs : str
+        Projected CRS, as WKT or EPSG string.
+    lon : numpy.ndarray
+    lat : numpy.ndarray
+
+    Returns
+    -------
+    numpy.ndarray
+        Angle in radians, clockwise (from y towards x).
+    """
+    transformer = _get_transformer("EPSG:4326", crs)
+    x0, y0 = transformer.transform(lon, lat)
+    # about 100 m towards the north, or from the south close to the pole
+    step = np.where(lat > 89.0, -1e-3, 1e-3)
+    x1, y1 = transformer.transform(lon, lat + step)
+    sign = np.sign(step)
+    return np.arctan2(sign * (x1 - x0), sign * (y1 - y0))
+
+
+def _vector_angle(crs, target_lon, target_lat, heading=None, north=None):
+    """
+    Rotation of mapped vector components into their output frame.
+
+    Components along the x/y axes of a projected raster are rotated into
+    eastward/northward ones, and then, with a `heading`, into (range,
+    azimuth) ones. Both are rotations of the same form, so they add up.
+
+    Parameters
+    ----------
+    crs : pyproj.CRS
+        CRS of the raster, before any reprojection.
+    target_lon : xarray.DataArray
+        Image longitudes (numpy or dask backed).
+    target_lat : xarray.DataArray
+        Image latitudes.
+    heading : xarray.DataArray, optional
+        Azimuth direction of the image, in degrees clockwise from north,
+        broadcast like `target_lon`.
+    north : numpy.ndarray, optional
+        `_grid_north` of the image points, if already known (e.g. from a
+        cached `GeometryPlan`).
+
+    Returns
+    -------
+    numpy.ndarray or dask.array.Array or None
+        Angle in radians, of the shape of `target_lon`, or None if the
+        components are already in their output frame.
+    """
+    angle = None
+    if not crs.is_geographic:
+        angle = north
+        if angle is None:
+            angle = xr.apply_ufunc(
+                functools.partial(_grid_north, crs.to_wkt()),
+                target_lon,
+                target_lat,
+                dask="parallelized",
+                output_dtypes=["f8"],
+            ).data
+    if heading is not None:
+        heading = np.deg2rad(heading.data)
+        angle = heading if angle is None else angle + heading
+    return angle
+
+
+# footprints spanning more longitudes than this (close to a pole) are mapped
+# in a polar plane: the lon/lat bbox of their corners misses the image edges
+# bowing towards the pole
+_POLAR_LON_SPAN = 30.0
+
+
+def _polar_hemisphere(footprint, polar=None):
+    """
+    Hemisphere of a polar footprint.
+
+    A footprint is polar if it contains a pole (its longitudes wind once
+    around it) or spans more than `_POLAR_LON_SPAN` degrees of longitude.
+    Other footprints, even at high latitudes, are mapped faster and as
+    accurately in lon/lat.
+
+    Parameters
+    ----------
+    footprint : shapely.geometry.Polygon
+    polar : bool, optional
+        Force (True) or disable (False) the polar handling. Detected if None.
+
+    Returns
+    -------
+    int or None
+        1 (north) or -1 (south), None if the footprint is not handled as polar.
+    """
+    lon, lat = (np.asarray(c) for c in footprint.exterior.xy)
+    hemisphere = 1 if np.mean(lat) >= 0 else -1
+    if polar is not None:
+        return hemisphere if polar else None
+
+    winding = np.sum((np.diff(lon) + 180) % 360 - 180)
+    if abs(winding) > 180:
+        return hemisphere
+    if np.ptp(np.unwrap(lon, period=360)) > _POLAR_LON_SPAN:
+        return hemisphere
+    return None
+
+
+def _polar_plane(hemisphere, footprint):
+    """
+    Polar stereographic plane centred on a footprint.
+
+    Parameters
+    ----------
+    hemisphere : int
+        1 (north) or -1 (south).
+    footprint : shapely.geometry.Polygon
+
+    Returns
+    -------
+    tuple
+        ``(hemisphere, lon_0)``, with the central meridian `lon_0` the mean
+        longitude of the footprint, rounded to the degree.
+    """
+    lon = np.deg2rad(np.asarray(footprint.exterior.xy[0]))
+    lon_0 = np.rad2deg(np.arctan2(np.mean(np.sin(lon)), np.mean(np.cos(lon))))
+    return hemisphere, float(round(lon_0))
+
+
+def _to_polar_plane(plane, lon, lat):
+    """
+    Stereographic projection of lon/lat onto a polar plane, on the unit sphere.
+
+    The plane is only an interpolation space, so the sphere is enough, and
+    numpy is much faster than pyproj on millions of image points. Near the
+    pole, plane distances are great-circle distances in radians.
+
+    Parameters
+    ----------
+    plane : tuple
+        See `_polar_plane`.
+    lon : numpy.ndarray
+    lat : numpy.ndarray
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        x, y (the pole is at the origin, `lon_0` along -y in the north).
+    """
+    hemisphere, lon_0 = plane
+    r = 2 * np.tan(np.pi / 4 - hemisphere * np.deg2rad(lat) / 2)
+    theta = np.deg2rad(lon - lon_0)
+    return r * np.sin(theta), -hemisphere * r * np.cos(theta)
+
+
+def _from_polar_plane(plane, x, y):
+    """
+    Inverse of `_to_polar_plane`.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        lon in [-180, 180), lat.
+    """
+    hemisphere, lon_0 = plane
+    lat = hemisphere * (90 - 2 * np.rad2deg(np.arctan(np.hypot(x, y) / 2)))
+    lon = lon_0 + np.rad2deg(np.arctan2(x, -hemisphere * y))
+    return (lon + 180) % 360 - 180, lat
+
+
+def _polar_ranges(plane, target_lon, target_lat, densify_pts=101):
+    """
+    Lon/lat bounds of the polar plane rectangle covering the image points.
+
+    The intermediate grid of a polar footprint (see `_build_geometry`) spans
+    that rectangle, so the raster window must cover it, not only the
+    footprint.
+
+    Parameters
+    ----------
+    plane : tuple
+        See `_polar_plane`.
+    target_lon : numpy.ndarray
+    target_lat : numpy.ndarray
+    densify_pts : int, default 101
+        Number of points per edge of the rectangle.
+
+    Returns
+    -------
+    tuple
+        lon_range, lat_range and cross_antimeridian. If the rectangle contains
+        the pole, lon_range is the full circle [-180, 180] and lat_range
+        reaches the pole.
+    """
+    x, y = _to_polar_plane(plane, target_lon, target_lat)
+    left, right = np.nanmin(x), np.nanmax(x)
+    bottom, top = np.nanmin(y), np.nanmax(y)
+
+    t = np.linspace(0, 1, densify_pts)
+    edge_x = np.concatenate([left + (right - left) * t, np.full_like(t, right)])
+    edge_y = np.concatenate([np.full_like(t, bottom), bottom + (top - bottom) * t])
+    edge_x = np.concatenate([edge_x, right + left - edge_x])
+    edge_y = np.concatenate([edge_y, top + bottom - edge_y])
+    lon, lat = _from_polar_plane(plane, edge_x, edge_y)
+
+    if left <= 0 <= right and bottom <= 0 <= top:
+        # the pole is at the origin of the plane
+        if plane[0] > 0:
+            return [-180.0, 180.0], [np.min(lat), 90.0], False
+        return [-180.0, 180.0], [-90.0, np.max(lat)], False
+
+    cross_antimeridian = _crosses_antimeridian(lon)
+    if cross_antimeridian:
+        lon = lon % 360
+    return [np.min(lon), np.max(lon)], [np.min(lat), np.max(lat)], cross_antimeridian
+
+
+def _axis_window(axis, lower, upper, pad):
+    """
+    Index window of a monotonic axis covering [lower, upper].
+
+    Parameters
+    ----------
+    axis : numpy.ndarray
+        Increasing or decreasing 1D coordinates.
+    lower : float
+    upper : float
+    pad : int
+        Number of extra samples kept on each side of the bracketing samples.
+
+    Returns
+    -------
+    slice
+        Slice in the axis own orientation.
+    """
+    size = axis.size
+    descending = size > 1 and axis[-1] < axis[0]
+    increasing = axis[::-1] if descending else axis
+
+    start = max(np.searchsorted(increasing, lower, side="right") - 1 - pad, 0)
+    stop = min(np.searchsorted(increasing, upper, side="left") + 1 + pad, size)
+
+    if descending:
+        start, stop = size - stop, size - start
+    return slice(int(start), int(stop))
+
+
+def _lon_windows(axis, lower, upper, pad):
+    """
+    Index windows of a longitude axis covering [lower, upper], in any convention.
+
+    `lower` and `upper` may be in another longitude convention than `axis`
+    (e.g. [170, 190] on a [-180, 180) raster). For a global axis, the window
+    wraps around the raster seam: it is then made of the two slices on either
+    side of it, to be concatenated in the returned order.
+
+    Parameters
+    ----------
+    axis : numpy.ndarray
+        Increasing or decreasing 1D longitudes.
+    lower : float
+    upper : float
+    pad : int
+        Number of extra samples kept on each side of the bracketing samples.
+
+    Returns
+    -------
+    list of tuple
+        ``(slice, shift)`` per slice, in the axis own orientation: the
+        longitudes of the slice plus `shift` (a multiple of 360) are in the
+        convention of `lower` and `upper`.
+    """
+    size = axis.size
+    descending = size > 1 and axis[-1] < axis[0]
+    increasing = axis[::-1] if descending else axis
+
+    # samples in one period: a global axis may repeat its first longitude
+    period = None
+    if size > 1:
+        extent = increasing[-1] - increasing[0]
+        spacing = extent / (size - 1)
+        if np.isclose(extent, 360, atol=spacing / 2):
+            period = size - 1
+        elif np.isclose(extent + spacing, 360, atol=spacing / 2):
+            period = size
+
+    if period is None:
+        # multiple of 360 bringing [lower, upper] closest to the axis
+        middle = (lower + upper - increasing[0] - increasing[-1]) / 2
+        shift = 360 * np.round(middle / 360)
+        start = np.searchsorted(increasing, lower - shift, side="right") - 1 - pad
+        stop = np.searchsorted(increasing, upper - shift, side="left") + 1 + pad
+        pieces = [(max(start, 0), min(stop, size), 0)]
+    else:
+        # indices on the periodic extension of the axis: a window longer than
+        # one period (e.g. a full circle with its pad) repeats samples
+        def extended_index(lon, side):
+            turn = int(np.floor((lon - increasing[0]) / 360))
+            lon = lon - 360 * turn
+            return np.searchsorted(increasing[:period], lon, side=side) + turn * period
+
+        shift = 0
+        start = extended_index(lower, "right") - 1 - pad
+        stop = extended_index(upper, "left") + 1 + pad
+        pieces = [
+            (max(start - turn * period, 0), min(stop - turn * period, period), turn)
+            for turn in range(start // period, (stop - 1) // period + 1)
+        ]
+
+    windows = []
+    for start, stop, turn in pieces:
+        if descending:
+            start, stop = size - stop, size - start
+        windows.append((slice(int(start), int(stop)), float(shift + 360 * turn)))
+    return windows[::-1] if descending else windows
+
+
+def _crop_window(raster_x, raster_y, lon_range, lat_range):
+    """
+    Raster window covering a lon/lat bbox, with one pixel of margin.
+
+    Parameters
+    ----------
+    raster_x : numpy.ndarray
+        Increasing raster longitudes.
+    raster_y : numpy.ndarray
+        Increasing raster latitudes.
+    lon_range : list of float
+    lat_range : list of float
+
+    Returns
+    -------
+    tuple of slice
+        x_slice, y_slice
+    """
+    ilon_range = [
+        max(1, np.searchsorted(raster_x, lon_range[0])),
+        min(np.searchsorted(raster_x, lon_range[1]), raster_x.size),
+    ]
+    ilat_range = [
+        max(1, np.searchsorted(raster_y, lat_range[0])),
+        min(np.searchsorted(raster_y, lat_range[1]), raster_y.size),
+    ]
+
+    ilon_range, ilat_range = [[rg[0] - 1, rg[1] + 1] for rg in (ilon_range, ilat_range)]
+
+    return slice(*ilon_range), slice(*ilat_range)
+
+
+def _axis_tiles(axis, start, stop, tile_size, halo):
+    """
+    Tiles of a regular raster axis covering the nodes ``start:stop``.
+
+    Tiles are anchored to the axis coordinates (tile ``i`` starts at the node
+    of coordinate ``i * tile_size * spacing``, up to the grid offset), so the
+    same tiles are found from any window of the same raster.
+
+    Parameters
+    ----------
+    axis : numpy.ndarray
+        Increasing raster coordinates of a window.
+    start : int
+    stop : int
+    tile_size : int
+    halo : int
+
+    Returns
+    -------
+    list of tuple or None
+        ``(tile index, region, core, out)`` per tile: the tile with its halo
+        as a slice of `axis`, the part of its core inside ``start:stop``
+        relative to the core, and the same part relative to ``start``. None if
+        the axis is not regular or a tile with its halo is not inside it.
+    """
+    spacing = axis[1] - axis[0]
+    if not np.allclose(np.diff(axis), spacing, rtol=1e-6, atol=0):
+        return None
+    # global index of axis[0]; the 0.25 shift keeps it stable for grids
+    # offset by half a pixel
+    origin = int(np.floor(axis[0] / spacing + 0.25))
+
+    tiles = []
+    for tile in range(
+        (origin + start) // tile_size, (origin + stop - 1) // tile_size + 1
+    ):
+        core_start = tile * tile_size - origin
+        region = slice(core_start - halo, core_start + tile_size + halo)
+        if region.start < 0 or region.stop > axis.size:
+            return None
+        lower = max(core_start, start)
+        upper = min(core_start + tile_size, stop)
+        tiles.append(
+            (
+                tile,
+                region,
+                slice(lower - core_start, upper - core_start),
+                slice(lower - start, upper - start),
+            )
+        )
+    return tiles
+
+
+def _intermediate_size(extent, spacing, oversampling, max_size=1000):
+    """
+    Number of intermediate grid points along one axis.
+
+    Parameters
+    ----------
+    extent : float
+        Footprint extent along the axis.
+    spacing : float
+        Raster pixel spacing along the axis.
+    oversampling : float
+        Intermediate points per raster pixel.
+    max_size : int, default 1000
+
+    Returns
+    -------
+    int
+    """
+    return int(np.clip(np.ceil(extent / spacing * oversampling) + 1, 4, max_size))
+
+
+def _build_geometry(
+    raster_x,
+    raster_y,
+    target_lon,
+    target_lat,
+    lon_range,
+    lat_range,
+    cross_antimeridian,
+    image_shape,
+    intermediate_grid="image",
+    oversampling=4,
+    crop=True,
+    tiles=None,
+    polar=None,
+    methods=("cubic",),
+):
+    """
+    Compute everything in `map_raster` that only depends on geometry.
+
+    Parameters
+    ----------
+    raster_x : numpy.ndarray
+        Increasing raster longitudes.
+    raster_y : numpy.ndarray
+        Increasing raster latitudes.
+    target_lon : numpy.ndarray
+        Image longitudes.
+    target_lat : numpy.ndarray
+        Image latitudes.
+    lon_range : list of float
+        Longitude bounds of the image.
+    lat_range : list of float
+        Latitude bounds of the image.
+    cross_antimeridian : bool
+        If True, longitudes are handled in [0, 360).
+    image_shape : tuple of int
+        (azimuth, range) image size, used to size the "image" intermediate grid.
+    intermediate_grid : {"image", "adaptive"} or None, default "image"
+        See `map_raster`.
+    oversampling : float, default 4
+        See `map_raster`.
+    crop : bool, default True
+        Crop the raster to the image bbox. If False, the plan covers the
+        whole raster (e.g. splines fitted once for several images).
+    tiles : tuple of int, optional
+        ``(tile_size, halo)`` of a `SplineCache`. If the raster is regular and
+        large enough around the crop window, the window is widened by two
+        pixels (the extended knots are only valid inside) and the plan
+        expects spline coefficients assembled from tiles.
+    polar : tuple, optional
+        Polar stereographic plane (see `_polar_plane`). The intermediate grid is
+        then regular in that plane, and the spline is evaluated on it with a
+        `SplinePlan`. `lon_range` and `lat_range` must cover the whole grid
+        (see `_polar_ranges`).
+    methods : tuple of str, default ("cubic",)
+        Methods of the variables to map (see `map_raster`): the spline
+        mapping is only built for "cubic", and the nearest-neighbour lookup
+        for "nearest".
+
+    Returns
+    -------
+    GeometryPlan
+    """
+    if crop:
+        x_slice, y_slice = _crop_window(raster_x, raster_y, lon_range, lat_range)
+    else:
+        # concrete bounds, so that the plan can be saved (see `PlanCache`)
+        x_slice, y_slice = slice(0, len(raster_x)), slice(0, len(raster_y))
+
+    if crop and tiles is not None and "cubic" in methods:
+        x_start, x_stop, _ = x_slice.indices(raster_x.size)
+        y_start, y_stop, _ = y_slice.indices(raster_y.size)
+        wide_x = slice(x_start - 2, x_stop + 2)
+        wide_y = slice(y_start - 2, y_stop + 2)
+        if (
+            _axis_tiles(raster_x, wide_x.start, wide_x.stop, *tiles) is not None
+            and _axis_tiles(raster_y, wide_y.start, wide_y.stop, *tiles) is not None
+        ):
+            x_slice, y_slice = wide_x, wide_y
+        else:
+            tiles = None
+    else:
+        tiles = None
+    knots = "not-a-knot" if tiles is None else "extended"
+
+    if cross_antimeridian:
+        target_lon = target_lon % 360
+    elif polar is not None:
+        # polar windows are in [-180, 180), as returned by pyproj
+        target_lon = (target_lon + 180) % 360 - 180
+
+    nearest = None
+    if "nearest" in methods:
+        # --- raster pixel of each image point, on the crop window ---
+        nearest = NearestPlan(
+            raster_x[x_slice], raster_y[y_slice], target_lon, target_lat
+        )
+    if "cubic" not in methods:
+        return GeometryPlan(x_slice, y_slice, None, None, None, nearest=nearest)
+
+    if intermediate_grid is None:
+        # --- spline evaluated directly at the image points ---
+        mapping = SplinePlan(
+            raster_x[x_slice], raster_y[y_slice], target_lon, target_lat, knots=knots
+        )
+        return GeometryPlan(
+            x_slice, y_slice, None, None, mapping, tiles, nearest=nearest
+        )
+
+    if polar is None:
+        target_x, target_y = target_lon, target_lat
+        grid_ranges = (lon_range, lat_range)
+        spacings = (
+            np.median(np.diff(raster_x[x_slice])),
+            np.median(np.diff(raster_y[y_slice])),
+        )
+    else:
+        # --- intermediate grid regular in the polar stereographic plane ---
+        # (a lon/lat grid is huge and badly conditioned around the pole)
+        target_x, target_y = _to_polar_plane(polar, target_lon, target_lat)
+        grid_ranges = (
+            [np.nanmin(target_x), np.nanmax(target_x)],
+            [np.nanmin(target_y), np.nanmax(target_y)],
+        )
+        # raster latitude spacing, as a distance on the unit sphere
+        spacing = np.deg2rad(np.median(np.diff(raster_y[y_slice])))
+        spacings = (spacing, spacing)
+
+    if intermediate_grid == "image":
+        # --- intermediate grid size from image dims ---
+        ny, nx = image_shape
+        num_lon = num_lat = min((ny + nx) // 2, 1000)
+    elif intermediate_grid == "adaptive":
+        # --- per axis, from raster spacing and footprint extent ---
+        num_lon, num_lat = (
+            _intermediate_size(rg[1] - rg[0], spacing, oversampling)
+            for rg, spacing in zip(grid_ranges, spacings)
+        )
+    else:
+        raise ValueError(
+            f"intermediate_grid must be 'image', 'adaptive' or None, "
+            f"got {intermediate_grid!r}"
+        )
+
+    lons = np.linspace(*grid_ranges[0], num=num_lon)
+    lats = np.linspace(*grid_ranges[1], num=num_lat)
+
+    upscale = None
+    if polar is not None:
+        grid_lon, grid_lat = _from_polar_plane(polar, *np.meshgrid(lons, lats))
+        if cross_antimeridian:
+            grid_lon = grid_lon % 360
+        upscale = SplinePlan(
+            raster_x[x_slice], raster_y[y_slice], grid_lon, grid_lat, knots=knots
+        )
+
+    return GeometryPlan(
+        x_slice,
+        y_slice,
+        lons,
+        lats,
+        MappingPlan(lons, lats, target_x, target_y),
+        tiles,
+        upscale,
+        nearest,
+    )
+
+
+def _fit_variables(raster_ds, executor=None, dtype="f8"):
+    """
+    Fit the cubic spline of all variables of a raster window.
+
+    Parameters
+    ----------
+    raster_ds : xarray.Dataset
+        Raster window with (..., y, x) variables and increasing x/y.
+    executor : concurrent.futures.Executor, optional
+        Executor over which variables are spread.
+    dtype : data-type, default "f8"
+        Dtype the coefficients are stored in. The spline is always solved in
+        float64.
+
+    Returns
+    -------
+    list of tuple
+        One ``(variables, coeffs, knots_y, knots_x, nan_cells)`` per group of
+        variables sharing extra dims: stacked coefficients of shape
+        (variables, ..., y, x), knots, and per variable the NaN cells mask
+        (see `_nan_cells`) or None.
+    """
+    x, y = raster_ds.x.values, raster_ds.y.values
+
+    # variables sharing extra dims are stacked in the same buffers
+    groups = {}
+    for var in raster_ds:
+        groups.setdefault(raster_ds[var].shape[:-2], []).append(var)
+
+    fitted = []
+    for lead, group in groups.items():
+        with _stage("fit", variables=tuple(group), tiles=False) as stage:
+            coeffs = np.empty((len(group),) + lead + (y.size, x.size), dtype=dtype)
+            knots = []
+
+            def fit(i, var):
+                values = raster_ds[var].values
+                nan_cells = None
+
+                if _has_nan(values):
+                    # spline on inpainted values, then NaN where the raster cell
+                    # around the point has a missing corner
+                    nan_mask = np.isnan(values)
+                    values = _fill_nan(values, nan_mask)
+                    nan_cells = _nan_cells(nan_mask)
+
+                coeffs[i], knots_y, knots_x = _spline_coefficients(y, x, values)
+                if i == 0:
+                    knots.extend((knots_y, knots_x))
+                return nan_cells
+
+            if executor is None:
+                nan_cells = [fit(i, var) for i, var in enumerate(group)]
+            else:
+                nan_cells = list(executor.map(fit, range(len(group)), group))
+            stage.update(
+                shape=coeffs.shape,
+                nan_variables=tuple(
+                    var for var, cells in zip(group, nan_cells) if cells is not None
+                ),
+            )
+
+        fitted.append((group, coeffs, *knots, nan_cells))
+
+    return fitted
+
+
+def _fit_tiles(
+    raster_ds, geometry, spline_cache=None, raster_id=None, executor=None, dtype="f8"
+):
+    """
+    Spline coefficients over the crop window, assembled from fitted tiles.
+
+    Tiles (see `SplineCache`) are taken from `spline_cache`. The missing
+    ones are fitted at once on the raster window covering them with their
+    halo.
+
+    Parameters
+    ----------
+    raster_ds : xarray.Dataset
+        Raster window with (..., y, x) variables and increasing x/y, covering
+        the tiles of `geometry` with their halo.
+    geometry : GeometryPlan
+        Plan with `tiles` set.
+    spline_cache : SplineCache, optional
+        Cache of tile coefficients. Tiles are fitted every time if None.
+    raster_id : str, optional
+        Identity of the raster (see `_raster_identity`). If None, each tile
+        is identified by a digest of its values and coordinates.
+    executor : concurrent.futures.Executor, optional
+        Executor over which variables are spread.
+    dtype : data-type, default "f8"
+        Dtype the assembled coefficients are stored in. Cached tiles are
+        kept in float64, so that they serve any dtype.
+
+    Returns
+    -------
+    list of tuple
+        As `_fit_variables`, with extended knots.
+    """
+    tile_size, halo = geometry.tiles
+    x, y = raster_ds.x.values, raster_ds.y.values
+    x_start, x_stop, _ = geometry.x_slice.indices(x.size)
+    y_start, y_stop, _ = geometry.y_slice.indices(y.size)
+    x_tiles = _axis_tiles(x, x_start, x_stop, tile_size, halo)
+    y_tiles = _axis_tiles(y, y_start, y_stop, tile_size, halo)
+
+    crop = raster_ds.isel(x=geometry.x_slice, y=geometry.y_slice)
+    knots_y = _spline_knots(crop.y.values, "extended")
+    knots_x = _spline_knots(crop.x.values, "extended")
+
+    groups = {}
+    for var in raster_ds:
+        groups.setdefault(raster_ds[var].shape[:-2], []).append(var)
+
+    fitted = []
+    for lead, group in groups.items():
+        with _stage("fit", variables=tuple(group), tiles=True) as stage:
+            coeffs = np.empty(
+                (len(group),) + lead + (y_stop - y_start, x_stop - x_start), dtype=dtype
+            )
+
+            def fit(i, var):
+                values = raster_ds[var].values
+                tiles, missing = {}, {}
+                for tile_y, region_y, _, _ in y_tiles:
+                    for tile_x, region_x, _, _ in x_tiles:
+                        identity = raster_id
+                        if identity is None:
+                            identity = geometry_key(
+                                x[region_x],
+                                y[region_y],
+                                values[..., region_y, region_x],
+                            )
+                        key = (var, tile_y, tile_x, identity)
+                        tile = (
+                            spline_cache.get(key) if spline_cache is not None else None
+                        )
+                        if tile is None:
+                            missing[tile_y, tile_x] = (key, region_y, region_x)
+                        else:
+                            tiles[tile_y, tile_x] = tile
+
+                if missing:
+                    # one fit over all missing tiles with their halo, cut in tiles
+                    start = time.perf_counter()
+                    fit_y = slice(
+                        min(m[1].start for m in missing.values()),
+                        max(m[1].stop for m in missing.values()),
+                    )
+                    fit_x = slice(
+                        min(m[2].start for m in missing.values()),
+                        max(m[2].stop for m in missing.values()),
+                    )
+                    region = values[..., fit_y, fit_x]
+                    if _has_nan(region):
+                        region = _fill_nan(region, np.isnan(region))
+                    region = _spline_coefficients(y[fit_y], x[fit_x], region)[0]
+                    fit_time = (time.perf_counter() - start) / len(missing)
+                    for index, (key, region_y, region_x) in missing.items():
+                        offset_y = region_y.start + halo - fit_y.start
+                        offset_x = region_x.start + halo - fit_x.start
+                        tile = np.ascontiguousarray(
+                            region[
+                                ...,
+                                offset_y : offset_y + tile_size,
+                                offset_x : offset_x + tile_size,
+                            ]
+                        )
+                        if spline_cache is not None:
+                            spline_cache.put(key, tile, fit_time)
+                        tiles[index] = tile
+
+                for tile_y, _, core_y, out_y in y_tiles:
+                    for tile_x, _, core_x, out_x in x_tiles:
+                        coeffs[i][..., out_y, out_x] = tiles[tile_y, tile_x][
+                            ..., core_y, core_x
+                        ]
+
+                values = crop[var].values
+                return _nan_cells(np.isnan(values)) if _has_nan(values) else None
+
+            if executor is None:
+                nan_cells = [fit(i, var) for i, var in enumerate(group)]
+            else:
+                nan_cells = list(executor.map(fit, range(len(group)), group))
+            stage.update(
+                shape=coeffs.shape,
+                nan_variables=tuple(
+                    var for var, cells in zip(group, nan_cells) if cells is not None
+                ),
+            )
+
+        fitted.append((group, coeffs, knots_y, knots_x, nan_cells))
+
+    return fitted
+
+
+def _mask_nan_cells(values, nan_cells, cells):
+    """
+    Set to NaN the points of a `SplinePlan` falling in NaN raster cells.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Evaluated spline of shape (variables, ..., *target shape), modified in
+        place.
+    nan_cells : list of numpy.ndarray or None
+        Per variable, NaN cells mask (see `_nan_cells`) or None.
+    cells : numpy.ndarray
+        Flat raster cell index of each target point (`SplinePlan.cells`).
+    """
+    for field, invalid in zip(values, nan_cells):
+        if invalid is None:
+            continue
+        lead = invalid.shape[:-2]
+        invalid = invalid.reshape(lead + (-1,))[..., cells]
+        field.reshape(lead + (-1,))[invalid] = np.nan
+
+
+def _upscale(coeffs, knots_y, knots_x, nan_cells, x, y, geometry, executor=None):
+    """
+    First interpolation step of `_evaluate_variables`: fitted splines of a
+    group of variables evaluated on the intermediate grid of `geometry`.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (variables, ..., *intermediate grid shape), in the dtype
+        of `coeffs`, NaN in the NaN cells of the raster.
+    """
+    lead = coeffs.shape[:-2]
+    if geometry.upscale is not None:
+        # on a grid regular in a projected plane
+        upscaled = np.empty(lead + geometry.upscale.shape, dtype=coeffs.dtype)
+        geometry.upscale.apply(coeffs, out=upscaled, executor=executor)
+        _mask_nan_cells(upscaled, nan_cells, geometry.upscale.cells)
+        return upscaled
+
+    # on the regular lon/lat intermediate grid
+    lons, lats = geometry.lons, geometry.lats
+    upscaled = np.empty(lead + (lats.size, lons.size), dtype=coeffs.dtype)
+    iy = np.clip(np.searchsorted(y, lats) - 1, 0, y.size - 2)
+    ix = np.clip(np.searchsorted(x, lons) - 1, 0, x.size - 2)
+
+    def upscale(i):
+        # scipy evaluates in float64, stored in the compute dtype
+        values = BSpline(knots_y, coeffs[i], 3, axis=coeffs.ndim - 3)(lats)
+        upscaled[i] = BSpline(knots_x, values, 3, axis=values.ndim - 1)(lons)
+        if nan_cells[i] is not None:
+            invalid = nan_cells[i][..., iy[:, None], ix[None, :]]
+            upscaled[i][invalid] = np.nan
+
+    if executor is None:
+        for i in range(len(coeffs)):
+            upscale(i)
+    else:
+        list(executor.map(upscale, range(len(coeffs))))
+    return upscaled
+
+
+def _evaluate_variables(fitted, x, y, geometry, executor=None, out=None):
+    """
+    Map fitted splines onto the image grid with a geometry plan.
+
+    Parameters
+    ----------
+    fitted : list of tuple
+        As returned by `_fit_variables`.
+    x : numpy.ndarray
+        Increasing raster longitudes the splines were fitted on.
+    y : numpy.ndarray
+        Increasing raster latitudes the splines were fitted on.
+    geometry : GeometryPlan
+        Plan built on the same `x` and `y`.
+    executor : concurrent.futures.Executor, optional
+        Executor over which variables (intermediate grid) and then tiles of
+        image points (final interpolation) are spread.
+    out : list of numpy.ndarray, optional
+        Per group of `fitted`, buffer of shape (variables, ..., *image shape)
+        and of the dtype of the coefficients to write the mapped values into
+        (e.g. shared with another process).
+
+    Returns
+    -------
+    dict of numpy.ndarray
+        Mapped values of shape (..., *image shape) per variable, in the dtype
+        of the fitted coefficients.
+    """
+    mapped = {}
+    for index, (group, coeffs, knots_y, knots_x, nan_cells) in enumerate(fitted):
+        lead = coeffs.shape[1:-2]
+
+        if geometry.direct:
+            # spline evaluated directly at the image points
+            upscaled = coeffs
+        else:
+            grid = "polar" if geometry.upscale is not None else "lonlat"
+            with _stage("evaluate", variables=tuple(group), grid=grid) as stage:
+                upscaled = _upscale(
+                    coeffs, knots_y, knots_x, nan_cells, x, y, geometry, executor
+                )
+                stage.update(shape=upscaled.shape)
+
+        # final interpolation on image grid, batched over the group
+        method = "spline" if geometry.direct else "bilinear"
+        with _stage("interp", variables=tuple(group), method=method) as stage:
+            if out is None:
+                values = np.empty(
+                    (len(group),) + lead + geometry.mapping.shape, dtype=coeffs.dtype
+                )
+            else:
+                values = out[index]
+            geometry.mapping.apply(upscaled, out=values, executor=executor)
+            if geometry.direct:
+                _mask_nan_cells(values, nan_cells, geometry.mapping.cells)
+            stage.update(shape=values.shape)
+
+        mapped.update(zip(group, values))
+
+    return mapped
+
+
+def _nearest_inputs(raster_ds):
+    """
+    Values and nodata of the variables of a raster window, for
+    `_nearest_variables`.
+    """
+    return {
+        var: (raster_ds[var].values, raster_ds[var].rio.nodata) for var in raster_ds
+    }
+
+
+def _check_nearest_fill(var, dtype, nodata, n_outside):
+    """
+    Check that image points off the raster can be filled for a variable
+    mapped with "nearest": NaN is only a default for floating point ones.
+    """
+    if n_outside and nodata is None and np.dtype(dtype).kind not in "fc":
+        raise ValueError(
+            f"{var!r} has no nodata to fill the {n_outside} image points off "
+            "the raster (0 may be a valid code): set one with rio.write_nodata"
+        )
+
+
+def _nearest_variables(variables, plan, out=None):
+    """
+    Map variables of a raster window with a nearest-neighbour plan.
+
+    Parameters
+    ----------
+    variables : dict of tuple
+        ``(values, nodata)`` per variable (see `_nearest_inputs`), on the
+        raster window the plan was built on.
+    plan : NearestPlan
+    out : dict of numpy.ndarray, optional
+        Buffers to write the mapped values into, per variable.
+
+    Returns
+    -------
+    dict of numpy.ndarray
+        Mapped values of shape (..., *image shape) per variable, in the dtype
+        of the variable. Image points outside of the window get the nodata
+        value of the variable (NaN if none for floating point variables).
+
+    Raises
+    ------
+    ValueError
+        If some image points are outside of the window and a variable is not
+        floating point and has no nodata.
+    """
+    out = out or {}
+    for var, (values, nodata) in variables.items():
+        _check_nearest_fill(var, values.dtype, nodata, plan.outside.sum())
+    with _stage("nearest", variables=tuple(variables), shape=plan.shape):
+        return {
+            var: plan.apply(values, nodata, out.get(var))
+            for var, (values, nodata) in variables.items()
+        }
+
+
+def _rotate_vectors(mapped, vectors, angle, block_size=2**15):
+    """
+    Rotate mapped ``(u, v)`` pairs by an angle field (see `_vector_angle`).
+
+    numpy arrays are rotated in place, block by block of image points: the
+    sine and cosine of the angle and the rotated components only take
+    temporaries of `block_size` points.
+
+    Parameters
+    ----------
+    mapped : dict of numpy.ndarray or dask.array.Array
+        Mapped values of shape (..., *image shape) per variable, updated.
+    vectors : list of tuple of str
+    angle : numpy.ndarray or dask.array.Array
+        Angle in radians, of the image shape (numpy for numpy values): the
+        first axis of the input frame is at `angle` from the first axis of
+        the output frame, towards its second axis.
+    block_size : int, default 2**15
+        Number of image points rotated at once.
+    """
+    if not all(isinstance(mapped[var], np.ndarray) for pair in vectors for var in pair):
+        # lazy: elementwise, fused by dask
+        cos, sin = np.cos(angle), np.sin(angle)
+        for u, v in vectors:
+            mapped[u], mapped[v] = (
+                mapped[u] * cos - mapped[v] * sin,
+                mapped[u] * sin + mapped[v] * cos,
+            )
+        return
+
+    image_ndim, angle = angle.ndim, angle.ravel()
+    for pair in vectors:
+        u, v = (np.ascontiguousarray(mapped[var]) for var in pair)
+        mapped.update(zip(pair, (u, v)))
+        # (extra dims, image points) views
+        flat_u = u.reshape(u.shape[: u.ndim - image_ndim] + (-1,))
+        flat_v = v.reshape(flat_u.shape)
+        for start in range(0, angle.size, block_size):
+            block = slice(start, start + block_size)
+            cos = np.cos(angle[block]).astype(u.dtype)
+            sin = np.sin(angle[block]).astype(u.dtype)
+            u_block, v_block = flat_u[..., block], flat_v[..., block]
+            rotated = u_block * cos - v_block * sin
+            v_block *= cos
+            v_block += u_block * sin
+            u_block[...] = rotated
+
+
+def _map_variables(
+    raster_ds,
+    geometry,
+    executor=None,
+    spline_cache=None,
+    raster_id=None,
+    dtype="f8",
+    nearest=(),
+):
+    """
+    Map all variables of a raster with a geometry plan.
+
+    Parameters
+    ----------
+    raster_ds : xarray.Dataset
+        Raster with (..., y, x) variables and increasing x/y.
+    geometry : GeometryPlan
+    executor : concurrent.futures.Executor, optional
+        Executor over which variables (spline fitting) and then tiles of
+        image points (final interpolation) are spread.
+    spline_cache : SplineCache, optional
+        Cache of spline coefficients, for a plan with `tiles`.
+    raster_id : str, optional
+        Identity of the raster in `spline_cache`, see `_fit_tiles`.
+    dtype : data-type, default "f8"
+        Dtype of the coefficients, intermediate grid and mapped values.
+    nearest : sequence of str, default ()
+        Variables taken from the nearest raster pixel (`geometry.nearest`),
+        in their own dtype, instead of the spline.
+
+    Returns
+    -------
+    dict of numpy.ndarray
+        Mapped values of shape (..., *image shape) per variable.
+    """
+    mapped = {}
+    if nearest:
+        # no spline, no intermediate grid, no cast
+        window = raster_ds[list(nearest)].isel(x=geometry.x_slice, y=geometry.y_slice)
+        mapped.update(_nearest_variables(_nearest_inputs(window), geometry.nearest))
+        raster_ds = raster_ds[[var for var in raster_ds if var not in mapped]]
+        if not raster_ds.data_vars:
+            return mapped
+
+    if geometry.tiles is not None:
+        fitted = _fit_tiles(
+            raster_ds, geometry, spline_cache, raster_id, executor, dtype
+        )
+        raster_ds = raster_ds.isel(x=geometry.x_slice, y=geometry.y_slice)
+    else:
+        # --- restrict raster to footprint bbox ---
+        with _stage("crop") as stage:
+            raster_ds = raster_ds.isel(x=geometry.x_slice, y=geometry.y_slice)
+            stage.update(shape=(raster_ds.sizes["y"], raster_ds.sizes["x"]))
+        fitted = _fit_variables(raster_ds, executor, dtype)
+
+    mapped.update(
+        _evaluate_variables(
+            fitted, raster_ds.x.values, raster_ds.y.values, geometry, executor
+        )
+    )
+    return mapped
+
+
+def _map_block(
+    lon,
+    lat,
+    raster_ds,
+    variables,
+    cross_antimeridian,
+    image_axes,
+    geometry_options,
+    dtype="f8",
+    method="cubic",
+):
+    """
+    Map variables onto one block of the image grid (see `_map_lazy`).
+
+    The raster is cropped to the bbox of the block only. All `variables`
+    are mapped with `method`.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (variables, ..., *block shape).
+    """
+    if not (np.isfinite(lon) & np.isfinite(lat)).any():
+        # e.g. NaN padding of the image grid: no raster window to crop
+        return _fill_block(raster_ds[variables], lon.shape, dtype, method)
+
+    lon_block = lon % 360 if cross_antimeridian else lon
+    lon_range = [np.nanmin(lon_block), np.nanmax(lon_block)]
+    lat_range = [np.nanmin(lat), np.nanmax(lat)]
+
+    geometry = _build_geometry(
+        raster_ds.x.values,
+        raster_ds.y.values,
+        lon,
+        lat,
+        lon_range,
+        lat_range,
+        cross_antimeridian,
+        tuple(lon.shape[axis] for axis in image_axes),
+        methods=(method,),
+        **geometry_options,
+    )
+    mapped = _map_variables(
+        raster_ds[variables],
+        geometry,
+        dtype=dtype,
+        nearest=variables if method == "nearest" else (),
+    )
+    return np.stack([mapped[var] for var in variables])
+
+
+def _fill_block(raster_ds, shape, dtype="f8", method="cubic"):
+    """
+    Block of image points all off the raster (see `_map_block`): NaN, or the
+    nodata of the variables mapped with "nearest".
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (variables, ..., *shape).
+    """
+    blocks = []
+    for var in raster_ds:
+        da = raster_ds[var]
+        fill = np.nan
+        if method == "nearest":
+            nodata = da.rio.nodata
+            _check_nearest_fill(var, da.dtype, nodata, int(np.prod(shape)))
+            dtype = da.dtype
+            fill = np.nan if nodata is None else nodata
+        blocks.append(np.full(da.shape[:-2] + shape, fill, dtype=dtype))
+    return np.stack(blocks)
+
+
+def _map_lazy(
+    raster_ds,
+    target_lon,
+    target_lat,
+    cross_antimeridian,
+    image_axes,
+    geometry_options,
+    dtype="f8",
+    methods=None,
+):
+    """
+    Lazily map a raster block by block over the chunks of the image lon/lat.
+
+    Parameters
+    ----------
+    raster_ds : xarray.Dataset
+        Raster already restricted to the footprint, with increasing x/y.
+    target_lon : xarray.DataArray
+        Dask-backed image longitudes.
+    target_lat : xarray.DataArray
+        Image latitudes, chunked as `target_lon`.
+    cross_antimeridian : bool
+    image_axes : tuple of int
+        Axes of (azimuth, range) in `target_lon`.
+    geometry_options : dict
+        Extra `_build_geometry` arguments (intermediate grid choice).
+    dtype : data-type, default "f8"
+        Dtype of the values mapped with the spline.
+    methods : dict, optional
+        Method per variable (see `_variable_methods`). All "cubic" if None.
+
+    Returns
+    -------
+    dict of dask.array.Array
+        Mapped values of shape (..., *image shape) per variable.
+    """
+    import dask.array as dsa
+
+    lon = target_lon.data
+    lat = target_lat.data
+
+    # variables sharing extra dims, method (and output dtype) are mapped by
+    # the same tasks
+    methods = methods or {}
+    groups = {}
+    for var in raster_ds:
+        method = methods.get(var, "cubic")
+        out_dtype = raster_ds[var].dtype if method == "nearest" else dtype
+        groups.setdefault((raster_ds[var].shape[:-2], method, out_dtype), []).append(
+            var
+        )
+
+    mapped = {}
+    for (lead_shape, method, out_dtype), variables in groups.items():
+        # map_blocks takes `dtype` for itself
+        stacked = dsa.map_blocks(
+            functools.partial(_map_block, dtype=dtype, method=method),
+            lon,
+            lat,
+            raster_ds=raster_ds,
+            variables=variables,
+            cross_antimeridian=cross_antimeridian,
+            image_axes=image_axes,
+            geometry_options=geometry_options,
+            dtype=out_dtype,
+            chunks=((len(variables),),) + tuple((n,) for n in lead_shape) + lon.chunks,
+            new_axis=list(range(1 + len(lead_shape))),
+        )
+        mapped.update({var: stacked[i] for i, var in enumerate(variables)})
+
+    return mapped
+
+
+def _target_coords(originalDataset):
+    """
+    Image longitudes and latitudes of a dataset.
+
+    Parameters
+    ----------
+    originalDataset : xarray.Dataset
+        Dataset with longitude/latitude or owiLon/owiLat variables.
+
+    Returns
+    -------
+    tuple of xarray.DataArray
+    """
+    if "longitude" in originalDataset:
+        return originalDataset["longitude"], originalDataset["latitude"]
+    return originalDataset["owiLon"], originalDataset["owiLat"]
+
+
+def _spatial_coords(target_lon, target_lat, image_dims):
+    """
+    Image longitudes and latitudes without the non-spatial dims.
+
+    Dims other than `image_dims` (e.g. pol) along which the geolocation is
+    the same are dropped, so that the mapping is computed once and then
+    broadcast along them (see `_broadcast_image`).
+
+    Parameters
+    ----------
+    target_lon : xarray.DataArray
+    target_lat : xarray.DataArray
+    image_dims : tuple of str
+
+    Returns
+    -------
+    tuple of xarray.DataArray
+    """
+    for dim in target_lon.dims:
+        if dim not in image_dims and _constant_along(target_lon, target_lat, dim):
+            target_lon = target_lon.isel({dim: 0}, drop=True)
+            target_lat = target_lat.isel({dim: 0}, drop=True)
+    return target_lon, target_lat
+
+
+def _image_heading(originalDataset, heading, target_lon):
+    """
+    Heading variable of an image, on the image lon/lat grid.
+
+    Parameters
+    ----------
+    originalDataset : xarray.Dataset
+    heading : str
+        Name of the heading variable, in degrees.
+    target_lon : xarray.DataArray
+        Image longitudes, reduced by `_spatial_coords`.
+
+    Returns
+    -------
+    xarray.DataArray
+        Heading broadcast like `target_lon`.
+    """
+    da = originalDataset[heading]
+    # taken once along the dims the geolocation does not depend on
+    da = da.isel({dim: 0 for dim in da.dims if dim not in target_lon.dims}, drop=True)
+    return da.broadcast_like(target_lon).transpose(*target_lon.dims)
+
+
+def _broadcast_image(values, dims, target_lon):
+    """
+    Broadcast mapped values along the image dims dropped by `_spatial_coords`.
+
+    Parameters
+    ----------
+    values : numpy.ndarray or dask.array.Array
+        Mapped values of shape (..., *shape of `dims`).
+    dims : tuple of str
+        Image dims of the trailing axes of `values`, in the order of
+        `target_lon` dims.
+    target_lon : xarray.DataArray
+        Image longitudes with all dims.
+
+    Returns
+    -------
+    numpy.ndarray or dask.array.Array
+        Read-only view of shape (..., *target_lon.shape).
+    """
+    if tuple(dims) == target_lon.dims:
+        return values
+    lead = values.shape[: values.ndim - len(dims)]
+    index = (slice(None),) * len(lead) + tuple(
+        slice(None) if dim in dims else np.newaxis for dim in target_lon.dims
+    )
+    return np.broadcast_to(values[index], lead + target_lon.shape)
+
+
+# tokens of the in-memory arrays seen by `_array_token`, by id: an id is only
+# unique while its array lives, so arrays are weakly referenced
+_array_tokens = {}
+_array_count = itertools.count()
+
+
+def _array_token(array):
+    """
+    Identity of a numpy array, without reading its values.
+
+    The memory it views (its base array, given a token of its own while it
+    lives) and how it views it (offset, shape, strides and dtype).
+
+    Returns
+    -------
+    str
+    """
+    base = array
+    while isinstance(base.base, np.ndarray):
+        base = base.base
+    entry = _array_tokens.get(id(base))
+    if entry is None or entry[0]() is not base:
+        key = id(base)
+        ref = weakref.ref(base, lambda _, key=key: _array_tokens.pop(key, None))
+        entry = _array_tokens[key] = (ref, next(_array_count))
+    offset = array.__array_interface__["data"][0] - base.__array_interface__["data"][0]
+    return f"{entry[1]}+{offset}:{array.shape}:{array.strides}:{array.dtype.str}"
+
+
+def _raster_identity(raster_ds):
+    """
+    Identity of a raster, for `SplineCache` keys.
+
+    Parameters
+    ----------
+    raster_ds : xarray.Dataset or xarray.DataArray or str
+
+    Returns
+    -------
+    str or None
+        For a raster given as a path, its absolute path, modification time
+        and size. For in-memory or dask-backed variables, the identity of
+        their arrays (see `_array_token`, dask tokens) and a digest of the
+        raster coordinates: values modified in place are not seen. None for
+        other rasters (e.g. read from a file, as told by the on-disk dtype in
+        their encoding, and maybe not loaded), whose tiles are identified by
+        value.
+    """
+    if isinstance(raster_ds, (str, os.PathLike)):
+        stat = os.stat(raster_ds)
+        return f"{os.path.abspath(raster_ds)}:{stat.st_mtime_ns}:{stat.st_size}"
+    if isinstance(raster_ds, xr.DataArray):
+        raster_ds = raster_ds.to_dataset(name=raster_ds.name or "_tmp_name")
+    tokens = []
+    for var in raster_ds.data_vars:
+        variable = raster_ds[var].variable
+        if variable.chunks is not None:
+            from dask.base import is_dask_collection
+
+            data = variable.data
+            if not is_dask_collection(data):
+                return None
+            tokens.append(f"{var}={data.name}")
+        elif "dtype" in variable.encoding:
+            # read from a file: `data` would load it
+            return None
+        elif isinstance(variable.data, np.ndarray):
+            tokens.append(f"{var}={_array_token(variable.data)}")
+        else:
+            return None
+    coords = geometry_key(raster_ds.x, raster_ds.y, str(raster_ds.rio.crs))
+    return f"memory:{coords}:{','.join(tokens)}"
+
+
+def _prepare_raster(raster_ds, reproject=True, cross_antimeridian=False):
+    """
+    Bring a raster window into the layout expected by the mapping.
+
+    Parameters
+    ----------
+    raster_ds : xarray.Dataset or xarray.DataArray
+        Raster window with valid `.rio` accessor.
+    reproject : bool, default True
+        Reproject a raster in a projected CRS to EPSG:4326.
+    cross_antimeridian : bool, default False
+        If True, reproject to longitudes in [0, 360), so that a window
+        across the antimeridian stays contiguous.
+
+    Returns
+    -------
+    tuple
+        Dataset with (..., y, x) variables and increasing x/y, and the name of
+        the input DataArray (``"_tmp_name"`` if unnamed), or None for a
+        Dataset.
+    """
+    # --- DataArray → Dataset ---
+    name = None
+    if isinstance(raster_ds, xr.DataArray):
+        name = raster_ds.name or "_tmp_name"
+        raster_ds = raster_ds.to_dataset(name=name)
+
+    if reproject and not raster_ds.rio.crs.is_geographic:
+        # --- ensure geographic CRS (only the footprint window is reprojected) ---
+        with _stage("reproject", sizes=dict(raster_ds.sizes)) as stage:
+            crs = 4326
+            if cross_antimeridian:
+                crs = "+proj=longlat +datum=WGS84 +lon_wrap=180 +no_defs"
+            raster_ds = raster_ds.rio.reproject(crs)
+            stage.update(reprojected_sizes=dict(raster_ds.sizes))
+
+    # --- ensure dims ordering, extra dims (time, step, ...) first ---
+    raster_ds = raster_ds.transpose(..., "y", "x")
+
+    # --- ensure increasing raster coords (strided view of the window) ---
+    flipped = [
+        coord
+        for coord in ("x", "y")
+        if raster_ds[coord].values[-1] < raster_ds[coord].values[0]
+    ]
+    if flipped:
+        with _stage("flip", axes=tuple(flipped)):
+            raster_ds = raster_ds.isel(
+                {coord: slice(None, None, -1) for coord in flipped}
+            )
+
+    return raster_ds, name
+
+
+def _to_dataset(raster_ds, mapped, target_lon, name=None, dims=None):
+    """
+    Wrap mapped values with the raster variables metadata and image coords.
+
+    Parameters
+    ----------
+    raster_ds : xarray.Dataset
+        Raster the values were mapped from.
+    mapped : dict of numpy.ndarray or dask.array.Array
+        Mapped values per variable, of shape (..., *image shape).
+    target_lon : xarray.DataArray
+        Image longitudes, giving the image dims and coords.
+    name : str, optional
+        Return this variable as a DataArray (see `_prepare_raster`).
+    dims : tuple of str, optional
+        Image dims the values were mapped on, if some dims of `target_lon`
+        were dropped (see `_spatial_coords`): the values are broadcast along
+        them. All dims of `target_lon` if None.
+
+    Returns
+    -------
+    xarray.Dataset or xarray.DataArray
+    """
+    # --- extra (e.g. time) dims are kept in front of the image dims ---
+    grid_mapping = raster_ds.rio.grid_mapping
+    data_vars = {}
+    for var in raster_ds:
+        da = raster_ds[var]
+        coords = {
+            coord: da.coords[coord]
+            for coord in da.coords
+            if coord != grid_mapping and not {"x", "y"} & set(da[coord].dims)
+        }
+        coords.update(target_lon.coords)
+        attrs = da.attrs
+        if mapped[var].dtype.kind not in "fc" and da.rio.nodata is not None:
+            # off-raster points of variables mapped with "nearest"
+            attrs = {**attrs, "_FillValue": da.rio.nodata}
+        data_vars[var] = xr.DataArray(
+            _broadcast_image(mapped[var], dims or target_lon.dims, target_lon),
+            dims=da.dims[:-2] + target_lon.dims,
+            coords=coords,
+            attrs=attrs,
+        )
+
+    mapped_ds = xr.Dataset(data_vars)
+
+    # --- Dataset → DataArray ---
+    if name is not None:
+        mapped_ds = mapped_ds[name]
+        if name == "_tmp_name":
+            mapped_ds.name = None
+
+    return mapped_ds
+
+
+def open_raster(path, **kwargs):
+    """
+    Lazily open a raster file, without reading any data.
+
+    GeoTIFFs are opened with `rioxarray.open_rasterio`, Zarr stores with
+    `xarray.open_zarr` and anything else with `xarray.open_dataset` (e.g.
+    NetCDF). longitude/latitude (or lon/lat) dims are renamed x/y, and
+    EPSG:4326 is assumed if the file has no CRS.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+    **kwargs
+        Passed to the opening function.
+
+    Returns
+    -------
+    xarray.Dataset or xarray.DataArray
+    """
+    import rioxarray  # noqa: F401 (activate .rio accessor)
+
+    path = os.fspath(path)
+    suffix = os.path.splitext(path.rstrip("/"))[1].lower()
+    if suffix in (".tif", ".tiff"):
+        raster_ds = rioxarray.open_rasterio(path, **kwargs)
+    elif suffix == ".zarr":
+        raster_ds = xr.open_zarr(path, **kwargs)
+    else:
+        raster_ds = xr.open_dataset(path, **kwargs)
+
+    for x_dim, y_dim in (("longitude", "latitude"), ("lon", "lat")):
+        if x_dim in raster_ds.dims and y_dim in raster_ds.dims:
+            raster_ds = raster_ds.rename({x_dim: "x", y_dim: "y"})
+    if raster_ds.rio.crs is None:
+        raster_ds = raster_ds.rio.write_crs("EPSG:4326")
+    return raster_ds
+
+
+def read_footprint_window(raster_ds, footprint, cross_antimeridian=None, pad=4):
+    """
+    Read only the raster window covering a footprint.
+
+    The window is found from the 1D x/y coordinates alone (for a projected
+    raster, from the footprint bbox transformed into the raster CRS), so a
+    lazily opened raster is only read on that window.
+
+    For a geographic raster, the window is returned in the longitude
+    convention of the footprint, whatever the raster one. If it wraps around
+    the seam of a global raster (e.g. a footprint crossing the antimeridian
+    on a [-180, 180) raster), the two slices on either side of the seam are
+    read and joined, without rolling the whole raster.
+
+    Parameters
+    ----------
+    raster_ds : xarray.Dataset or xarray.DataArray or str
+        Raster with valid `.rio` accessor, possibly lazily opened, or a path
+        opened with `open_raster`.
+    footprint : shapely.geometry.Polygon
+    cross_antimeridian : bool, optional
+        If True, footprint longitudes are taken in [0, 360). If None, detected
+        from the footprint (see `map_raster`).
+    pad : int, default 4
+        Extra pixels kept around the footprint, for the interpolation stencils.
+
+    Returns
+    -------
+    xarray.Dataset or xarray.DataArray
+        In-memory raster window.
+    """
+    if isinstance(raster_ds, (str, os.PathLike)):
+        raster_ds = open_raster(raster_ds)
+    if cross_antimeridian is None:
+        cross_antimeridian = _crosses_antimeridian(footprint.exterior.xy[0])
+    footprint, _ = _greenwich_footprint(footprint, cross_antimeridian)
+
+    x_range, y_range = _footprint_ranges(footprint, cross_antimeridian)
+    if not raster_ds.rio.crs.is_geographic:
+        transformer = _get_transformer("EPSG:4326", raster_ds.rio.crs.to_wkt())
+        x_range, y_range = _projected_ranges(transformer, x_range, y_range)
+        window = {
+            "x": _axis_window(raster_ds.x.values, *x_range, pad),
+            "y": _axis_window(raster_ds.y.values, *y_range, pad),
+        }
+        return raster_ds.isel(window).load()
+
+    # --- one or two slices, moved to the footprint longitude convention ---
+    y_window = _axis_window(raster_ds.y.values, *y_range, pad)
+    pieces = []
+    for x_slice, shift in _lon_windows(raster_ds.x.values, *x_range, pad):
+        piece = raster_ds.isel(x=x_slice, y=y_window).load()
+        if shift:
+            x = piece.x
+            piece = piece.assign_coords(x=(x.dims, x.values + shift, x.attrs))
+        pieces.append(piece)
+
+    if len(pieces) == 1:
+        return pieces[0]
+    return xr.concat(
+        pieces, "x", data_vars="minimal", coords="minimal", compat="override"
+    )
+
+
+def map_raster(
+    raster_ds,
+    originalDataset,
+    footprint,
+    cross_antimeridian=None,
+    plan_cache=None,
+    chunks=None,
+    native_crs=False,
+    intermediate_grid="image",
+    oversampling=4,
+    n_workers=None,
+    executor=None,
+    spline_cache=None,
+    polar=None,
+    dtype="float64",
+    method=None,
+    vectors=None,
+    heading=None,
+):
+    """
+    Map a raster onto an image grid defined by originalDataset.
+
+    Parameters
+    ----------
+    raster_ds : xarray.Dataset or xarray.DataArray or str
+        Raster with valid `.rio` accessor, or path of a raster file (see
+        `open_raster`). Only the window covering the footprint is read.
+        Dimensions other than y/x (e.g. time, step, level) are mapped in one
+        call and kept in the output.
+    originalDataset : xarray.Dataset
+        Dataset defining the target image grid (lon/lat in image dims). The
+        lon/lat may have extra dims (e.g. pol): where the geolocation is the
+        same along them, the raster is mapped once on the (line, sample)
+        grid and the output is broadcast along them (read-only views, use
+        ``.copy()`` to write into them).
+    footprint : shapely.geometry.Polygon
+        Footprint of the target grid.
+    cross_antimeridian : bool, optional
+        Whether the footprint crosses the antimeridian; longitudes are then
+        handled in [0, 360). If None, detected from the footprint: a
+        footprint spanning more than 180 degrees of longitude is taken as
+        wrapping around ±180. The raster may be in any longitude convention:
+        only the slices covering the footprint are read and joined.
+    plan_cache : mapraster.cache.PlanCache, optional
+        Cache of geometry plans. When the image lon/lat, footprint,
+        `cross_antimeridian` and raster x/y axes match a previous call, the
+        raster crop window and interpolation weights are reused. Not used in
+        lazy mode.
+    chunks : dict, optional
+        Chunks of the image grid, e.g. ``{"line": 2000, "sample": 2000}``.
+        If given, or if the image lon/lat are already dask arrays, the mapping
+        is lazy: each block of the image grid is mapped independently from
+        the raster sub-window it covers, and the output is dask-backed.
+        Requires dask (the `dask` extra: ``pip install mapraster[dask]``).
+    native_crs : bool, default False
+        For a raster in a projected CRS, transform the image lon/lat into the
+        raster CRS and interpolate on the native x/y axes, instead of
+        reprojecting the raster to EPSG:4326. `cross_antimeridian` is then
+        irrelevant.
+    intermediate_grid : {"image", "adaptive"} or None, default "image"
+        Regular lon/lat grid on which the cubic spline is evaluated before
+        the final bilinear interpolation on the image grid.
+        "image": square grid of ``min((ny + nx) // 2, 1000)`` points, from the
+        image size. "adaptive": sized per axis from the raster pixel spacing,
+        `oversampling` and the footprint extent (at most 1000 points per
+        axis). None: no intermediate grid, the spline is evaluated directly
+        at the image points (one pass, no bilinear error), chunk by chunk.
+    oversampling : float, default 4
+        Intermediate grid points per raster pixel, for "adaptive".
+    n_workers : int, optional
+        Number of threads over which variables and tiles of image points are
+        spread. Serial if None or 1. The output is identical to the serial
+        one. Not used in lazy mode (dask schedules the blocks).
+    executor : concurrent.futures.Executor, optional
+        Executor to use instead of a pool of `n_workers` threads created for
+        the call, e.g. to share one pool across calls.
+    spline_cache : mapraster.cache.SplineCache, optional
+        Cache of fitted spline coefficients over raster tiles, shared by
+        overlapping footprints (e.g. consecutive scenes along an orbit). The
+        raster window is then read with an extra tile and halo around the
+        footprint. Falls back to a plain fit for irregular rasters or close
+        to the raster edges. Not used in lazy mode. In-memory rasters are
+        identified by their arrays, not by value: do not modify them in
+        place between calls sharing a cache.
+    polar : bool, optional
+        Map through a polar stereographic plane centred on the footprint: the
+        intermediate grid is regular in that plane, and the raster window
+        covers it (up to the pole and over all longitudes if the pole is in
+        the image). If None, used for footprints containing a pole or
+        spanning more than 30 degrees of longitude, where a lon/lat bbox
+        degenerates. Not used in lazy mode nor with `native_crs`.
+    dtype : {"float64", "float32"}, default "float64"
+        Floating point type of the spline coefficients, the intermediate grid
+        and the output. The spline itself is always solved in float64 (the
+        raster window is not copied to float64 as a whole), and the geometry
+        (coordinates and weights) stays in float64. "float32" halves the
+        memory traffic of the interpolation and the output size, for a
+        relative error of a few 1e-7. Variables mapped with "nearest" keep
+        their own dtype.
+    method : {"cubic", "nearest"} or dict, optional
+        Interpolation method, for all variables or per variable name (others
+        get the default). "cubic": cubic spline, see `intermediate_grid`.
+        "nearest": value of the nearest raster pixel, looked up in the cropped
+        raster with no spline, no intermediate grid and no cast: the output
+        keeps the raster dtype and class codes (land/sea masks, ice types,
+        landcover...), and image points off the raster get the variable
+        nodata, also set as its ``_FillValue`` attribute (NaN if none for
+        floating point variables; integer variables without nodata raise a
+        ValueError, see `rio.write_nodata`). If None, "nearest" for
+        integer and boolean variables and "cubic" otherwise.
+    vectors : sequence of tuple of str, optional
+        ``(u, v)`` pairs of variables holding the components of a vector
+        field, e.g. ``[("U10", "V10")]``: eastward/northward components, or
+        components along the x/y axes of a raster in a projected CRS. Both
+        components are mapped with the same weights, and rotated block by
+        block in the same pass into eastward/northward components (projected
+        rasters) or, with `heading`, into the image frame. Variables keep
+        their names and attributes.
+    heading : str, optional
+        Variable of `originalDataset` giving the azimuth (along track)
+        direction of the image, in degrees clockwise from north (e.g.
+        ``"ground_heading"``). The `vectors` are then returned as (range,
+        azimuth) components, range pointing at heading + 90 degrees.
+
+    Returns
+    -------
+    xarray.Dataset or xarray.DataArray
+        Mapped raster with dims (..., *image dims).
+    """
+
+    target_lon, target_lat = _target_coords(originalDataset)
+    dtype = _float_dtype(dtype)
+    if cross_antimeridian is None:
+        cross_antimeridian = _crosses_antimeridian(footprint.exterior.xy[0])
+    if heading is not None and not vectors:
+        raise ValueError("heading requires vectors to rotate")
+
+    # --- map once per geolocation: pol (and other) dims are broadcast ---
+    az_dim, ra_dim = _get_image_dims(originalDataset)
+    image_lon = target_lon
+    target_lon, target_lat = _spatial_coords(target_lon, target_lat, (az_dim, ra_dim))
+
+    if chunks is not None:
+        chunks = {dim: n for dim, n in chunks.items() if dim in target_lon.dims}
+        target_lon = target_lon.chunk(chunks)
+    lazy = target_lon.chunks is not None
+    if lazy:
+        target_lat = target_lat.chunk(dict(zip(target_lon.dims, target_lon.chunks)))
+
+    # --- read only the raster window covering the footprint ---
+    pad = 4
+    raster_id = None
+    if spline_cache is not None and not lazy:
+        # tiles around the crop window, with their halo
+        pad += spline_cache.tile_size + spline_cache.halo + 2
+        raster_id = _raster_identity(raster_ds)
+    if isinstance(raster_ds, (str, os.PathLike)):
+        raster_ds = open_raster(raster_ds)
+    native = native_crs and not raster_ds.rio.crs.is_geographic
+
+    plane = None
+    hemisphere = None if lazy or native else _polar_hemisphere(footprint, polar)
+    if hemisphere is not None:
+        # --- polar: window covering the polar plane rectangle of the image ---
+        plane = _polar_plane(hemisphere, footprint)
+        lon_range, lat_range, cross_antimeridian = _polar_ranges(
+            plane, target_lon.values, target_lat.values
+        )
+        window = box(lon_range[0], lat_range[0], lon_range[1], lat_range[1])
+    else:
+        footprint, greenwich = _greenwich_footprint(footprint, cross_antimeridian)
+        if greenwich:
+            target_lon = (target_lon + 180) % 360 - 180
+        lon_range, lat_range = _footprint_ranges(footprint, cross_antimeridian)
+        window = footprint
+    with _stage("read_window", polar=plane is not None) as stage:
+        raster_ds = read_footprint_window(raster_ds, window, cross_antimeridian, pad)
+        stage.update(sizes=dict(raster_ds.sizes))
+
+    # vectors are rotated from the image lon/lat, and the raster CRS before
+    # any reprojection
+    raster_crs, geo_lon, geo_lat = raster_ds.rio.crs, target_lon, target_lat
+    rotate = heading is not None or not raster_crs.is_geographic
+
+    if native:
+        # --- image lon/lat into the raster CRS: no raster resampling ---
+        # from here, target_lon/target_lat and ranges are native x/y
+        with _stage("transform", shape=target_lon.shape):
+            transformer = _get_transformer("EPSG:4326", raster_ds.rio.crs.to_wkt())
+            target_lon, target_lat = _transform_coords(
+                transformer, target_lon, target_lat
+            )
+            lon_range, lat_range = _native_ranges(transformer, footprint)
+        cross_antimeridian = False
+
+    if not native and not raster_ds.rio.crs.is_geographic:
+        # the reprojected grid depends on the window: identify tiles by value
+        raster_id = None
+    raster_ds, name = _prepare_raster(
+        raster_ds, reproject=not native, cross_antimeridian=cross_antimeridian
+    )
+    methods = _variable_methods(raster_ds, method)
+    nearest = [var for var in raster_ds if methods[var] == "nearest"]
+    vectors = _check_vectors(raster_ds, vectors or (), methods)
+
+    geometry_options = dict(
+        intermediate_grid=intermediate_grid, oversampling=oversampling
+    )
+
+    if lazy:
+        # blocks crop their own sub-window from the footprint window
+        x_slice, y_slice = _crop_window(
+            raster_ds.x.values, raster_ds.y.values, lon_range, lat_range
+        )
+        raster_ds = raster_ds.isel(x=x_slice, y=y_slice).compute()
+        mapped = _map_lazy(
+            raster_ds,
+            target_lon,
+            target_lat,
+            cross_antimeridian,
+            (target_lon.dims.index(az_dim), target_lon.dims.index(ra_dim)),
+            geometry_options,
+            dtype,
+            methods,
+        )
+    else:
+        # --- geometry: crop window, intermediate grid, mapping weights ---
+        tiles = None
+        if spline_cache is not None:
+            tiles = (spline_cache.tile_size, spline_cache.halo)
+        with _stage("geometry", shape=target_lon.shape) as stage:
+            geometry = None
+            if plan_cache is not None:
+                key = geometry_key(
+                    target_lon,
+                    target_lat,
+                    footprint,
+                    cross_antimeridian,
+                    raster_ds.x,
+                    raster_ds.y,
+                    intermediate_grid,
+                    oversampling,
+                    tiles,
+                    plane,
+                    tuple(sorted(set(methods.values()))),
+                    # the plan keeps the grid north of this CRS
+                    str(raster_crs),
+                )
+                geometry = plan_cache.get(key)
+            cached = geometry is not None
+            stage.update(cached=cached)
+            if not cached:
+                geometry = _build_geometry(
+                    raster_ds.x.values,
+                    raster_ds.y.values,
+                    target_lon.values,
+                    target_lat.values,
+                    lon_range,
+                    lat_range,
+                    cross_antimeridian,
+                    (originalDataset.sizes[az_dim], originalDataset.sizes[ra_dim]),
+                    tiles=tiles,
+                    polar=plane,
+                    methods=tuple(sorted(set(methods.values()))),
+                    **geometry_options,
+                )
+            if vectors and not raster_crs.is_geographic and geometry.north is None:
+                # as costly as the transform of the image lon/lat: kept with
+                # the plan (also a cached one, built without vectors)
+                geometry.north = _grid_north(
+                    raster_crs.to_wkt(), geo_lon.values, geo_lat.values
+                )
+            if plan_cache is not None and not cached:
+                plan_cache.put(key, geometry)
+
+        if executor is None and n_workers is not None and n_workers > 1:
+            with ThreadPoolExecutor(n_workers) as pool:
+                mapped = _map_variables(
+                    raster_ds, geometry, pool, spline_cache, raster_id, dtype, nearest
+                )
+        else:
+            mapped = _map_variables(
+                raster_ds, geometry, executor, spline_cache, raster_id, dtype, nearest
+            )
+
+    if vectors and rotate:
+        with _stage("rotate", vectors=tuple(vectors)):
+            angle = _vector_angle(
+                raster_crs,
+                geo_lon,
+                geo_lat,
+                (
+                    _image_heading(originalDataset, heading, geo_lon)
+                    if heading is not None
+                    else None
+                ),
+                None if lazy else geometry.north,
+            )
+            _rotate_vectors(mapped, vectors, angle)
+
+    with _stage("to_dataset"):
+        return _to_dataset(raster_ds, mapped, image_lon, name, target_lon.dims)
+
+
+def _burst_footprint(lon, lat, cross_antimeridian):
+    """
+    Lon/lat bbox of a burst of image points, as a polygon.
+
+    Parameters
+    ----------
+    lon : numpy.ndarray
+    lat : numpy.ndarray
+    cross_antimeridian : bool
+        If True, the bbox is built from longitudes in [0, 360).
+
+    Returns
+    -------
+    shapely.geometry.Polygon
+    """
+    if cross_antimeridian:
+        lon = lon % 360
+    return box(np.nanmin(lon), np.nanmin(lat), np.nanmax(lon), np.nanmax(lat))
+
+
+def _fill_mapping(raster_ds, target_lon, dtype="f8", method=None):
+    """
+    Mapped raster of image points all without lon/lat, as `map_raster` would
+    return it: NaN, or the nodata of the variables mapped with "nearest" (see
+    `_fill_block`). No raster data is read.
+
+    Parameters
+    ----------
+    raster_ds : xarray.Dataset or xarray.DataArray or str
+    target_lon : xarray.DataArray
+        Image longitudes, giving the image dims and coords.
+    dtype : data-type, default "f8"
+    method : {"cubic", "nearest"} or dict, optional
+
+    Returns
+    -------
+    xarray.Dataset or xarray.DataArray
+    """
+    if isinstance(raster_ds, (str, os.PathLike)):
+        raster_ds = open_raster(raster_ds)
+    # a corner of the raster for the variables, dtypes and metadata
+    raster_ds, name = _prepare_raster(
+        raster_ds.isel(x=slice(0, 2), y=slice(0, 2)), reproject=False
+    )
+    methods = _variable_methods(raster_ds, method)
+    mapped = {
+        var: _fill_block(raster_ds[[var]], target_lon.shape, dtype, methods[var])[0]
+        for var in raster_ds
+    }
+    return _to_dataset(raster_ds, mapped, target_lon, name)
+
+
+def iter_map_raster(
+    raster_ds,
+    originalDataset,
+    cross_antimeridian=None,
+    burst_lines=1000,
+    plan_cache=None,
+    native_crs=False,
+    intermediate_grid="image",
+    oversampling=4,
+    n_workers=None,
+    executor=None,
+    spline_cache=None,
+    dtype="float64",
+    method=None,
+    vectors=None,
+    heading=None,
+):
+    """
+    Map a raster onto a long image burst by burst along the azimuth dimension.
+
+    Each burst of `burst_lines` lines gets its own raster window and spline
+    fit, cropped to its own lon/lat bbox, so that a long diagonal track never
+    needs the raster (nor an intermediate grid) over the bbox of the whole
+    footprint. Memory is bounded by the size of a burst, whatever the track
+    length.
+
+    Parameters
+    ----------
+    raster_ds : xarray.Dataset or xarray.DataArray or str
+        Raster, as for `map_raster`. Give a path (or a lazily opened raster)
+        so that only the window of each burst is read.
+    originalDataset : xarray.Dataset
+        Dataset defining the target image grid, as for `map_raster`.
+    cross_antimeridian : bool, optional
+        See `map_raster`. If None, detected per burst from its longitudes.
+    burst_lines : int, default 1000
+        Number of azimuth lines per burst.
+    plan_cache : mapraster.cache.PlanCache, optional
+        See `map_raster`.
+    native_crs : bool, default False
+        See `map_raster`.
+    intermediate_grid : {"image", "adaptive"} or None, default "image"
+        See `map_raster`. The intermediate grid is built per burst.
+    oversampling : float, default 4
+        See `map_raster`.
+    n_workers : int, optional
+        Number of threads, see `map_raster`. One pool is used for all bursts.
+    executor : concurrent.futures.Executor, optional
+        See `map_raster`.
+    spline_cache : mapraster.cache.SplineCache, optional
+        Cache of fitted spline tiles. If None, a cache private to the call is
+        used: consecutive bursts share the tiles of their overlap, so the
+        splines agree across burst boundaries.
+    dtype : {"float64", "float32"}, default "float64"
+        See `map_raster`.
+    method : {"cubic", "nearest"} or dict, optional
+        See `map_raster`.
+    vectors : sequence of tuple of str, optional
+        See `map_raster`.
+    heading : str, optional
+        See `map_raster`.
+
+    Yields
+    ------
+    tuple
+        ``(lines, mapped)``: the slice of azimuth lines of the burst and the
+        mapped raster on it, as returned by `map_raster`. Concatenating the
+        blocks along the azimuth dimension gives the whole image; to keep
+        memory bounded, write each block as it comes instead (e.g. with
+        ``block.to_zarr(store, region={"line": lines})``).
+    """
+    target_lon, target_lat = _target_coords(originalDataset)
+    az_dim, _ = _get_image_dims(originalDataset)
+    if burst_lines < 1:
+        raise ValueError("burst_lines must be >= 1")
+    dtype = _float_dtype(dtype)
+    if spline_cache is None:
+        spline_cache = SplineCache(max_bytes=64 * 2**20)
+
+    pool = None
+    if executor is None and n_workers is not None and n_workers > 1:
+        pool = executor = ThreadPoolExecutor(n_workers)
+
+    with pool if pool is not None else contextlib.nullcontext():
+        size = originalDataset.sizes[az_dim]
+        for start in range(0, size, burst_lines):
+            lines = slice(start, min(start + burst_lines, size))
+            # only the lon/lat (and heading) of the burst are loaded
+            burst = xr.Dataset(
+                {
+                    coord.name: coord.isel({az_dim: lines}).load()
+                    for coord in (target_lon, target_lat)
+                }
+            )
+            if heading is not None:
+                burst[heading] = originalDataset[heading].isel(
+                    {az_dim: lines}, missing_dims="ignore"
+                )
+            lon = burst[target_lon.name].values
+            lat = burst[target_lat.name].values
+            if not (np.isfinite(lon) & np.isfinite(lat)).any():
+                # e.g. padding lines at the start of a datatake: no footprint
+                yield lines, _fill_mapping(
+                    raster_ds, burst[target_lon.name], dtype, method
+                )
+                continue
+            cross = cross_antimeridian
+            if cross is None:
+                cross = _crosses_antimeridian(lon)
+            if (
+                not cross
+                and np.nanmin(lon) >= 0
+                and np.nanmax(lon) - np.nanmin(lon) > 180
+            ):
+                # [0, 360) longitudes jumping at Greenwich: in [-180, 180)
+                lon = (lon + 180) % 360 - 180
+                burst[target_lon.name] = burst[target_lon.name].copy(data=lon)
+            footprint = _burst_footprint(lon, lat, cross)
+            mapped = map_raster(
+                raster_ds,
+                burst,
+                footprint,
+                cross,
+                plan_cache=plan_cache,
+                native_crs=native_crs,
+                intermediate_grid=intermediate_grid,
+                oversampling=oversampling,
+                executor=executor,
+                spline_cache=spline_cache,
+                dtype=dtype,
+                method=method,
+                vectors=vectors,
+                heading=heading,
+            )
+            yield lines, mapped
+
+
+# splines fitted by map_raster_batch, per longitude convention, in workers
+_batch_states = {}
+
+
+def _init_batch_worker(states):
+    # mapped from the shared arrays of the parent process, not copied
+    _batch_states.update(_attach(states))
+
+
+def _scene_methods(state):
+    """Methods needed by the variables of a `map_raster_batch` state."""
+    _, _, fitted, nearest = state
+    return (("cubic",) if fitted else ()) + (
+        ("nearest",) if nearest is not None else ()
+    )
+
+
+def _map_scene(
+    state,
+    target_lon,
+    target_lat,
+    lon_range,
+    lat_range,
+    cross_antimeridian,
+    image_shape,
+    geometry_options,
+    plan_cache=None,
+    key=None,
+    executor=None,
+    out=None,
+):
+    """
+    Map fitted splines onto one scene of `map_raster_batch`.
+
+    `out` is the ``(per group, per nearest variable)`` buffers to write the
+    mapped values into, see `_scene_buffers`.
+
+    Returns
+    -------
+    dict of numpy.ndarray
+        Mapped values of shape (..., *image shape) per variable.
+    """
+    x, y, fitted, nearest = state
+    with _stage("geometry", shape=target_lon.shape) as stage:
+        geometry = plan_cache.get(key) if plan_cache is not None else None
+        stage.update(cached=geometry is not None)
+        if geometry is None:
+            geometry = _build_geometry(
+                x,
+                y,
+                target_lon,
+                target_lat,
+                lon_range,
+                lat_range,
+                cross_antimeridian,
+                image_shape,
+                crop=False,
+                methods=_scene_methods(state),
+                **geometry_options,
+            )
+            if plan_cache is not None:
+                plan_cache.put(key, geometry)
+    fitted_out, nearest_out = out or (None, None)
+    mapped = _evaluate_variables(fitted, x, y, geometry, executor, fitted_out)
+    if nearest is not None:
+        mapped.update(_nearest_variables(nearest, geometry.nearest, nearest_out))
+    return mapped
+
+
+def _scene_buffers(state, image_shape, shared):
+    """
+    Output buffers of a scene mapped in a worker process (see `_map_scene`),
+    shared with it.
+
+    Returns
+    -------
+    tuple
+        The `_SharedArray` handles and the arrays, each as a list of buffers
+        per group of fitted variables and a dict of buffers per nearest
+        variable.
+    """
+    _, _, fitted, nearest = state
+    handles, arrays = ([], {}), ([], {})
+    for group, coeffs, *_ in fitted:
+        shape = (len(group),) + coeffs.shape[1:-2] + image_shape
+        handle, array = shared.empty(shape, coeffs.dtype)
+        handles[0].append(handle)
+        arrays[0].append(array)
+    for var, (values, _) in (nearest or {}).items():
+        handle, array = shared.empty(values.shape[:-2] + image_shape, values.dtype)
+        handles[1][var] = handle
+        arrays[1][var] = array
+    return handles, arrays
+
+
+def _scene_nbytes(state, image_shape):
+    """
+    Size of the shared image lon/lat and output buffers of a scene mapped in
+    a worker process (see `_scene_buffers`).
+    """
+    _, _, fitted, nearest = state
+    size = int(np.prod(image_shape))
+    nbytes = 2 * 8 * size
+    for group, coeffs, *_ in fitted:
+        nbytes += len(group) * int(np.prod(coeffs.shape[1:-2])) * coeffs.itemsize * size
+    for values, _ in (nearest or {}).values():
+        nbytes += int(np.prod(values.shape[:-2])) * values.itemsize * size
+    return nbytes
+
+
+def _map_scene_in_worker(cross_antimeridian, target, args, out):
+    """
+    Map a scene of `map_raster_batch` in a worker process, from the shared
+    image lon/lat into the shared output buffers: no array is pickled.
+    """
+    target_lon, target_lat = _attach(target)
+    _map_scene(
+        _batch_states[cross_antimeridian],
+        target_lon,
+        target_lat,
+        *args,
+        out=_attach(out, mode="r+"),
+    )
+
+
+def _iter_batch(
+    windows,
+    states,
+    scenes,
+    geometry_options,
+    plan_cache,
+    pool,
+    max_pending,
+    rotation=None,
+    shared=None,
+    map_polar=None,
+):
+    """
+    Yield the mapped scenes of `map_raster_batch` in order.
+
+    With a process pool, at most `max_pending` scenes are in flight, so that
+    memory does not grow with the number of scenes. Their image lon/lat and
+    outputs go through the `shared` arrays, removed at the end. `rotation` is
+    the ``(vectors, heading, crs)`` of the vector components to rotate, if
+    any. Polar scenes are mapped by `map_polar`, called with the dataset,
+    footprint and antimeridian flag of the scene.
+    """
+    pending = deque()
+
+    def wrap(image_lon, dims, cross_antimeridian, mapped, angle):
+        raster_ds, name = windows[cross_antimeridian]
+        if angle is not None:
+            with _stage("rotate", vectors=tuple(rotation[0])):
+                _rotate_vectors(mapped, rotation[0], angle)
+        with _stage("to_dataset"):
+            return _to_dataset(raster_ds, mapped, image_lon, name, dims)
+
+    def collect(image_lon, dims, cross_antimeridian, angle, handles, arrays, future):
+        future.result()
+        # copied out, so that shared memory is only held by scenes in flight
+        # and not by the scenes kept by the caller
+        fitted_out, nearest_out = arrays
+        mapped = {}
+        for (group, *_), values in zip(states[cross_antimeridian][2], fitted_out):
+            mapped.update(zip(group, np.array(values)))
+        mapped.update({var: np.array(values) for var, values in nearest_out.items()})
+        del arrays, fitted_out, nearest_out
+        _SharedArrays.release(handles)
+        return wrap(image_lon, dims, cross_antimeridian, mapped, angle)
+
+    with contextlib.ExitStack() as stack:
+        # workers are done before their buffers are removed
+        if shared is not None:
+            stack.callback(shared.close)
+        if pool is not None:
+            stack.enter_context(pool)
+
+        for originalDataset, footprint, cross_antimeridian, polar in scenes:
+            if polar:
+                mapped = map_polar(originalDataset, footprint, cross_antimeridian)
+                while pending:
+                    yield collect(*pending.popleft())
+                yield mapped
+                continue
+
+            image_lon, image_lat = _target_coords(originalDataset)
+            az_dim, ra_dim = _get_image_dims(originalDataset)
+            target_lon, target_lat = _spatial_coords(
+                image_lon, image_lat, (az_dim, ra_dim)
+            )
+            footprint, greenwich = _greenwich_footprint(footprint, cross_antimeridian)
+            if greenwich:
+                target_lon = (target_lon + 180) % 360 - 180
+            angle = None
+            if rotation is not None:
+                vectors, heading, crs = rotation
+                if heading is not None:
+                    heading = _image_heading(originalDataset, heading, target_lon)
+                angle = _vector_angle(crs, target_lon, target_lat, heading)
+            args = (
+                *_footprint_ranges(footprint, cross_antimeridian),
+                cross_antimeridian,
+                (originalDataset.sizes[az_dim], originalDataset.sizes[ra_dim]),
+                geometry_options,
+            )
+
+            if isinstance(pool, ProcessPoolExecutor):
+                state = states[cross_antimeridian]
+                target = shared.share((target_lon.values, target_lat.values))
+                handles, arrays = _scene_buffers(state, target_lon.shape, shared)
+                future = pool.submit(
+                    _map_scene_in_worker, cross_antimeridian, target, args, handles
+                )
+                pending.append(
+                    (
+                        image_lon,
+                        target_lon.dims,
+                        cross_antimeridian,
+                        angle,
+                        (target, handles),
+                        arrays,
+                        future,
+                    )
+                )
+                if len(pending) >= max_pending:
+                    yield collect(*pending.popleft())
+                continue
+
+            key = None
+            if plan_cache is not None:
+                x, y, _, _ = states[cross_antimeridian]
+                key = geometry_key(
+                    target_lon.values,
+                    target_lat.values,
+                    footprint,
+                    cross_antimeridian,
+                    x,
+                    y,
+                    *geometry_options.values(),
+                    "uncropped",
+                    _scene_methods(states[cross_antimeridian]),
+                )
+            mapped = _map_scene(
+                states[cross_antimeridian],
+                target_lon.values,
+                target_lat.values,
+                *args,
+                plan_cache,
+                key,
+                pool,
+            )
+            yield wrap(image_lon, target_lon.dims, cross_antimeridian, mapped, angle)
+
+        while pending:
+            yield collect(*pending.popleft())
+
+
+def map_raster_batch(
+    raster_ds,
+    scenes,
+    cross_antimeridian=None,
+    plan_cache=None,
+    intermediate_grid="image",
+    oversampling=4,
+    n_workers=None,
+    n_processes=None,
+    dtype="float64",
+    method=None,
+    vectors=None,
+    heading=None,
+    shared_directory=None,
+):
+    """
+    Map one raster onto many images (e.g. all scenes of the same hour).
+
+    The raster is read once on the bbox covering all footprints, and the NaN
+    inpainting and spline fitting of every variable are done once on that
+    window. Each scene then only pays for its own interpolation. Scenes
+    crossing the antimeridian share a second window, in [0, 360).
+
+    Compared to `map_raster` on each scene, the splines are fitted on a larger
+    window, so values differ by the (small) spline boundary effects only.
+
+    Polar scenes (see `map_raster`), whose lon/lat bbox misses the polar cap,
+    are mapped by `map_raster` on their own window of the polar plane.
+
+    Parameters
+    ----------
+    raster_ds : xarray.Dataset or xarray.DataArray or str
+        Raster with valid `.rio` accessor, or path of a raster file (see
+        `open_raster`).
+    scenes : iterable of tuple
+        ``(originalDataset, footprint)`` or
+        ``(originalDataset, footprint, cross_antimeridian)`` per scene, as for
+        `map_raster`.
+    cross_antimeridian : bool, optional
+        Default for scenes not giving it. If None, detected from each
+        footprint (see `map_raster`).
+    plan_cache : mapraster.cache.PlanCache, optional
+        Cache of geometry plans, see `map_raster`. Not used with
+        `n_processes`.
+    intermediate_grid : {"image", "adaptive"} or None, default "image"
+        See `map_raster`.
+    oversampling : float, default 4
+        See `map_raster`.
+    n_workers : int, optional
+        Number of threads for the spline fitting and, without `n_processes`,
+        for each scene (see `map_raster`).
+    n_processes : int, optional
+        Map scenes in parallel in a pool of processes. The fitted splines,
+        the image lon/lat and the mapped values go through memory-mapped
+        files (see `shared_directory`), attached by the processes without
+        copy: no large array is pickled.
+    dtype : {"float64", "float32"}, default "float64"
+        See `map_raster`. With "float32", the fitted splines shared by all
+        scenes take half the memory.
+    method : {"cubic", "nearest"} or dict, optional
+        See `map_raster`. Variables mapped with "nearest" are not fitted:
+        the raster window itself is shared by the scenes.
+    vectors : sequence of tuple of str, optional
+        See `map_raster`.
+    heading : str, optional
+        See `map_raster`, read from the `originalDataset` of each scene.
+    shared_directory : str, optional
+        With `n_processes`, directory of the memory-mapped files (in a
+        private temporary directory, removed once the iterator is exhausted
+        or closed). /dev/shm if it has room for the fitted splines and the
+        buffers of ``2 * n_processes`` scenes in flight, else the default
+        temporary directory. Space is reserved as buffers are created: a full
+        file system raises an OSError.
+
+    Returns
+    -------
+    iterator of xarray.Dataset or xarray.DataArray
+        Mapped raster per scene, in the order of `scenes`. Scenes are mapped
+        as the iterator is consumed.
+    """
+    if isinstance(raster_ds, (str, os.PathLike)):
+        raster_ds = open_raster(raster_ds)
+    dtype = _float_dtype(dtype)
+    if heading is not None and not vectors:
+        raise ValueError("heading requires vectors to rotate")
+
+    resolved = []
+    for scene in scenes:
+        cross = scene[2] if len(scene) > 2 else cross_antimeridian
+        if cross is None:
+            cross = _crosses_antimeridian(scene[1].exterior.xy[0])
+        polar = _polar_hemisphere(scene[1]) is not None
+        resolved.append((scene[0], scene[1], bool(cross), polar))
+    scenes = resolved
+    map_polar = functools.partial(
+        map_raster,
+        raster_ds,
+        plan_cache=plan_cache,
+        intermediate_grid=intermediate_grid,
+        oversampling=oversampling,
+        n_workers=n_workers,
+        dtype=dtype,
+        method=method,
+        vectors=vectors,
+        heading=heading,
+    )
+    geometry_options = dict(
+        intermediate_grid=intermediate_grid, oversampling=oversampling
+    )
+
+    threads = None
+    if n_workers is not None and n_workers > 1:
+        threads = ThreadPoolExecutor(n_workers)
+
+    # --- one raster window per longitude convention, fitted once ---
+    windows, states = {}, {}
+    with threads if threads is not None else contextlib.nullcontext():
+        for cross in sorted({scene[2] for scene in scenes if not scene[3]}):
+            ranges = np.array(
+                [
+                    _footprint_ranges(_greenwich_footprint(fp, cross)[0], cross)
+                    for _, fp, c, polar in scenes
+                    if c == cross and not polar
+                ]
+            )
+            lon_range = [ranges[:, 0, 0].min(), ranges[:, 0, 1].max()]
+            lat_range = [ranges[:, 1, 0].min(), ranges[:, 1, 1].max()]
+            bbox = box(lon_range[0], lat_range[0], lon_range[1], lat_range[1])
+
+            with _stage("read_window", scenes=len(ranges)) as stage:
+                window = read_footprint_window(raster_ds, bbox, cross)
+                stage.update(sizes=dict(window.sizes))
+            window, name = _prepare_raster(window, cross_antimeridian=cross)
+            x_slice, y_slice = _crop_window(
+                window.x.values, window.y.values, lon_range, lat_range
+            )
+            window = window.isel(x=x_slice, y=y_slice)
+
+            windows[cross] = (window, name)
+            methods = _variable_methods(window, method)
+            vectors = _check_vectors(window, vectors or (), methods)
+            nearest = [var for var in window if methods[var] == "nearest"]
+            cubic = [var for var in window if methods[var] == "cubic"]
+            states[cross] = (
+                window.x.values,
+                window.y.values,
+                _fit_variables(window[cubic], threads, dtype),
+                _nearest_inputs(window[nearest].load()) if nearest else None,
+            )
+
+    max_pending, shared = None, None
+    if n_processes is not None:
+        max_pending = 2 * n_processes
+        # splines shared once, buffers of the scenes in flight
+        scene_nbytes = max(
+            (
+                _scene_nbytes(
+                    states[cross], tuple(ds.sizes[dim] for dim in _get_image_dims(ds))
+                )
+                for ds, _, cross, polar in scenes
+                if not polar
+            ),
+            default=0,
+        )
+        shared = _SharedArrays(
+            shared_directory, _nbytes(states) + max_pending * scene_nbytes
+        )
+        pool = ProcessPoolExecutor(
+            n_processes,
+            initializer=_init_batch_worker,
+            initargs=(shared.share(states),),
+        )
+        plan_cache = None
+    elif threads is not None:
+        pool = ThreadPoolExecutor(n_workers)
+    else:
+        pool = None
+
+    rotation = None
+    if vectors and (heading is not None or not raster_ds.rio.crs.is_geographic):
+        rotation = (vectors, heading, raster_ds.rio.crs)
+
+    return _iter_batch(
+        windows,
+        states,
+        scenes,
+        geometry_options,
+        plan_cache,
+        pool,
+        max_pending,
+        rotation,
+        shared,
+        map_polar,
+    )
@@ -0,0 +1,803 @@
+import numpy as np
+from scipy.interpolate import make_interp_spline
+
+
+def _axis_weights(axis, target):
+    """
+    Bracketing indices and linear weights of target values on a 1D axis.
+
+    Parameters
+    ----------
+    axis : numpy.ndarray
+        Increasing 1D coordinates of the source grid.
+    target : numpy.ndarray
+        Flat target coordinates.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        Lower bracketing index, weight of the upper neighbour and a boolean
+        mask of targets lying inside the axis bounds.
+    """
+    index = np.searchsorted(axis, target, side="left") - 1
+    np.clip(index, 0, axis.size - 2, out=index)
+    lower = axis[index]
+    weight = (target - lower) / (axis[index + 1] - lower)
+    inside = (target >= axis[0]) & (target <= axis[-1])
+    return index, weight, inside
+
+
+def _nearest_index(axis, target):
+    """
+    Index of the nearest node of a 1D axis, for each target value.
+
+    Parameters
+    ----------
+    axis : numpy.ndarray
+        Increasing 1D coordinates of the source grid.
+    target : numpy.ndarray
+        Flat target coordinates.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        Nearest index (ties go to the upper node, as
+        ``pandas.Index.get_indexer(method="nearest")``) and a boolean mask of
+        targets lying inside the axis bounds, widened by half a cell: the
+        edge nodes stand for the whole of their pixel.
+    """
+    index = np.searchsorted(axis, target, side="left")
+    np.clip(index, 1, axis.size - 1, out=index)
+    closer_below = (target - axis[index - 1]) < (axis[index] - target)
+    index -= closer_below
+    inside = (target >= axis[0] - (axis[1] - axis[0]) / 2) & (
+        target <= axis[-1] + (axis[-1] - axis[-2]) / 2
+    )
+    return index, inside
+
+
+def _run_tiles(func, size, executor=None, tile_size=65536):
+    """
+    Call ``func(start, stop)`` on contiguous tiles of the target points.
+
+    Tiles keep temporaries small and in cache, and are the unit of work
+    submitted to `executor`.
+
+    Parameters
+    ----------
+    func : callable
+        Processes targets ``start:stop``; tiles never overlap.
+    size : int
+        Number of target points.
+    executor : concurrent.futures.Executor, optional
+        Executor the tiles are submitted to. Tiles are processed in the
+        calling thread if None.
+    tile_size : int, default 65536
+        Number of target points per tile.
+    """
+    tiles = [
+        (start, min(start + tile_size, size)) for start in range(0, size, tile_size)
+    ]
+    if executor is None or len(tiles) < 2:
+        for start, stop in tiles:
+            func(start, stop)
+        return
+    futures = [executor.submit(func, start, stop) for start, stop in tiles]
+    for future in futures:
+        future.result()
+
+
+class MappingPlan:
+    """
+    Precomputed bilinear interpolation from a regular (y, x) grid onto image points.
+
+    The bracketing indices and weights only depend on the grid axes and on the
+    target coordinates, so they are computed once and applied to any number of
+    variables sharing the same grid.
+
+    Parameters
+    ----------
+    x : array_like
+        Increasing 1D x (longitude) coordinates of the source grid.
+    y : array_like
+        Increasing 1D y (latitude) coordinates of the source grid.
+    target_x : array_like
+        Target x coordinates, any shape.
+    target_y : array_like
+        Target y coordinates, same shape as `target_x`.
+
+    Examples
+    --------
+    >>> plan = MappingPlan([0.0, 1.0], [0.0, 1.0], [[0.5]], [[0.25]])
+    >>> plan.apply(np.array([[0.0, 1.0], [2.0, 3.0]]))
+    array([[1.]])
+    """
+
+    def __init__(self, x, y, target_x, target_y):
+        x = np.asarray(x, dtype="f8")
+        y = np.asarray(y, dtype="f8")
+        target_x = np.asarray(target_x, dtype="f8")
+        target_y = np.asarray(target_y, dtype="f8")
+        if target_x.shape != target_y.shape:
+            raise ValueError("target_x and target_y must have the same shape")
+        if x.size < 2 or y.size < 2:
+            raise ValueError("source grid must have at least 2 points per axis")
+
+        self.grid_shape = (y.size, x.size)
+        self.shape = target_x.shape
+
+        ix, wx, inside_x = _axis_weights(x, target_x.ravel())
+        iy, wy, inside_y = _axis_weights(y, target_y.ravel())
+
+        # flat indices and weights of the 4 corners:
+        # (y0, x0), (y0, x1), (y1, x0), (y1, x1), filled in place
+        nx = x.size
+        self.indices = np.empty((4, ix.size), dtype=np.intp)
+        np.multiply(iy, nx, out=self.indices[0])
+        self.indices[0] += ix
+        np.add(self.indices[0], 1, out=self.indices[1])
+        np.add(self.indices[0], nx, out=self.indices[2])
+        np.add(self.indices[0], nx + 1, out=self.indices[3])
+        del ix, iy
+
+        self.weights = np.empty((4, wx.size))
+        np.multiply(wy, wx, out=self.weights[3])
+        np.subtract(wy, self.weights[3], out=self.weights[2])
+        np.subtract(wx, self.weights[3], out=self.weights[1])
+        np.subtract(1 - wy, self.weights[1], out=self.weights[0])
+        self.outside = ~(inside_x & inside_y)
+
+    def apply(self, values, out=None, executor=None):
+        """
+        Interpolate one or several stacked fields onto the target points.
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            Array of shape (..., ny, nx) on the source grid. Leading dimensions
+            (e.g. variables) are interpolated in a single batched gather.
+        out : numpy.ndarray, optional
+            C-contiguous array of shape (..., *target_shape) to write into,
+            instead of allocating the result. The interpolation is computed
+            in its dtype (e.g. float32).
+        executor : concurrent.futures.Executor, optional
+            Executor over which tiles of target points are spread. The result
+            does not depend on it.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of shape (..., *target_shape). Targets outside of the source
+            grid are set to NaN.
+        """
+        values = np.asarray(values)
+        if values.shape[-2:] != self.grid_shape:
+            raise ValueError(
+                f"values grid shape {values.shape[-2:]} does not match "
+                f"plan grid shape {self.grid_shape}"
+            )
+        lead = values.shape[:-2]
+        if out is None:
+            dtype = np.result_type(values.dtype, self.weights.dtype)
+            out = np.empty(lead + self.shape, dtype=dtype)
+        elif out.shape != lead + self.shape or not out.flags.c_contiguous:
+            raise ValueError(
+                f"out must be a C-contiguous array of shape {lead + self.shape}"
+            )
+        flat = values.reshape(lead + (-1,)).astype(out.dtype, copy=False)
+
+        fields = flat.reshape((-1, flat.shape[-1]))
+        out_rows = out.reshape((fields.shape[0], -1))
+        _run_tiles(
+            lambda start, stop: self._apply_tile(fields, out_rows, start, stop),
+            out_rows.shape[1],
+            executor,
+        )
+        return out
+
+    def _apply_tile(self, fields, out_rows, start, stop):
+        tile = slice(start, stop)
+        indices = self.indices[:, tile]
+        weights = self.weights[:, tile].astype(out_rows.dtype, copy=False)
+
+        # weighted sum of the 4 corners, one field at a time so that the
+        # only temporary is a single tile-sized row
+        tmp = np.empty(stop - start, dtype=out_rows.dtype)
+        for field, row in zip(fields, out_rows[:, tile]):
+            np.take(field, indices[0], out=row)
+            row *= weights[0]
+            for k in range(1, 4):
+                np.take(field, indices[k], out=tmp)
+                tmp *= weights[k]
+                row += tmp
+
+        outside = self.outside[tile]
+        if outside.any():
+            out_rows[:, tile][:, outside] = np.nan
+
+    def to_arrays(self):
+        """
+        Export the plan as a dict of arrays (e.g. for `numpy.savez`).
+
+        Returns
+        -------
+        dict of numpy.ndarray
+        """
+        return {
+            "kind": np.asarray("bilinear"),
+            "grid_shape": np.asarray(self.grid_shape),
+            "shape": np.asarray(self.shape),
+            "indices": self.indices,
+            "weights": self.weights,
+            "outside": self.outside,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Rebuild a plan exported with `to_arrays`.
+
+        Parameters
+        ----------
+        arrays : mapping of numpy.ndarray
+
+        Returns
+        -------
+        MappingPlan
+        """
+        plan = cls.__new__(cls)
+        plan.grid_shape = tuple(int(n) for n in arrays["grid_shape"])
+        plan.shape = tuple(int(n) for n in arrays["shape"])
+        plan.indices = np.asarray(arrays["indices"])
+        plan.weights = np.asarray(arrays["weights"])
+        plan.outside = np.asarray(arrays["outside"])
+        return plan
+
+
+class NearestPlan:
+    """
+    Precomputed nearest-neighbour lookup from a regular (y, x) grid onto image
+    points.
+
+    Values are gathered, not interpolated: the output keeps the dtype of the
+    input, so integer and categorical fields (e.g. land/sea masks, ice
+    types) keep their codes.
+
+    Parameters
+    ----------
+    x : array_like
+        Increasing 1D x (longitude) coordinates of the source grid.
+    y : array_like
+        Increasing 1D y (latitude) coordinates of the source grid.
+    target_x : array_like
+        Target x coordinates, any shape.
+    target_y : array_like
+        Target y coordinates, same shape as `target_x`.
+
+    Examples
+    --------
+    >>> plan = NearestPlan([0.0, 1.0], [0.0, 1.0], [[0.25, 0.75]], [[0.5, 0.25]])
+    >>> plan.apply(np.array([[1, 2], [3, 4]], dtype="int8"))
+    array([[3, 2]], dtype=int8)
+    """
+
+    def __init__(self, x, y, target_x, target_y):
+        x = np.asarray(x, dtype="f8")
+        y = np.asarray(y, dtype="f8")
+        target_x = np.asarray(target_x, dtype="f8")
+        target_y = np.asarray(target_y, dtype="f8")
+        if target_x.shape != target_y.shape:
+            raise ValueError("target_x and target_y must have the same shape")
+        if x.size < 2 or y.size < 2:
+            raise ValueError("source grid must have at least 2 points per axis")
+
+        self.grid_shape = (y.size, x.size)
+        self.shape = target_x.shape
+
+        ix, inside_x = _nearest_index(x, target_x.ravel())
+        iy, inside_y = _nearest_index(y, target_y.ravel())
+        self.indices = iy * x.size + ix
+        self.outside = ~(inside_x & inside_y)
+
+    def apply(self, values, fill_value=None, out=None):
+        """
+        Take the nearest source value of each target point.
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            Array of shape (..., ny, nx) on the source grid, of any dtype.
+        fill_value : scalar, optional
+            Value of the targets outside of the source grid. NaN for floating
+            point values if None. Required for other dtypes if some targets
+            are outside: any code may be a valid class.
+        out : numpy.ndarray, optional
+            C-contiguous array of shape (..., *target_shape) and of the dtype
+            of `values` to write the result into.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of shape (..., *target_shape), of the dtype of `values`.
+
+        Raises
+        ------
+        ValueError
+            If `values` are not floating point, some targets are outside of
+            the source grid and `fill_value` is None.
+        """
+        values = np.asarray(values)
+        if values.shape[-2:] != self.grid_shape:
+            raise ValueError(
+                f"values grid shape {values.shape[-2:]} does not match "
+                f"plan grid shape {self.grid_shape}"
+            )
+        outside = self.outside.any()
+        if outside and fill_value is None:
+            if values.dtype.kind not in "fc":
+                raise ValueError(
+                    f"fill_value required for {values.dtype} values: "
+                    f"{self.outside.sum()} targets are outside of the source grid"
+                )
+            fill_value = np.nan
+        lead = values.shape[:-2]
+        flat = values.reshape(lead + (-1,))
+        flat_out = None if out is None else out.reshape(lead + (-1,))
+        flat_out = np.take(flat, self.indices, axis=-1, out=flat_out, mode="clip")
+        if outside:
+            flat_out[..., self.outside] = fill_value
+        return flat_out.reshape(lead + self.shape)
+
+    def to_arrays(self):
+        """
+        Export the plan as a dict of arrays (e.g. for `numpy.savez`).
+
+        Returns
+        -------
+        dict of numpy.ndarray
+        """
+        return {
+            "kind": np.asarray("nearest"),
+            "grid_shape": np.asarray(self.grid_shape),
+            "shape": np.asarray(self.shape),
+            "indices": self.indices,
+            "outside": self.outside,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Rebuild a plan exported with `to_arrays`.
+
+        Parameters
+        ----------
+        arrays : mapping of numpy.ndarray
+
+        Returns
+        -------
+        NearestPlan
+        """
+        plan = cls.__new__(cls)
+        plan.grid_shape = tuple(int(n) for n in arrays["grid_shape"])
+        plan.shape = tuple(int(n) for n in arrays["shape"])
+        plan.indices = np.asarray(arrays["indices"])
+        plan.outside = np.asarray(arrays["outside"])
+        return plan
+
+
+def _spline_knots(axis, kind="not-a-knot", k=3):
+    """
+    Knots of the cubic interpolating spline on an axis.
+
+    Parameters
+    ----------
+    axis : numpy.ndarray
+        Increasing 1D data coordinates.
+    kind : {"not-a-knot", "extended"}, default "not-a-knot"
+        "not-a-knot": knots of `make_interp_spline`, the spline is fitted on
+        the axis alone. "extended": the axis nodes, extended on each side with
+        the axis spacing, as for coefficients taken from the inside of a
+        spline fitted on a larger (regular) axis.
+    k : int, default 3
+        Spline degree.
+
+    Returns
+    -------
+    numpy.ndarray
+        ``axis.size + k + 1`` knots.
+    """
+    if kind == "not-a-knot":
+        return make_interp_spline(axis, np.zeros(axis.size), k=k).t
+    if kind == "extended":
+        spacing = axis[1] - axis[0]
+        pad = spacing * np.arange(1, (k + 1) // 2 + 1)
+        return np.concatenate([axis[0] - pad[::-1], axis, axis[-1] + pad])
+    raise ValueError(f"kind must be 'not-a-knot' or 'extended', got {kind!r}")
+
+
+def _spline_weights(axis, target, k=3, chunk_size=None, knots="not-a-knot"):
+    """
+    First coefficient index and B-spline basis weights of targets on an axis.
+
+    Parameters
+    ----------
+    axis : numpy.ndarray
+        Increasing 1D data coordinates of the interpolating spline.
+    target : numpy.ndarray
+        Flat target coordinates.
+    k : int, default 3
+        Spline degree.
+    chunk_size : int, optional
+        Number of targets handled at once, to bound the size of temporaries.
+        All targets at once if None.
+    knots : {"not-a-knot", "extended"}, default "not-a-knot"
+        See `_spline_knots`.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        First coefficient index (N,) and weights (k + 1, N).
+    """
+    knots = _spline_knots(axis, knots, k)
+    n_coeffs = knots.size - k - 1
+    chunk_size = chunk_size or max(target.size, 1)
+    start = np.empty(target.size, dtype=np.intp)
+    weights = np.empty((k + 1, target.size))
+    for i in range(0, target.size, chunk_size):
+        chunk = slice(i, i + chunk_size)
+        t = np.clip(target[chunk], axis[0], axis[-1])
+        # knot interval of each target, then Cox-de Boor recursion on the
+        # k + 1 non-zero basis functions of that interval
+        interval = np.searchsorted(knots, t, side="right") - 1
+        np.clip(interval, k, n_coeffs - 1, out=interval)
+        # distances to the knots around the interval, knot[interval + m] - t
+        # for m in 1 - k..k, gathered once
+        dist = np.empty((2 * k, t.size))
+        for m in range(1 - k, k + 1):
+            np.take(knots, interval + m, out=dist[k - 1 + m], mode="clip")
+            dist[k - 1 + m] -= t
+        basis = weights[:, chunk]
+        basis[0] = 1
+        basis[1:] = 0
+        w = np.empty_like(t)
+        for j in range(1, k + 1):
+            previous = basis[:j].copy()
+            basis[0] = 0
+            for n in range(1, j + 1):
+                right = dist[k - 1 + n]
+                left = dist[k - 1 + n - j]
+                np.subtract(right, left, out=w)
+                np.divide(previous[n - 1], w, out=w)
+                basis[n - 1] += w * right
+                np.multiply(w, left, out=basis[n])
+                np.negative(basis[n], out=basis[n])
+        start[chunk] = interval - k
+    return start, weights
+
+
+class SplinePlan:
+    """
+    Precomputed evaluation of cubic spline coefficients at scattered image points.
+
+    The spline basis weights only depend on the data axes and on the target
+    coordinates, so they are computed once and applied to the tensor-product
+    coefficients of any number of variables sharing the same raster window.
+    No intermediate grid is involved: this is the vectorized equivalent of
+    ``RectBivariateSpline.ev`` on the flattened targets.
+
+    Targets are processed in chunks of `chunk_size` points, both when building
+    the plan and when applying it, so that temporaries stay small (and in
+    cache) whatever the image size.
+
+    Parameters
+    ----------
+    x : array_like
+        Increasing 1D x (longitude) coordinates of the raster window.
+    y : array_like
+        Increasing 1D y (latitude) coordinates of the raster window.
+    target_x : array_like
+        Target x coordinates, any shape.
+    target_y : array_like
+        Target y coordinates, same shape as `target_x`.
+    chunk_size : int, default 16384
+        Number of target points handled at once.
+    knots : {"not-a-knot", "extended"}, default "not-a-knot"
+        Knots of the coefficients the plan is applied to, see `_spline_knots`.
+    """
+
+    k = 3
+    chunk_size = 16384
+
+    def __init__(self, x, y, target_x, target_y, chunk_size=None, knots="not-a-knot"):
+        x = np.asarray(x, dtype="f8")
+        y = np.asarray(y, dtype="f8")
+        target_x = np.asarray(target_x, dtype="f8")
+        target_y = np.asarray(target_y, dtype="f8")
+        if target_x.shape != target_y.shape:
+            raise ValueError("target_x and target_y must have the same shape")
+        if x.size <= self.k or y.size <= self.k:
+            raise ValueError(f"raster window must have at least {self.k + 1} points")
+        if chunk_size is not None:
+            if chunk_size < 1:
+                raise ValueError("chunk_size must be >= 1")
+            self.chunk_size = int(chunk_size)
+
+        self.grid_shape = (y.size, x.size)
+        self.shape = target_x.shape
+
+        target_x = target_x.ravel()
+        target_y = target_y.ravel()
+        self.ix, self.wx = _spline_weights(x, target_x, self.k, self.chunk_size, knots)
+        self.iy, self.wy = _spline_weights(y, target_y, self.k, self.chunk_size, knots)
+
+        # raster cell around each target, to propagate NaN as bilinear would
+        cell_x, _, inside_x = _axis_weights(x, target_x)
+        cell_y, _, inside_y = _axis_weights(y, target_y)
+        self.cells = cell_y * (x.size - 1) + cell_x
+        self.outside = ~(inside_x & inside_y)
+
+    def apply(self, coeffs, out=None, executor=None):
+        """
+        Evaluate stacked tensor-product spline coefficients at the target points.
+
+        Parameters
+        ----------
+        coeffs : numpy.ndarray
+            Coefficients of shape (..., ny, nx), as returned by
+            `make_interp_spline` along y then x.
+        out : numpy.ndarray, optional
+            C-contiguous array of shape (..., *target_shape) to write into.
+            The evaluation is computed in its dtype (e.g. float32).
+        executor : concurrent.futures.Executor, optional
+            Executor over which tiles of target points are spread. The result
+            does not depend on it.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of shape (..., *target_shape). Targets outside of the raster
+            window are set to NaN.
+        """
+        coeffs = np.asarray(coeffs)
+        if coeffs.shape[-2:] != self.grid_shape:
+            raise ValueError(
+                f"coeffs grid shape {coeffs.shape[-2:]} does not match "
+                f"plan grid shape {self.grid_shape}"
+            )
+        lead = coeffs.shape[:-2]
+        if out is None:
+            dtype = np.result_type(coeffs.dtype, self.wx.dtype)
+            out = np.empty(lead + self.shape, dtype=dtype)
+        elif out.shape != lead + self.shape or not out.flags.c_contiguous:
+            raise ValueError(
+                f"out must be a C-contiguous array of shape {lead + self.shape}"
+            )
+
+        ny, nx = self.grid_shape
+        fields = np.ascontiguousarray(coeffs.reshape((-1, ny * nx)), dtype=out.dtype)
+        out_rows = out.reshape((fields.shape[0], -1))
+        # tiles made of whole chunks
+        tile_size = max(1, 65536 // self.chunk_size) * self.chunk_size
+        _run_tiles(
+            lambda start, stop: self._apply_tile(fields, out_rows, start, stop),
+            out_rows.shape[1],
+            executor,
+            tile_size,
+        )
+        return out
+
+    def _apply_tile(self, fields, out_rows, start, stop):
+        nx = self.grid_shape[1]
+        chunk_size = min(self.chunk_size, max(stop - start, 1))
+
+        # chunk-sized work buffers, reused for every chunk and every field
+        base = np.empty(chunk_size, dtype=np.intp)
+        index = np.empty(chunk_size, dtype=np.intp)
+        weight = np.empty(chunk_size, dtype=out_rows.dtype)
+        tmp = np.empty((fields.shape[0], chunk_size), dtype=out_rows.dtype)
+
+        for first in range(start, stop, chunk_size):
+            chunk = slice(first, min(first + chunk_size, stop))
+            n = chunk.stop - first
+            acc = out_rows[:, chunk]
+            acc[...] = 0
+            np.multiply(self.iy[chunk], nx, out=base[:n])
+            base[:n] += self.ix[chunk]
+            wx = self.wx[:, chunk].astype(weight.dtype, copy=False)
+            wy = self.wy[:, chunk].astype(weight.dtype, copy=False)
+            for a in range(self.k + 1):
+                for b in range(self.k + 1):
+                    np.add(base[:n], a * nx + b, out=index[:n])
+                    np.multiply(wy[a], wx[b], out=weight[:n])
+                    np.take(fields, index[:n], axis=1, out=tmp[:, :n], mode="clip")
+                    tmp[:, :n] *= weight[:n]
+                    acc += tmp[:, :n]
+            outside = self.outside[chunk]
+            if outside.any():
+                acc[:, outside] = np.nan
+
+    def to_arrays(self):
+        """
+        Export the plan as a dict of arrays (e.g. for `numpy.savez`).
+
+        Returns
+        -------
+        dict of numpy.ndarray
+        """
+        return {
+            "kind": np.asarray("spline"),
+            "grid_shape": np.asarray(self.grid_shape),
+            "shape": np.asarray(self.shape),
+            "ix": self.ix,
+            "iy": self.iy,
+            "wx": self.wx,
+            "wy": self.wy,
+            "cells": self.cells,
+            "outside": self.outside,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Rebuild a plan exported with `to_arrays`.
+
+        Parameters
+        ----------
+        arrays : mapping of numpy.ndarray
+
+        Returns
+        -------
+        SplinePlan
+        """
+        plan = cls.__new__(cls)
+        plan.grid_shape = tuple(int(n) for n in arrays["grid_shape"])
+        plan.shape = tuple(int(n) for n in arrays["shape"])
+        for name in ("ix", "iy", "wx", "wy", "cells", "outside"):
+            setattr(plan, name, np.asarray(arrays[name]))
+        return plan
+
+
+class GeometryPlan:
+    """
+    Geometry-only part of `map_raster`: raster crop window, intermediate grid
+    and mapping weights onto the image grid.
+
+    Parameters
+    ----------
+    x_slice : slice
+        Crop window along the (increasing) raster x axis.
+    y_slice : slice
+        Crop window along the (increasing) raster y axis.
+    lons : numpy.ndarray or None
+        Intermediate grid longitudes, None if the spline is evaluated directly
+        at the image points.
+    lats : numpy.ndarray or None
+        Intermediate grid latitudes, None if the spline is evaluated directly
+        at the image points.
+    mapping : MappingPlan or SplinePlan or None
+        Weights from the intermediate grid (or from the spline coefficients)
+        onto the image grid. None if all variables are mapped by `nearest`.
+    tiles : tuple of int, optional
+        ``(tile_size, halo)`` of a `SplineCache` if the spline coefficients
+        over the crop window are assembled from cached tiles. Their knots are
+        then "extended" (see `_spline_knots`).
+    upscale : SplinePlan, optional
+        Evaluation of the spline on an intermediate grid that is regular in a
+        projected plane (e.g. polar stereographic) rather than in lon/lat.
+        `lons` and `lats` are then the grid axes in that plane, and `mapping`
+        takes image points in that plane.
+    nearest : NearestPlan, optional
+        Nearest-neighbour lookup from the crop window onto the image grid,
+        for variables that are not interpolated (e.g. integer classes).
+    north : numpy.ndarray, optional
+        Angle of true north from the y axis of a projected raster CRS at the
+        image points, to rotate vector components (see `map_raster`).
+    """
+
+    def __init__(
+        self,
+        x_slice,
+        y_slice,
+        lons,
+        lats,
+        mapping,
+        tiles=None,
+        upscale=None,
+        nearest=None,
+        north=None,
+    ):
+        self.x_slice = x_slice
+        self.y_slice = y_slice
+        self.lons = lons
+        self.lats = lats
+        self.mapping = mapping
+        self.tiles = tiles
+        self.upscale = upscale
+        self.nearest = nearest
+        self.north = north
+
+    @property
+    def direct(self):
+        """
+        Whether the spline is evaluated directly at the image points.
+        """
+        return self.lons is None
+
+    def to_arrays(self):
+        """
+        Export the plan as a dict of arrays (e.g. for `numpy.savez`).
+
+        Returns
+        -------
+        dict of numpy.ndarray
+        """
+        arrays = {
+            "window": np.asarray(
+                [
+                    self.x_slice.start,
+                    self.x_slice.stop,
+                    self.y_slice.start,
+                    self.y_slice.stop,
+                ]
+            ),
+        }
+        if self.tiles is not None:
+            arrays["tiles"] = np.asarray(self.tiles)
+        if not self.direct:
+            arrays.update(lons=self.lons, lats=self.lats)
+        if self.mapping is not None:
+            arrays.update(
+                {f"mapping_{k}": v for k, v in self.mapping.to_arrays().items()}
+            )
+        if self.upscale is not None:
+            arrays.update(
+                {f"upscale_{k}": v for k, v in self.upscale.to_arrays().items()}
+            )
+        if self.nearest is not None:
+            arrays.update(
+                {f"nearest_{k}": v for k, v in self.nearest.to_arrays().items()}
+            )
+        if self.north is not None:
+            arrays["north"] = self.north
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Rebuild a plan exported with `to_arrays`.
+
+        Parameters
+        ----------
+        arrays : mapping of numpy.ndarray
+
+        Returns
+        -------
+        GeometryPlan
+        """
+        x0, x1, y0, y1 = (int(i) for i in arrays["window"])
+        mapping_arrays = {
+            k[len("mapping_") :]: arrays[k] for k in arrays if k.startswith("mapping_")
+        }
+        upscale_arrays = {
+            k[len("upscale_") :]: arrays[k] for k in arrays if k.startswith("upscale_")
+        }
+        nearest_arrays = {
+            k[len("nearest_") :]: arrays[k] for k in arrays if k.startswith("nearest_")
+        }
+        mapping = None
+        if mapping_arrays:
+            plan_class = (
+                SplinePlan if str(mapping_arrays["kind"]) == "spline" else MappingPlan
+            )
+            mapping = plan_class.from_arrays(mapping_arrays)
+        return cls(
+            slice(x0, x1),
+            slice(y0, y1),
+            np.asarray(arrays["lons"]) if "lons" in arrays else None,
+            np.asarray(arrays["lats"]) if "lats" in arrays else None,
+            mapping,
+            tuple(int(n) for n in arrays["tiles"]) if "tiles" in arrays else None,
+            SplinePlan.from_arrays(upscale_arrays) if upscale_arrays else None,
+            NearestPlan.from_arrays(nearest_arrays) if nearest_arrays else None,
+            np.asarray(arrays["north"]) if "north" in arrays else None,
+        )
@@ -0,0 +1,184 @@
+import contextvars
+import logging
+import time
+import tracemalloc
+
+# profilers receiving the stages of the current context (thread or task)
+_active = contextvars.ContextVar("mapraster_profilers", default=())
+
+
+class _NullStage:
+    """Stage of a call with no active profiler: does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def update(self, **info):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """Stage timed (and traced) for the active profilers, see `_stage`."""
+
+    def __init__(self, profilers, name, info):
+        self.profilers = profilers
+        self.record = {"stage": name, **info}
+        self.memory = any(profiler.memory for profiler in profilers)
+
+    def __enter__(self):
+        if self.memory:
+            self.start_bytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.record["time"] = time.perf_counter() - self.start
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            self.record["peak_bytes"] = peak - self.start_bytes
+            self.record["net_bytes"] = current - self.start_bytes
+        for profiler in self.profilers:
+            profiler._add(dict(self.record))
+        return False
+
+    def update(self, **info):
+        """Add information known once the stage ran (e.g. the path taken)."""
+        self.record.update(info)
+
+
+def _stage(name, **info):
+    """
+    Context manager around one stage of the mapping.
+
+    Returns a shared no-op context manager when no `StageProfiler` is active,
+    so that stages cost one context variable lookup.
+
+    Parameters
+    ----------
+    name : str
+        Stage name.
+    **info
+        Extra fields of the stage record (shapes, mode...). More can be added
+        with ``update`` on the returned context.
+    """
+    profilers = _active.get()
+    if not profilers:
+        return _NULL_STAGE
+    return _Stage(profilers, name, info)
+
+
+def _describe(record):
+    extra = ", ".join(
+        f"{key}={value}"
+        for key, value in record.items()
+        if key not in ("stage", "time", "peak_bytes", "net_bytes")
+    )
+    text = f"{record['stage']}: {record['time']:.4f} s"
+    if "peak_bytes" in record:
+        text += f", peak {record['peak_bytes'] / 1e6:.1f} MB"
+    return f"{text} ({extra})" if extra else text
+
+
+class StageProfiler:
+    """
+    Collect per-stage wall time (and memory) of the mapping functions.
+
+    Within the ``with`` block, every stage run by `map_raster`,
+    `iter_map_raster` or `map_raster_batch` in the current thread produces a
+    record: a dict with the ``stage`` name, its wall ``time`` in seconds and
+    stage specific fields, e.g. the ``shape`` or ``sizes`` of the arrays,
+    whether the geometry was ``cached``, the ``method`` of the final
+    interpolation or the ``nan_variables`` that went through the NaN
+    inpainting fallback of the spline fit.
+
+    Stages are, in order: ``read_window``, ``transform`` (`native_crs`),
+    ``reproject`` (projected rasters), ``flip`` (decreasing axes),
+    ``geometry``, ``nearest`` (variables mapped with ``method="nearest"``),
+    ``crop``, ``fit``, ``evaluate`` (intermediate grid), ``interp`` (final
+    interpolation), ``rotate`` (``vectors``) and ``to_dataset``. Blocks
+    computed by dask worker threads (lazy mode) and scenes mapped in other
+    processes (`map_raster_batch` with `n_processes`) are not recorded.
+
+    Without an active profiler, each stage costs a context variable lookup.
+
+    Parameters
+    ----------
+    callback : callable, optional
+        Called with each record as soon as its stage ends.
+    memory : bool, default False
+        Also record ``peak_bytes`` (peak memory allocated during the stage)
+        and ``net_bytes`` (memory still allocated at its end), traced with
+        `tracemalloc`. Tracing slows numpy down noticeably.
+    logger : logging.Logger or str, optional
+        Log each record at INFO level to this logger (or logger name).
+
+    Examples
+    --------
+    >>> with StageProfiler() as profiler:
+    ...     pass
+    >>> profiler.records, profiler.summary()
+    ([], {})
+    """
+
+    def __init__(self, callback=None, memory=False, logger=None):
+        self.callback = callback
+        self.memory = memory
+        if isinstance(logger, str):
+            logger = logging.getLogger(logger)
+        self.logger = logger
+        self.records = []
+        self._token = None
+        self._started_tracing = False
+
+    def __enter__(self):
+        if self._token is not None:
+            raise RuntimeError("StageProfiler is already active")
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._token = _active.set(_active.get() + (self,))
+        return self
+
+    def __exit__(self, *exc):
+        _active.reset(self._token)
+        self._token = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return False
+
+    def _add(self, record):
+        self.records.append(record)
+        if self.logger is not None:
+            self.logger.info("stage %s", _describe(record))
+        if self.callback is not None:
+            self.callback(record)
+
+    def summary(self):
+        """
+        Totals per stage, e.g. for a metrics pipeline.
+
+        Returns
+        -------
+        dict
+            Per stage name, in order of first occurrence: number of
+            ``calls``, total ``time`` and, with `memory`, the max
+            ``peak_bytes``.
+        """
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record["stage"], {"calls": 0, "time": 0.0})
+            total["calls"] += 1
+            total["time"] += record["time"]
+            if "peak_bytes" in record:
+                total["peak_bytes"] = max(
+                    total.get("peak_bytes", 0), record["peak_bytes"]
+                )
+        return totals
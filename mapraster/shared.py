@@ -0,0 +1,200 @@
+import errno
+import os
+import shutil
+import tempfile
+import weakref
+
+import numpy as np
+
+# arrays smaller than this are simply pickled
+_MIN_SHARED_BYTES = 2**16
+
+
+def _default_directory(nbytes=0):
+    """
+    Directory of the shared buffers: in memory (/dev/shm) if available with
+    room for `nbytes`, else the default temporary directory (None).
+    """
+    shm = "/dev/shm"  # nosec: private directory created inside
+    if os.path.isdir(shm) and os.access(shm, os.W_OK):
+        stat = os.statvfs(shm)
+        if stat.f_bavail * stat.f_frsize >= nbytes:
+            return shm
+    return None
+
+
+def _nbytes(obj):
+    """Total size of the numpy arrays of nested tuples, lists and dicts."""
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (tuple, list)):
+        return sum(_nbytes(item) for item in obj)
+    if isinstance(obj, dict):
+        return sum(_nbytes(value) for value in obj.values())
+    return 0
+
+
+def _reserve(path):
+    """
+    Allocate the blocks of a (sparse) file, so that a full file system
+    raises an OSError here rather than a SIGBUS when the mapping is written.
+    """
+    if not hasattr(os, "posix_fallocate"):
+        return
+    fd = os.open(path, os.O_RDWR)
+    try:
+        os.posix_fallocate(fd, 0, os.fstat(fd).st_size)
+    except OSError as error:
+        if error.errno not in (errno.EOPNOTSUPP, errno.EINVAL):
+            raise
+    finally:
+        os.close(fd)
+
+
+class _SharedArray:
+    """
+    Picklable handle of an array shared through a memory-mapped .npy file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def attach(self, mode="r"):
+        """
+        Map the array, without copy.
+
+        Parameters
+        ----------
+        mode : {"r", "r+"}, default "r"
+            Read only, or read and write (e.g. an output buffer).
+
+        Returns
+        -------
+        numpy.memmap
+        """
+        return np.load(self.path, mmap_mode=mode)
+
+
+class _SharedArrays:
+    """
+    Arrays shared with worker processes, as memory-mapped .npy files.
+
+    Workers attach the files zero-copy (see `_attach`), instead of receiving
+    pickled copies. Each mapping keeps its file data alive on its own, so
+    files can be removed as soon as every process has attached them.
+
+    Parameters
+    ----------
+    directory : str, optional
+        Parent directory of the files (a private temporary directory is
+        created inside). /dev/shm if available with room for `nbytes`, else
+        the default temporary directory.
+    nbytes : int, default 0
+        Expected size of the arrays shared at the same time.
+    """
+
+    def __init__(self, directory=None, nbytes=0):
+        self.directory = tempfile.mkdtemp(
+            prefix="mapraster-", dir=directory or _default_directory(nbytes)
+        )
+        self._count = 0
+        # files are removed at the latest with the object
+        self._finalizer = weakref.finalize(
+            self, shutil.rmtree, self.directory, ignore_errors=True
+        )
+
+    def empty(self, shape, dtype):
+        """
+        New shared array.
+
+        Returns
+        -------
+        tuple
+            The `_SharedArray` handle and the array, mapped read-write.
+
+        Raises
+        ------
+        OSError
+            If there is no room for the array in the directory.
+        """
+        self._count += 1
+        path = os.path.join(self.directory, f"{self._count}.npy")
+        array = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+        try:
+            _reserve(path)
+        except OSError as error:
+            del array
+            os.remove(path)
+            nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            raise OSError(
+                error.errno,
+                f"no room for a shared array of {nbytes} bytes in "
+                f"{self.directory} ({error.strerror}), see shared_directory",
+            ) from error
+        return _SharedArray(path), array
+
+    def put(self, array):
+        """
+        Copy an array into a shared array.
+
+        Returns
+        -------
+        _SharedArray
+        """
+        handle, shared = self.empty(array.shape, array.dtype)
+        shared[...] = array
+        return handle
+
+    def share(self, obj):
+        """
+        Replace the large numpy arrays of nested tuples, lists and dicts by
+        shared arrays.
+
+        Returns
+        -------
+        object
+            `obj` with `_SharedArray` handles, see `_attach`.
+        """
+        if isinstance(obj, np.ndarray) and obj.nbytes >= _MIN_SHARED_BYTES:
+            return self.put(obj)
+        if isinstance(obj, (tuple, list)):
+            return type(obj)(self.share(item) for item in obj)
+        if isinstance(obj, dict):
+            return {key: self.share(value) for key, value in obj.items()}
+        return obj
+
+    @staticmethod
+    def release(obj):
+        """
+        Remove the files of the `_SharedArray` handles in `obj`. Arrays
+        already mapped stay valid.
+        """
+        if isinstance(obj, _SharedArray):
+            try:
+                os.remove(obj.path)
+            except FileNotFoundError:
+                pass
+        elif isinstance(obj, (tuple, list)):
+            for item in obj:
+                _SharedArrays.release(item)
+        elif isinstance(obj, dict):
+            for value in obj.values():
+                _SharedArrays.release(value)
+
+    def close(self):
+        """Remove all files."""
+        self._finalizer()
+
+
+def _attach(obj, mode="r"):
+    """
+    Map the `_SharedArray` handles of nested tuples, lists and dicts (see
+    `_SharedArrays.share`).
+    """
+    if isinstance(obj, _SharedArray):
+        return obj.attach(mode)
+    if isinstance(obj, (tuple, list)):
+        return type(obj)(_attach(item, mode) for item in obj)
+    if isinstance(obj, dict):
+        return {key: _attach(value, mode) for key, value in obj.items()}
+    return obj
@@ -78,3 +78,21 @@ def test_map_raster_with_nan():
 
 
 test_map_raster_with_nan()
+
+
+def test_map_raster_with_nan_matches_no_nan():
+    """
+    Away from the NaN, the NaN-aware spline gives the same values as without NaN.
+    """
+    dataset = fake_dataset(cross_antimeridian=True)
+    footprint = build_footprint(dataset)
+
+    kwargs = dict(originalDataset=dataset, footprint=footprint, cross_antimeridian=True)
+    with_nan = map_raster(fake_ecmwf_0100_1h(to180=False, with_nan=True), **kwargs)
+    no_nan = map_raster(fake_ecmwf_0100_1h(to180=False, with_nan=False), **kwargs)
+
+    for var in ("U10", "V10"):
+        valid = ~np.isnan(with_nan[var].values)
+        np.testing.assert_allclose(
+            with_nan[var].values[valid], no_nan[var].values[valid], atol=1e-6
+        )
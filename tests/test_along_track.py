@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+import xarray as xr
+from tools_test import CASES, fake_case, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster import SplineCache, iter_map_raster, map_raster
+
+
+@pytest.mark.parametrize("intermediate_grid", ["image", None])
+@pytest.mark.parametrize("cross_antimeridian, with_nan", CASES)
+def test_along_track_matches_map_raster(
+    cross_antimeridian, with_nan, intermediate_grid
+):
+    # a long track, walked in bursts of 64 lines
+    sar_dataset, raster, footprint = fake_case(
+        cross_antimeridian, with_nan, shape=(300, 60)
+    )
+    kwargs = dict(intermediate_grid=intermediate_grid)
+
+    expected = map_raster(raster, sar_dataset, footprint, cross_antimeridian, **kwargs)
+    blocks = list(
+        iter_map_raster(
+            raster, sar_dataset, cross_antimeridian, burst_lines=64, **kwargs
+        )
+    )
+
+    assert [lines for lines, _ in blocks] == [
+        slice(0, 64),
+        slice(64, 128),
+        slice(128, 192),
+        slice(192, 256),
+        slice(256, 300),
+    ]
+    streamed = xr.concat([block for _, block in blocks], "line")
+    xr.testing.assert_equal(streamed.line, expected.line)
+
+    # NaN inpainting is done per fitted region, not on the whole window, and
+    # the intermediate grid (and its bilinear error) depends on the burst
+    atol = 1e-4 if with_nan or intermediate_grid else 1e-10
+    for var in expected:
+        values, reference = streamed[var].values, expected[var].values
+        if intermediate_grid is None:
+            np.testing.assert_array_equal(np.isnan(values), np.isnan(reference))
+        # else the NaN mask is dilated by a per-burst (finer) intermediate grid
+        both = ~np.isnan(values) & ~np.isnan(reference)
+        assert both.mean() > 0.2
+        np.testing.assert_allclose(values[both], reference[both], atol=atol)
+
+
+def test_along_track_shares_tiles():
+    sar_dataset = fake_dataset(shape=(300, 60))
+    raster = fake_ecmwf_0100_1h(to180=True)
+
+    cache = SplineCache(tile_size=16, halo=12)
+    for _ in iter_map_raster(raster, sar_dataset, burst_lines=50, spline_cache=cache):
+        pass
+    # consecutive bursts reuse the tiles of their overlap
+    assert cache.hits > 0
+
+
+def test_along_track_burst_lines():
+    sar_dataset = fake_dataset()
+    raster = fake_ecmwf_0100_1h(to180=True)
+    with pytest.raises(ValueError, match="burst_lines"):
+        next(iter_map_raster(raster, sar_dataset, burst_lines=0))
+
+
+def test_along_track_nan_bursts():
+    # padding lines at the start of a datatake
+    sar_dataset = fake_dataset(shape=(60, 40))
+    for var in ("longitude", "latitude"):
+        sar_dataset[var] = sar_dataset[var].where(sar_dataset.line >= 10)
+    raster = fake_ecmwf_0100_1h(to180=True, with_classes=True)
+    raster["CLASS"] = raster["CLASS"].rio.write_nodata(-1)
+    raster["LAND"] = raster["LAND"].rio.write_nodata(2)
+
+    blocks = list(iter_map_raster(raster, sar_dataset, burst_lines=10))
+    assert len(blocks) == 6
+    padding, mapped = blocks[0][1], blocks[1][1]
+    assert padding["U10"].dims == mapped["U10"].dims
+    assert padding["U10"].shape == (10, 40)
+    for var in mapped:
+        assert padding[var].dtype == mapped[var].dtype
+        assert padding[var].attrs == mapped[var].attrs
+    assert np.isnan(padding["U10"].values).all()
+    assert (padding["LAND"].values == 2).all()
+    assert not np.isnan(mapped["U10"].values).all()
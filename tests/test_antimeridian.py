@@ -0,0 +1,146 @@
+"""
+Antimeridian crossing detected from the footprint, on rasters in either
+longitude convention: the result must not depend on the raster convention.
+"""
+
+import numpy as np
+import pytest
+import xarray as xr
+from tools_test import (
+    CASES,
+    _to_lon180,
+    build_footprint,
+    fake_dataset,
+    fake_ecmwf_0100_1h,
+    fake_projected_raster,
+)
+
+from mapraster import iter_map_raster, map_raster_batch
+from mapraster.main import (
+    _crosses_antimeridian,
+    _lon_windows,
+    map_raster,
+    read_footprint_window,
+)
+
+
+@pytest.mark.parametrize("cross_antimeridian, with_nan", CASES)
+def test_any_raster_convention(cross_antimeridian, with_nan):
+    sar_dataset = fake_dataset(cross_antimeridian=cross_antimeridian)
+    footprint = build_footprint(sar_dataset)
+    raster360 = fake_ecmwf_0100_1h(to180=False, with_nan=with_nan)
+    raster180 = _to_lon180(raster360)
+
+    # previous behaviour: explicit flag, raster given in the matching convention
+    expected = map_raster(
+        raster360 if cross_antimeridian else raster180,
+        sar_dataset,
+        footprint,
+        cross_antimeridian,
+    )
+    for raster in (raster180, raster360, raster180.isel(x=slice(None, None, -1))):
+        out = map_raster(raster, sar_dataset, footprint)
+        for var in expected:
+            np.testing.assert_allclose(
+                out[var].values, expected[var].values, rtol=0, atol=1e-12
+            )
+            np.testing.assert_array_equal(
+                np.isnan(out[var].values), np.isnan(expected[var].values)
+            )
+
+
+def test_projected_raster():
+    sar_dataset = fake_dataset(cross_antimeridian=True)
+    footprint = build_footprint(sar_dataset)
+    raster = fake_projected_raster("EPSG:3832", cross_antimeridian=True)
+
+    # reprojected to the [0, 360) convention of the crossing footprint
+    expected = map_raster(raster, sar_dataset, footprint, native_crs=True)
+    for out in (
+        map_raster(raster, sar_dataset, footprint),
+        next(map_raster_batch(raster, [(sar_dataset, footprint)])),
+    ):
+        for var in expected:
+            assert not np.isnan(out[var].values).any()
+            # up to the resampling error of the reprojection
+            np.testing.assert_allclose(
+                out[var].values, expected[var].values, rtol=0, atol=2e-3
+            )
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_window_across_raster_seam(descending):
+    sar_dataset = fake_dataset(cross_antimeridian=True)
+    footprint = build_footprint(sar_dataset)
+    raster = fake_ecmwf_0100_1h(to180=True)
+    if descending:
+        raster = raster.isel(x=slice(None, None, -1))
+
+    window = read_footprint_window(raster, footprint, pad=2)
+
+    # only the footprint window, contiguous in [0, 360)
+    x = window.x.values
+    step = -0.1 if descending else 0.1
+    np.testing.assert_allclose(np.diff(x), step, atol=1e-9)
+    assert x.min() < 180 < x.max()
+    assert window.sizes["x"] < 300
+    expected = 2 * np.sin(np.deg2rad(x))
+    np.testing.assert_allclose(window["V10"].isel(y=0).values, expected, atol=1e-12)
+
+
+def test_lon_windows():
+    axis = np.arange(-180, 180, 1.0)
+    assert _lon_windows(axis, -30, -20, 0) == [(slice(150, 161), 0.0)]
+    # same window, asked in [0, 360)
+    assert _lon_windows(axis, 330, 340, 0) == [(slice(150, 161), 360.0)]
+    assert _lon_windows(axis, 175, 185, 0) == [
+        (slice(355, 360), 0.0),
+        (slice(0, 6), 360.0),
+    ]
+
+    # global axis repeating its first longitude: 360 is not taken twice
+    axis = np.arange(0, 361, 1.0)
+    windows = _lon_windows(axis, -5, 5, 0)
+    assert windows == [(slice(355, 360), -360.0), (slice(0, 6), 0.0)]
+
+    # regional axis: no wrapping
+    axis = np.arange(-30, 50, 1.0)
+    assert _lon_windows(axis, -40, 10, 0) == [(slice(0, 41), 0.0)]
+
+
+def test_crossing_detection():
+    assert _crosses_antimeridian([170.0, -170.0])
+    # same footprint in [0, 360)
+    assert _crosses_antimeridian([170.0, 190.0])
+    # [0, 360) longitudes jumping at Greenwich
+    assert not _crosses_antimeridian([355.0, 5.0])
+    assert not _crosses_antimeridian([-20.0, 20.0])
+
+
+@pytest.mark.parametrize("with_nan", [False, True])
+def test_greenwich_in_lon360(with_nan):
+    sar_dataset = fake_dataset()
+    sar_dataset["longitude"] = sar_dataset["longitude"] + 25
+    assert sar_dataset["longitude"].min() < 0 < sar_dataset["longitude"].max()
+    footprint = build_footprint(sar_dataset)
+    dataset360 = sar_dataset.assign(longitude=sar_dataset["longitude"] % 360)
+    footprint360 = build_footprint(dataset360)
+    raster = fake_ecmwf_0100_1h(to180=False, with_nan=with_nan)
+
+    expected = map_raster(raster, sar_dataset, footprint)
+    assert not np.isnan(expected["U10"].values).all()
+    outs = [
+        map_raster(raster, dataset360, footprint360),
+        next(map_raster_batch(raster, [(dataset360, footprint360)])),
+    ]
+    bursts = iter_map_raster(raster, dataset360, burst_lines=20)
+    outs.append(xr.concat([mapped for _, mapped in bursts], dim="line"))
+    for out in outs:
+        for var in expected:
+            # batch and bursts fit their splines on other windows
+            np.testing.assert_allclose(
+                out[var].values, expected[var].values, rtol=0, atol=1e-5
+            )
+            np.testing.assert_array_equal(
+                np.isnan(out[var].values), np.isnan(expected[var].values)
+            )
@@ -0,0 +1,215 @@
+import errno
+import os
+import types
+
+import numpy as np
+import pytest
+import xarray as xr
+from tools_test import (
+    build_footprint,
+    fake_dataset,
+    fake_ecmwf_0100_1h,
+    fake_polar_dataset,
+)
+
+from mapraster import PlanCache, map_raster, map_raster_batch
+from mapraster.shared import (
+    _attach,
+    _default_directory,
+    _SharedArray,
+    _SharedArrays,
+)
+
+
+def shifted_scene(dlon, dlat, cross_antimeridian=False, shape=(50, 60)):
+    dataset = fake_dataset(cross_antimeridian=cross_antimeridian, shape=shape)
+    dataset["longitude"] = dataset["longitude"] + dlon
+    dataset["latitude"] = dataset["latitude"] + dlat
+    return dataset, build_footprint(dataset)
+
+
+@pytest.mark.parametrize("intermediate_grid", ["image", None])
+@pytest.mark.parametrize("with_nan", [False, True])
+def test_batch_matches_map_raster(with_nan, intermediate_grid):
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=with_nan)
+    scenes = [
+        shifted_scene(0, 0),
+        shifted_scene(2.5, -1, shape=(40, 70)),
+        shifted_scene(-4, 3),
+    ]
+
+    batch = map_raster_batch(raster, scenes, intermediate_grid=intermediate_grid)
+    assert isinstance(batch, types.GeneratorType)
+
+    for (dataset, footprint), mapped in zip(scenes, batch):
+        expected = map_raster(
+            raster, dataset, footprint, intermediate_grid=intermediate_grid
+        )
+        assert mapped["U10"].dims == expected["U10"].dims
+        for var in ("U10", "V10"):
+            # only the window the splines are fitted on differs
+            np.testing.assert_allclose(
+                mapped[var].values, expected[var].values, atol=1e-6
+            )
+
+
+def test_batch_antimeridian_with_nan():
+    """
+    Scenes on both sides of the antimeridian convention, as in case 4 of
+    test_map_raster_4cases.
+    """
+    raster = fake_ecmwf_0100_1h(to180=False, with_nan=True)
+    scenes = [
+        shifted_scene(0, 0, cross_antimeridian=True) + (True,),
+        shifted_scene(100, 0) + (False,),
+    ]
+
+    for (dataset, footprint, cross), mapped in zip(
+        scenes, map_raster_batch(raster, scenes)
+    ):
+        expected = map_raster(raster, dataset, footprint, cross)
+        for var in ("U10", "V10"):
+            np.testing.assert_array_equal(
+                np.isnan(mapped[var].values), np.isnan(expected[var].values)
+            )
+            np.testing.assert_allclose(
+                mapped[var].values, expected[var].values, atol=1e-4
+            )
+
+
+def test_batch_workers_and_processes():
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=True)
+    scenes = [shifted_scene(dlon, 0) for dlon in (0, 1, 2, 3, 4)]
+
+    serial = [out["U10"].values for out in map_raster_batch(raster, scenes)]
+    threads = map_raster_batch(raster, scenes, n_workers=2)
+    processes = map_raster_batch(raster, scenes, n_processes=2)
+    for expected, threaded, forked in zip(serial, threads, processes):
+        np.testing.assert_array_equal(threaded["U10"].values, expected)
+        np.testing.assert_array_equal(forked["U10"].values, expected)
+
+
+@pytest.mark.parametrize("kwargs", [{}, dict(n_processes=2)])
+def test_batch_polar_scenes(kwargs):
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=True)
+    polar = [fake_polar_dataset(), fake_polar_dataset(contains_pole=False, south=True)]
+    scenes = [shifted_scene(0, 0), (polar[0], build_footprint(polar[0]))]
+    scenes += [shifted_scene(2, 1), (polar[1], build_footprint(polar[1]))]
+
+    for (dataset, footprint), mapped in zip(
+        scenes, map_raster_batch(raster, scenes, **kwargs)
+    ):
+        expected = map_raster(raster, dataset, footprint)
+        for var in ("U10", "V10"):
+            # polar scenes: mapped on their own polar window, as by map_raster
+            np.testing.assert_allclose(
+                mapped[var].values, expected[var].values, atol=1e-6
+            )
+    assert not np.isnan(mapped["U10"].values).any()
+
+
+@pytest.mark.parametrize("kwargs", [{}, dict(n_workers=2), dict(n_processes=2)])
+def test_batch_no_scenes(kwargs):
+    raster = fake_ecmwf_0100_1h(to180=True)
+    assert list(map_raster_batch(raster, [], **kwargs)) == []
+
+
+def test_batch_plan_cache():
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=False)
+    scenes = [shifted_scene(0, 0), shifted_scene(1, 1)]
+    cache = PlanCache()
+
+    first = [
+        out["V10"].values for out in map_raster_batch(raster, scenes, plan_cache=cache)
+    ]
+    second = [
+        out["V10"].values for out in map_raster_batch(raster, scenes, plan_cache=cache)
+    ]
+
+    assert cache.info()["hits"] == 2
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_batch_plan_cache_on_disk(tmp_path):
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=False, with_classes=True)
+    scenes = [shifted_scene(0, 0), shifted_scene(1, 1)]
+
+    first = list(
+        map_raster_batch(raster, scenes, plan_cache=PlanCache(directory=str(tmp_path)))
+    )
+    # a new cache (e.g. another run) loads the plans saved by the first one
+    cache = PlanCache(directory=str(tmp_path))
+    second = list(map_raster_batch(raster, scenes, plan_cache=cache))
+
+    assert cache.info()["disk_hits"] == 2
+    for a, b in zip(first, second):
+        xr.testing.assert_identical(a, b)
+
+
+def test_batch_processes_shared_files(tmp_path):
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=True, with_classes=True)
+    scenes = [shifted_scene(dlon, 0, shape=(80, 90)) for dlon in (0, 1, 2)]
+
+    serial = list(map_raster_batch(raster, scenes))
+    batch = map_raster_batch(
+        raster, scenes, n_processes=1, shared_directory=str(tmp_path)
+    )
+    for expected in serial:
+        mapped = next(batch)
+        for var in ("U10", "V10", "LAND"):
+            assert mapped[var].dtype == expected[var].dtype
+            np.testing.assert_array_equal(mapped[var].values, expected[var].values)
+        # copied out of the shared buffers: not kept in shared memory
+        assert mapped["U10"].values.base is None or not isinstance(
+            mapped["U10"].values.base, np.memmap
+        )
+    assert list(tmp_path.iterdir())
+    assert next(batch, None) is None
+    assert not list(tmp_path.iterdir())
+
+    # files are removed too when the iterator is closed early
+    batch = map_raster_batch(
+        raster, scenes, n_processes=1, shared_directory=str(tmp_path)
+    )
+    next(batch)
+    batch.close()
+    assert not list(tmp_path.iterdir())
+
+
+def test_shared_arrays(tmp_path):
+    shared = _SharedArrays(str(tmp_path))
+    large, small = np.arange(2**14, dtype="f8").reshape(128, 128), np.arange(3)
+    handles = shared.share(dict(a=(large, small), b=[None]))
+    assert isinstance(handles["a"][0], _SharedArray)
+    assert handles["a"][1] is small
+
+    attached = _attach(handles)
+    np.testing.assert_array_equal(attached["a"][0], large)
+    assert attached["b"] == [None]
+    with pytest.raises(ValueError, match="read-only"):
+        attached["a"][0][0, 0] = 1
+
+    handle, out = shared.empty((2, 3), "f4")
+    _attach(handle, mode="r+")[...] = 5
+    _SharedArrays.release(handle)
+    np.testing.assert_array_equal(out, 5)
+    shared.close()
+    assert not list(tmp_path.iterdir())
+
+
+def test_shared_arrays_full(tmp_path, monkeypatch):
+    # /dev/shm only if it has room
+    assert _default_directory(2**62) is None
+
+    # a full file system raises when the buffer is created, rather than a
+    # SIGBUS when it is written
+    def fallocate(fd, offset, length):
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+
+    monkeypatch.setattr(os, "posix_fallocate", fallocate, raising=False)
+    shared = _SharedArrays(str(tmp_path))
+    with pytest.raises(OSError, match="no room for a shared array of 800 bytes"):
+        shared.empty((10, 10), "f8")
+    assert not list(os.scandir(shared.directory))
+    shared.close()
@@ -0,0 +1,57 @@
+import numpy as np
+from tools_test import build_footprint, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster.cache import PlanCache
+from mapraster.main import map_raster
+
+
+def test_plan_cache_hit_gives_same_result():
+    dataset = fake_dataset(cross_antimeridian=True)
+    footprint = build_footprint(dataset)
+    raster = fake_ecmwf_0100_1h(to180=False, with_nan=False)
+
+    cache = PlanCache(maxsize=2)
+    kwargs = dict(
+        originalDataset=dataset,
+        footprint=footprint,
+        cross_antimeridian=True,
+        plan_cache=cache,
+    )
+
+    first = map_raster(raster_ds=raster, **kwargs)
+    assert cache.info()["misses"] == 1 and cache.info()["hits"] == 0
+
+    # another "lead time" on the same grid
+    second = map_raster(raster_ds=raster * 2, **kwargs)
+    assert cache.info()["hits"] == 1
+
+    expected = map_raster(
+        raster_ds=raster * 2,
+        originalDataset=dataset,
+        footprint=footprint,
+        cross_antimeridian=True,
+    )
+    for var in ("U10", "V10"):
+        np.testing.assert_array_equal(second[var].values, expected[var].values)
+        np.testing.assert_allclose(second[var].values, 2 * first[var].values)
+
+
+def test_plan_cache_lru_and_disk(tmp_path):
+    dataset = fake_dataset(cross_antimeridian=False)
+    footprint = build_footprint(dataset)
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=False)
+
+    cache = PlanCache(maxsize=1, directory=str(tmp_path), max_disk_entries=1)
+    ref = map_raster(raster, dataset, footprint, plan_cache=cache)
+
+    # a different geometry evicts the first plan from memory and disk
+    shifted = dataset.assign(latitude=dataset["latitude"] + 1)
+    map_raster(raster, shifted, build_footprint(shifted), plan_cache=cache)
+    assert len(cache) == 1
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+
+    # the disk spill is reloaded by a fresh cache
+    other = PlanCache(directory=str(tmp_path))
+    out = map_raster(raster, shifted, build_footprint(shifted), plan_cache=other)
+    assert other.info()["disk_hits"] == 1
+    assert out["U10"].shape == ref["U10"].shape
@@ -0,0 +1,90 @@
+"""
+Float32 compute mode, against the float64 reference values of
+test_map_raster_4cases.py and the float64 output.
+"""
+
+import numpy as np
+import pytest
+from tools_test import (
+    CASES,
+    build_footprint,
+    fake_case,
+    fake_dataset,
+    fake_ecmwf_0100_1h,
+)
+
+from mapraster import SplineCache, iter_map_raster, map_raster, map_raster_batch
+
+# (nan)mean and (nan)std of test_map_raster_4cases.py
+REFERENCES = {
+    (False, False): {"U10": (6.778062602480738, 0.0141060230914798)},
+    (False, True): {"U10": (6.778062602480738, 0.0141060230914798)},
+    (True, False): {"V10": (0.1933075747771534, 0.16163073381182927)},
+    (True, True): {"V10": (0.2644555412995936, 0.18536411783835113)},
+}
+
+
+def assert_float32_close(result, expected):
+    for var in expected:
+        values, reference = result[var].values, expected[var].values
+        assert values.dtype == np.float32
+        np.testing.assert_array_equal(np.isnan(values), np.isnan(reference))
+        np.testing.assert_allclose(values, reference, rtol=1e-6, atol=1e-6)
+
+
+@pytest.mark.parametrize("intermediate_grid", ["image", "adaptive", None])
+@pytest.mark.parametrize("cross_antimeridian, with_nan", CASES)
+def test_float32_4cases(cross_antimeridian, with_nan, intermediate_grid):
+    sar_dataset, raster, footprint = fake_case(cross_antimeridian, with_nan)
+    kwargs = dict(
+        cross_antimeridian=cross_antimeridian, intermediate_grid=intermediate_grid
+    )
+
+    expected = map_raster(raster, sar_dataset, footprint, **kwargs)
+    result = map_raster(raster, sar_dataset, footprint, dtype="float32", **kwargs)
+    assert_float32_close(result, expected)
+
+    if intermediate_grid == "image":
+        for var, (mean, std) in REFERENCES[cross_antimeridian, with_nan].items():
+            values = result[var].values.astype("f8")
+            assert abs(np.nanmean(values) - mean) < 1e-5
+            assert abs(np.nanstd(values) - std) < 1e-5
+
+
+def test_float32_other_modes():
+    sar_dataset = fake_dataset(shape=(120, 60))
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=True)
+    footprint = build_footprint(sar_dataset)
+    expected = map_raster(raster, sar_dataset, footprint)
+
+    lazy = map_raster(
+        raster, sar_dataset, footprint, chunks={"line": 50}, dtype="float32"
+    )
+    assert lazy["U10"].dtype == np.float32
+    reference = map_raster(raster, sar_dataset, footprint, chunks={"line": 50})
+    assert_float32_close(lazy.compute(), reference.compute())
+
+    cache = SplineCache(tile_size=16, halo=12)
+    for dtype in ("float32", "float64", "float32"):
+        cached = map_raster(
+            raster, sar_dataset, footprint, spline_cache=cache, dtype=dtype
+        )
+        # tiles are cached in float64, whatever the dtype they were fitted for
+        assert cached["U10"].dtype == dtype
+    assert cache.hits == 2 * cache.misses
+    np.testing.assert_allclose(cached["U10"].values, expected["U10"].values, atol=1e-4)
+
+    blocks = iter_map_raster(raster, sar_dataset, burst_lines=50, dtype="float32")
+    assert all(block["V10"].dtype == np.float32 for _, block in blocks)
+
+    (batched,) = map_raster_batch(raster, [(sar_dataset, footprint)], dtype="float32")
+    assert batched["U10"].dtype == np.float32
+    np.testing.assert_allclose(batched["U10"].values, expected["U10"].values, atol=1e-4)
+
+
+def test_float32_dtype_check():
+    sar_dataset = fake_dataset()
+    raster = fake_ecmwf_0100_1h(to180=True)
+    footprint = build_footprint(sar_dataset)
+    with pytest.raises(ValueError, match="floating point"):
+        map_raster(raster, sar_dataset, footprint, dtype="int32")
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from tools_test import build_footprint, fake_case, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster.main import _intermediate_size, map_raster
+
+
+def test_intermediate_size():
+    # 2° at 0.1°, 4 points per pixel
+    assert _intermediate_size(2.0, 0.1, 4) == 81
+    # bounded on both sides
+    assert _intermediate_size(0.01, 0.1, 4) == 4
+    assert _intermediate_size(180.0, 0.1, 4) == 1000
+
+
+@pytest.mark.parametrize("intermediate_grid", ["image", "adaptive", None])
+@pytest.mark.parametrize("cross_antimeridian", [False, True])
+def test_intermediate_grid_accuracy(intermediate_grid, cross_antimeridian):
+    """
+    All intermediate grid choices are close to the analytic fields.
+    """
+    dataset, raster, footprint = fake_case(cross_antimeridian)
+
+    out = map_raster(
+        raster,
+        dataset,
+        footprint,
+        cross_antimeridian,
+        intermediate_grid=intermediate_grid,
+    )
+
+    lat = np.deg2rad(dataset["latitude"].values)
+    lon = np.deg2rad(dataset["longitude"].values)
+    np.testing.assert_allclose(out["U10"].values, 5 + 2 * np.cos(lat), atol=1e-5)
+    np.testing.assert_allclose(out["V10"].values, 2 * np.sin(lon), atol=1e-5)
+
+
+def test_invalid_intermediate_grid():
+    dataset = fake_dataset(cross_antimeridian=False)
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=False)
+    with pytest.raises(ValueError, match="intermediate_grid"):
+        map_raster(raster, dataset, build_footprint(dataset), intermediate_grid="x")
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from tools_test import build_footprint, fake_case, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster.main import map_raster
+
+pytest.importorskip("dask")
+
+
+@pytest.mark.parametrize("cross_antimeridian", [False, True])
+def test_map_raster_lazy_blocks(cross_antimeridian):
+    dataset, raster, footprint = fake_case(cross_antimeridian)
+
+    eager = map_raster(raster, dataset, footprint, cross_antimeridian)
+    lazy = map_raster(
+        raster,
+        dataset,
+        footprint,
+        cross_antimeridian,
+        chunks={"line": 20, "sample": 25},
+    )
+
+    assert lazy["U10"].chunks == ((20, 20, 10), (25, 25, 10))
+    for var in ("U10", "V10"):
+        np.testing.assert_allclose(
+            lazy[var].values, eager[var].values, rtol=0, atol=1e-5
+        )
+
+
+def test_map_raster_lazy_nan_block():
+    # NaN padding covering a whole chunk of the image grid
+    dataset = fake_dataset()
+    footprint = build_footprint(dataset)
+    for var in ("longitude", "latitude"):
+        dataset[var] = dataset[var].where((dataset.line >= 20) | (dataset.sample >= 25))
+    raster = fake_ecmwf_0100_1h(with_nan=False, with_classes=True)
+    raster["CLASS"] = raster["CLASS"].rio.write_nodata(-1)
+    raster["LAND"] = raster["LAND"].rio.write_nodata(2)
+
+    eager = map_raster(raster, dataset, footprint)
+    lazy = map_raster(raster, dataset, footprint, chunks={"line": 20, "sample": 25})
+
+    assert np.isnan(lazy["U10"].values[:20, :25]).all()
+    assert (lazy["LAND"].values[:20, :25] == 2).all()
+    for var in ("U10", "V10", "LAND"):
+        assert lazy[var].dtype == eager[var].dtype
+        np.testing.assert_allclose(
+            lazy[var].values, eager[var].values, rtol=0, atol=1e-5
+        )
@@ -0,0 +1,32 @@
+import tracemalloc
+
+from tools_test import build_footprint, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster.main import map_raster
+
+
+def peak_memory(func, *args, **kwargs):
+    """
+    Peak memory (bytes) allocated while running ``func(*args, **kwargs)``.
+    """
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_map_raster_peak_memory():
+    """
+    Peak memory is driven by the mapping weights (64 bytes per image point)
+    and the output (8 bytes per point and variable), not by raster copies.
+    """
+    dataset = fake_dataset(cross_antimeridian=True, shape=(500, 600))
+    footprint = build_footprint(dataset)
+    raster = fake_ecmwf_0100_1h(to180=False, with_nan=True)
+
+    peak = peak_memory(map_raster, raster, dataset, footprint, True)
+
+    npoints = dataset["longitude"].size
+    assert peak < 128 * npoints
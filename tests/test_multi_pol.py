@@ -0,0 +1,101 @@
+"""
+Geolocation grids with a pol (or other non-spatial) dim: the mapping is
+computed once on the (line, sample) geometry and broadcast along pol.
+"""
+
+import numpy as np
+import pytest
+import xarray as xr
+from tools_test import build_footprint, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster import StageProfiler, iter_map_raster, map_raster, map_raster_batch
+from mapraster.main import _get_image_dims
+
+
+def with_pol(dataset, pols=("VV", "VH"), dim="pol"):
+    return dataset.expand_dims({dim: list(pols)}).transpose("line", "sample", dim)
+
+
+def assert_broadcast(out, expected, dim="pol"):
+    for var in expected:
+        assert out[var].dims == ("line", "sample", dim)
+        for i in range(out.sizes[dim]):
+            np.testing.assert_array_equal(
+                out[var].isel({dim: i}).values, expected[var].values
+            )
+
+
+@pytest.mark.parametrize("intermediate_grid", ["image", None])
+@pytest.mark.parametrize("cross_antimeridian", [False, True])
+def test_dual_pol(cross_antimeridian, intermediate_grid):
+    sar_dataset = fake_dataset(cross_antimeridian=cross_antimeridian)
+    footprint = build_footprint(sar_dataset)
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=True)
+    kwargs = dict(intermediate_grid=intermediate_grid)
+
+    expected = map_raster(raster, sar_dataset, footprint, **kwargs)
+    with StageProfiler() as profiler:
+        out = map_raster(raster, with_pol(sar_dataset), footprint, **kwargs)
+
+    assert_broadcast(out, expected)
+    assert list(out.pol.values) == ["VV", "VH"]
+    # computed once, on the (line, sample) geometry
+    (interp,) = [r for r in profiler.records if r["stage"] == "interp"]
+    assert interp["shape"] == (2, 50, 60)
+
+
+def test_dual_pol_other_entry_points():
+    sar_dataset = fake_dataset(shape=(120, 60))
+    footprint = build_footprint(sar_dataset)
+    raster = fake_ecmwf_0100_1h(to180=True)
+    dual = with_pol(sar_dataset)
+
+    expected = map_raster(raster, sar_dataset, footprint)
+    lazy = map_raster(raster, dual, footprint, chunks={"line": 50, "pol": 1})
+    assert lazy["U10"].chunks is not None
+    expected_lazy = map_raster(raster, sar_dataset, footprint, chunks={"line": 50})
+    assert_broadcast(lazy.compute(), expected_lazy.compute())
+
+    blocks = [block for _, block in iter_map_raster(raster, dual, burst_lines=50)]
+    streamed = xr.concat(blocks, "line")
+    reference = [b for _, b in iter_map_raster(raster, sar_dataset, burst_lines=50)]
+    assert_broadcast(streamed, xr.concat(reference, "line"))
+
+    (batched,) = map_raster_batch(raster, [(dual, footprint)])
+    (reference,) = map_raster_batch(raster, [(sar_dataset, footprint)])
+    assert_broadcast(batched, reference)
+    np.testing.assert_allclose(
+        batched["U10"].isel(pol=0).values, expected["U10"].values, atol=1e-4
+    )
+
+
+def test_pol_dependent_geolocation():
+    sar_dataset = fake_dataset()
+    footprint = build_footprint(sar_dataset)
+    raster = fake_ecmwf_0100_1h(to180=True)
+    shifted = sar_dataset.assign(longitude=sar_dataset.longitude + 0.05)
+    dual = xr.concat([sar_dataset, shifted], "pol").transpose("line", "sample", "pol")
+
+    # not the same geolocation: mapped on the whole (line, sample, pol) grid
+    out = map_raster(raster, dual, footprint)
+    for i, dataset in enumerate((sar_dataset, shifted)):
+        expected = map_raster(raster, dataset, footprint)
+        np.testing.assert_allclose(
+            out["U10"].isel(pol=i).values, expected["U10"].values, atol=1e-4
+        )
+        np.testing.assert_allclose(
+            out["V10"].isel(pol=i).values, expected["V10"].values, atol=1e-4
+        )
+
+
+def test_other_non_spatial_dim():
+    sar_dataset = fake_dataset()
+    footprint = build_footprint(sar_dataset)
+    raster = fake_ecmwf_0100_1h(to180=True)
+    multi = with_pol(sar_dataset, pols=("a", "b", "c"), dim="beam")
+    assert _get_image_dims(multi) == ("line", "sample")
+
+    out = map_raster(raster, multi, footprint)
+    assert_broadcast(out, map_raster(raster, sar_dataset, footprint), dim="beam")
+    # broadcast, not copied
+    assert out["U10"].values.strides[-1] == 0
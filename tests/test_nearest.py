@@ -0,0 +1,201 @@
+"""
+Integer / categorical variables: taken from the nearest raster pixel, with
+no spline and no cast, so that class codes survive the mapping.
+"""
+
+import numpy as np
+import pytest
+import xarray as xr
+from tools_test import build_footprint, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster import (
+    GeometryPlan,
+    NearestPlan,
+    PlanCache,
+    StageProfiler,
+    iter_map_raster,
+    map_raster,
+    map_raster_batch,
+)
+from mapraster.main import _variable_methods
+
+
+def expected_nearest(raster, dataset, cross_antimeridian):
+    """Reference: xarray nearest selection on the raster, in [0, 360) if needed."""
+    lon = dataset["longitude"]
+    if cross_antimeridian:
+        raster = raster.assign_coords(x=raster.x % 360).sortby("x")
+        lon = lon % 360
+    return raster.sel(x=lon, y=dataset["latitude"], method="nearest")
+
+
+def test_nearest_plan():
+    x = np.arange(5.0)
+    y = np.arange(4.0) * 2
+    values = np.arange(20, dtype="int32").reshape(4, 5)
+    target_x = np.array([[0.4, 0.6, 4.4], [2.0, 3.49, -0.6]])
+    target_y = np.array([[0.0, 2.9, 6.0], [3.1, 7.0, 0.0]])
+    plan = NearestPlan(x, y, target_x, target_y)
+
+    out = plan.apply(values, fill_value=-1)
+    assert out.dtype == values.dtype
+    # last point off the grid by more than half a pixel
+    np.testing.assert_array_equal(out, [[0, 6, 19], [12, 18, -1]])
+    # no default code for integers
+    with pytest.raises(ValueError, match="fill_value required"):
+        plan.apply(values)
+    np.testing.assert_array_equal(plan.apply(values.astype("f4"))[1, 2], np.nan)
+
+    # extra dims in front, and round trip through arrays
+    stacked = np.stack([values, -values])
+    restored = NearestPlan.from_arrays(plan.to_arrays())
+    np.testing.assert_array_equal(
+        restored.apply(stacked, fill_value=0), plan.apply(stacked, fill_value=0)
+    )
+    assert restored.apply(stacked, fill_value=0).shape == (2, 2, 3)
+
+    with pytest.raises(ValueError, match="grid shape"):
+        plan.apply(values[:, :4])
+
+
+def test_variable_methods():
+    raster = fake_ecmwf_0100_1h(with_classes=True)
+    assert _variable_methods(raster) == dict(
+        U10="cubic", V10="cubic", CLASS="nearest", LAND="nearest"
+    )
+    assert set(_variable_methods(raster, "nearest").values()) == {"nearest"}
+    methods = _variable_methods(raster, {"U10": "nearest", "LAND": "cubic"})
+    assert methods == dict(U10="nearest", V10="cubic", CLASS="nearest", LAND="cubic")
+    with pytest.raises(ValueError, match="method must be"):
+        _variable_methods(raster, "linear")
+    with pytest.raises(ValueError, match="unknown variables"):
+        _variable_methods(raster, {"SST": "nearest"})
+
+
+@pytest.mark.parametrize("intermediate_grid", ["image", None])
+@pytest.mark.parametrize("cross_antimeridian", [False, True])
+def test_classes_keep_codes(cross_antimeridian, intermediate_grid):
+    sar_dataset = fake_dataset(cross_antimeridian=cross_antimeridian)
+    footprint = build_footprint(sar_dataset)
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=True, with_classes=True)
+
+    with StageProfiler() as profiler:
+        out = map_raster(
+            raster, sar_dataset, footprint, intermediate_grid=intermediate_grid
+        )
+
+    expected = expected_nearest(raster, sar_dataset, cross_antimeridian)
+    for var in ("CLASS", "LAND"):
+        assert out[var].dtype == raster[var].dtype
+        np.testing.assert_array_equal(out[var].values, expected[var].values)
+    assert set(np.unique(out["CLASS"])) <= set(range(11))
+
+    # float variables still go through the spline, unchanged
+    floats = map_raster(
+        raster[["U10", "V10"]],
+        sar_dataset,
+        footprint,
+        intermediate_grid=intermediate_grid,
+    )
+    for var in ("U10", "V10"):
+        np.testing.assert_array_equal(out[var].values, floats[var].values)
+
+    (nearest,) = [r for r in profiler.records if r["stage"] == "nearest"]
+    assert nearest["variables"] == ("CLASS", "LAND")
+    fitted = [r for r in profiler.records if r["stage"] == "fit"]
+    assert all("CLASS" not in r["variables"] for r in fitted)
+
+
+def test_only_classes_skip_spline():
+    sar_dataset = fake_dataset()
+    footprint = build_footprint(sar_dataset)
+    raster = fake_ecmwf_0100_1h(with_classes=True)[["CLASS", "LAND"]]
+
+    cache = PlanCache()
+    with StageProfiler() as profiler:
+        out = map_raster(raster, sar_dataset, footprint, plan_cache=cache)
+        again = map_raster(raster, sar_dataset, footprint, plan_cache=cache)
+    stages = {r["stage"] for r in profiler.records}
+    assert not stages & {"fit", "evaluate", "interp"}
+    assert cache.info()["hits"] == 1
+    xr.testing.assert_identical(out, again)
+
+    (key,) = cache._plans
+    geometry = cache.get(key)
+    assert geometry.mapping is None
+    restored = GeometryPlan.from_arrays(geometry.to_arrays())
+    assert restored.mapping is None
+    np.testing.assert_array_equal(restored.nearest.indices, geometry.nearest.indices)
+
+
+def test_method_option():
+    sar_dataset = fake_dataset()
+    footprint = build_footprint(sar_dataset)
+    raster = fake_ecmwf_0100_1h(with_classes=True)
+    expected = expected_nearest(raster, sar_dataset, False)
+
+    # floats taken from the nearest pixel too, in their own dtype
+    out = map_raster(raster, sar_dataset, footprint, method="nearest", dtype="f4")
+    for var in raster:
+        assert out[var].dtype == raster[var].dtype
+        np.testing.assert_array_equal(out[var].values, expected[var].values)
+
+    # integers interpolated on request, as floats
+    out = map_raster(raster, sar_dataset, footprint, method={"LAND": "cubic"})
+    assert out["LAND"].dtype == np.float64
+    assert out["CLASS"].dtype == np.int16
+
+
+def test_nodata_fill():
+    # image partly off a regional raster
+    sar_dataset = fake_dataset()
+    footprint = build_footprint(sar_dataset)
+    raster = fake_ecmwf_0100_1h(with_classes=True)
+    raster = raster.sel(x=slice(-40, -20), y=slice(-30, -27))
+    raster["CLASS"] = raster["CLASS"].rio.write_nodata(255)
+
+    # 0 is a valid land/sea code
+    with pytest.raises(ValueError, match="'LAND' has no nodata"):
+        map_raster(raster, sar_dataset, footprint)
+    raster["LAND"] = raster["LAND"].rio.write_nodata(2)
+
+    out = map_raster(raster, sar_dataset, footprint, method={"U10": "nearest"})
+    # beyond half a pixel of the raster edges
+    lon, lat = sar_dataset["longitude"].values, sar_dataset["latitude"].values
+    x, y = raster.x.values, raster.y.values
+    off = (lat > 1.5 * y[-1] - 0.5 * y[-2]) | (lon > 1.5 * x[-1] - 0.5 * x[-2])
+    assert off.any() and not off.all()
+    assert (out["CLASS"].values[off] == 255).all()
+    assert (out["LAND"].values[off] == 2).all()
+    assert out["CLASS"].attrs["_FillValue"] == 255
+    assert out["LAND"].attrs["_FillValue"] == 2
+    assert "_FillValue" not in out["U10"].attrs
+    assert np.isnan(out["U10"].values[off]).all()
+    assert not np.isnan(out["U10"].values[~off]).any()
+
+
+def test_other_entry_points():
+    sar_dataset = fake_dataset(shape=(120, 60))
+    footprint = build_footprint(sar_dataset)
+    raster = fake_ecmwf_0100_1h(with_classes=True)
+    expected = map_raster(raster, sar_dataset, footprint)
+
+    lazy = map_raster(raster, sar_dataset, footprint, chunks={"line": 50})
+    assert lazy["CLASS"].dtype == np.int16
+    assert lazy["CLASS"].chunks is not None
+    np.testing.assert_array_equal(lazy["CLASS"].values, expected["CLASS"].values)
+    np.testing.assert_array_equal(lazy["LAND"].values, expected["LAND"].values)
+
+    blocks = [
+        block for _, block in iter_map_raster(raster, sar_dataset, burst_lines=50)
+    ]
+    streamed = xr.concat(blocks, "line")
+    np.testing.assert_array_equal(streamed["CLASS"].values, expected["CLASS"].values)
+
+    for n_processes in (None, 1):
+        (batch,) = map_raster_batch(
+            raster, [(sar_dataset, footprint)], n_processes=n_processes
+        )
+        assert batch["CLASS"].dtype == np.int16
+        for var in ("CLASS", "LAND"):
+            np.testing.assert_array_equal(batch[var].values, expected[var].values)
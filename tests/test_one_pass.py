@@ -0,0 +1,71 @@
+"""
+One-pass mapping (``intermediate_grid=None``) on the 4 cases of
+test_map_raster_4cases: with/without antimeridian crossing, with/without NaN.
+
+The spline is evaluated directly at the image points, so without NaN the
+result is the analytic field up to the spline error, and with NaN the masked
+points are about the ones a bilinear interpolation of the raster would mask.
+"""
+
+import numpy as np
+import pytest
+from scipy.interpolate import RectBivariateSpline
+from tools_test import CASES, fake_case
+
+from mapraster import SplinePlan
+from mapraster.main import _spline_coefficients, map_raster
+
+
+@pytest.mark.parametrize("cross_antimeridian, with_nan", CASES)
+def test_one_pass_4cases(cross_antimeridian, with_nan):
+    sar_dataset, raster, footprint = fake_case(cross_antimeridian, with_nan)
+
+    one_pass = map_raster(
+        raster, sar_dataset, footprint, cross_antimeridian, intermediate_grid=None
+    )
+    two_pass = map_raster(raster, sar_dataset, footprint, cross_antimeridian)
+
+    assert set(one_pass.data_vars) == {"U10", "V10"}
+    assert one_pass["U10"].shape == sar_dataset["longitude"].shape
+    assert not np.all(np.isnan(one_pass["U10"].values))
+
+    target_lon = sar_dataset["longitude"]
+    if cross_antimeridian:
+        target_lon = target_lon % 360
+    bilinear = raster.interp(x=target_lon, y=sar_dataset["latitude"])
+
+    lat = np.deg2rad(sar_dataset["latitude"].values)
+    lon = np.deg2rad(sar_dataset["longitude"].values)
+    expected = {"U10": 5 + 2 * np.cos(lat), "V10": 2 * np.sin(lon)}
+    # NaN inpainting slightly perturbs the spline next to the holes
+    atol = 1e-4 if with_nan and cross_antimeridian else 1e-10
+    for name, field in expected.items():
+        values = one_pass[name].values
+        valid = ~np.isnan(values)
+        np.testing.assert_allclose(values[valid], field[valid], atol=atol)
+        # NaN where a bilinear interpolation of the raster has NaN (up to
+        # the choice of cell for targets lying exactly on raster nodes)
+        nan_ratio = np.isnan(bilinear[name].values).mean()
+        assert abs((~valid).mean() - nan_ratio) < 0.05
+        # the two-pass mapping adds the bilinear error of the intermediate grid
+        reference = two_pass[name].values
+        both = valid & ~np.isnan(reference)
+        np.testing.assert_allclose(values[both], reference[both], atol=1e-4)
+
+    if with_nan and cross_antimeridian:
+        assert np.isnan(one_pass["U10"].values).any()
+
+
+def test_spline_plan_matches_rectbivariatespline():
+    rng = np.random.default_rng(0)
+    x = np.sort(np.r_[0, 10, rng.uniform(0, 10, 18)])
+    y = np.sort(np.r_[0, 5, rng.uniform(0, 5, 12)])
+    values = rng.normal(size=(y.size, x.size))
+    tx = rng.uniform(0, 10, (7, 11))
+    ty = rng.uniform(0, 5, (7, 11))
+
+    coeffs, _, _ = _spline_coefficients(y, x, values)
+    expected = RectBivariateSpline(y, x, values, s=0).ev(ty, tx)
+    for chunk_size in (None, 1, 10, 1000):
+        plan = SplinePlan(x, y, tx, ty, chunk_size=chunk_size)
+        np.testing.assert_allclose(plan.apply(coeffs), expected, atol=1e-10)
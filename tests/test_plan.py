@@ -0,0 +1,48 @@
+import numpy as np
+import xarray as xr
+from tools_test import fake_dataset
+
+from mapraster.plan import MappingPlan
+
+
+def test_plan_matches_xarray_interp():
+    """
+    MappingPlan must reproduce xarray bilinear interpolation, NaN included.
+    """
+    dataset = fake_dataset(cross_antimeridian=False)
+    target_lon = dataset["longitude"]
+    target_lat = dataset["latitude"]
+
+    lons = np.linspace(-45, -10, 80)
+    lats = np.linspace(-32, -24, 70)
+    LON, LAT = np.meshgrid(lons, lats)
+    fields = np.stack([np.cos(np.deg2rad(LAT)) * LON, np.sin(np.deg2rad(LON)) * LAT])
+    fields[1, 10:20, 30:40] = np.nan
+
+    plan = MappingPlan(lons, lats, target_lon.values, target_lat.values)
+    mapped = plan.apply(fields)
+
+    assert mapped.shape == (2,) + target_lon.shape
+    for k in range(2):
+        da = xr.DataArray(fields[k], dims=("y", "x"), coords={"x": lons, "y": lats})
+        expected = da.interp(x=target_lon, y=target_lat).values
+        np.testing.assert_allclose(mapped[k], expected, rtol=1e-12, equal_nan=True)
+
+
+def test_plan_outside_is_nan():
+    plan = MappingPlan([0.0, 1.0, 2.0], [0.0, 1.0], [-0.5, 0.5, 2.5], [0.5, 0.5, 0.5])
+    out = plan.apply(np.arange(6.0).reshape(2, 3))
+
+    assert np.isnan(out[0]) and np.isnan(out[2])
+    assert out[1] == 2.0
+
+
+def test_plan_out_dtype():
+    plan = MappingPlan([0.0, 1.0, 2.0], [0.0, 1.0], [-0.5, 0.5, 1.5], [0.5, 0.5, 0.5])
+    values = np.arange(6.0).reshape(2, 3)
+    out = np.empty(3, dtype=np.float32)
+    assert plan.apply(values, out=out) is out
+
+    expected = plan.apply(values)
+    assert expected.dtype == np.float64
+    np.testing.assert_allclose(out, expected, rtol=1e-7)
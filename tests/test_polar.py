@@ -0,0 +1,84 @@
+"""
+Polar footprints, mapped through a polar stereographic intermediate grid:
+around the North Pole, the South Pole and at 76°N.
+"""
+
+import numpy as np
+import pytest
+from shapely.geometry import box
+from tools_test import build_footprint, fake_ecmwf_0100_1h, fake_polar_dataset
+
+from mapraster.cache import PlanCache
+from mapraster.main import _polar_hemisphere, map_raster
+
+CASES = [
+    pytest.param(True, False, id="north_pole"),
+    pytest.param(True, True, id="south_pole"),
+    pytest.param(False, False, id="76N"),
+]
+
+
+def _expected(dataset):
+    lat = np.deg2rad(dataset["latitude"].values)
+    lon = np.deg2rad(dataset["longitude"].values)
+    return {"U10": 5 + 2 * np.cos(lat), "V10": 2 * np.sin(lon)}
+
+
+@pytest.mark.parametrize("contains_pole, south", CASES)
+@pytest.mark.parametrize("intermediate_grid", ["image", "adaptive", None])
+def test_polar_footprint(contains_pole, south, intermediate_grid):
+    dataset = fake_polar_dataset(
+        shape=(100, 120), contains_pole=contains_pole, south=south
+    )
+    footprint = build_footprint(dataset)
+    assert _polar_hemisphere(footprint) == (-1 if south else 1)
+    raster = fake_ecmwf_0100_1h(to180=True)
+
+    out = map_raster(raster, dataset, footprint, intermediate_grid=intermediate_grid)
+
+    lat = dataset["latitude"].values
+    for name, field in _expected(dataset).items():
+        values = out[name].values
+        assert not np.isnan(values).any()
+        if intermediate_grid is None:
+            np.testing.assert_allclose(values, field, atol=1e-10)
+        else:
+            # sin(lon) turns around the pole faster than the grid resolves it
+            valid = np.abs(lat) < 88 if name == "V10" else slice(None)
+            np.testing.assert_allclose(values[valid], field[valid], atol=1e-3)
+
+
+def test_polar_detection():
+    # high latitudes, but a narrow longitude span: lon/lat is fine
+    assert _polar_hemisphere(box(10, 71, 20, 72)) is None
+    assert _polar_hemisphere(box(170, -79, 195, -77)) is None
+    # the bbox of the corners degenerates
+    assert _polar_hemisphere(box(-40, 80, 0, 82)) == 1
+    assert _polar_hemisphere(box(160, -84, 200, -83)) == -1
+    assert _polar_hemisphere(box(10, 71, 20, 72), polar=True) == 1
+
+
+def test_lonlat_bbox_misses_polar_cap():
+    dataset = fake_polar_dataset()
+    footprint = build_footprint(dataset)
+    raster = fake_ecmwf_0100_1h(to180=True)
+
+    # the lon/lat bbox of the footprint corners stops short of the pole
+    out = map_raster(raster, dataset, footprint, polar=False)
+    assert np.isnan(out["U10"].values).mean() > 0.5
+
+    out = map_raster(raster, dataset, footprint)
+    assert not np.isnan(out["U10"].values).any()
+
+
+def test_polar_plan_cache(tmp_path):
+    dataset = fake_polar_dataset()
+    footprint = build_footprint(dataset)
+    raster = fake_ecmwf_0100_1h(to180=True)
+    expected = map_raster(raster, dataset, footprint)
+
+    map_raster(raster, dataset, footprint, plan_cache=PlanCache(directory=tmp_path))
+    cache = PlanCache(directory=tmp_path)
+    out = map_raster(raster, dataset, footprint, plan_cache=cache)
+    assert cache.info()["disk_hits"] == 1
+    np.testing.assert_array_equal(out["U10"].values, expected["U10"].values)
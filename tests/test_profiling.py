@@ -0,0 +1,107 @@
+import logging
+import tracemalloc
+
+import numpy as np
+import pytest
+from tools_test import (
+    build_footprint,
+    fake_dataset,
+    fake_ecmwf_0100_1h,
+    fake_projected_raster,
+)
+
+from mapraster import StageProfiler, iter_map_raster, map_raster
+from mapraster.profiling import _NULL_STAGE, _stage
+
+
+def stages(profiler):
+    return [record["stage"] for record in profiler.records]
+
+
+@pytest.mark.parametrize("intermediate_grid", ["image", None])
+def test_profiler_stages(intermediate_grid):
+    sar_dataset = fake_dataset(cross_antimeridian=True)
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=True)
+    footprint = build_footprint(sar_dataset)
+    kwargs = dict(intermediate_grid=intermediate_grid)
+
+    expected = map_raster(raster, sar_dataset, footprint, **kwargs)
+    with StageProfiler() as profiler:
+        out = map_raster(raster, sar_dataset, footprint, **kwargs)
+    np.testing.assert_array_equal(out["U10"].values, expected["U10"].values)
+
+    evaluate = ["evaluate"] if intermediate_grid else []
+    assert stages(profiler) == [
+        "read_window",
+        "geometry",
+        "crop",
+        "fit",
+        *evaluate,
+        "interp",
+        "to_dataset",
+    ]
+    records = {record["stage"]: record for record in profiler.records}
+    assert all(record["time"] >= 0 for record in profiler.records)
+    assert records["geometry"]["cached"] is False
+    # the footprint overlaps the NaN zone of both variables
+    assert records["fit"]["nan_variables"] == ("U10", "V10")
+    assert records["interp"]["shape"] == (2, 50, 60)
+    assert records["interp"]["method"] == ("bilinear" if evaluate else "spline")
+    assert "peak_bytes" not in records["fit"]
+
+
+def test_profiler_projected():
+    sar_dataset = fake_dataset()
+    footprint = build_footprint(sar_dataset)
+    raster = fake_projected_raster("EPSG:3857")
+
+    with StageProfiler() as profiler:
+        map_raster(raster, sar_dataset, footprint)
+    assert stages(profiler)[:3] == ["read_window", "reproject", "flip"]
+    assert profiler.records[3]["stage"] == "geometry"
+    assert profiler.records[4]["stage"] == "crop"
+    assert profiler.records[5]["nan_variables"] == ()
+
+    with StageProfiler() as profiler:
+        map_raster(raster, sar_dataset, footprint, native_crs=True)
+    assert stages(profiler)[:3] == ["read_window", "transform", "flip"]
+
+
+def test_profiler_memory_callback_and_logging(caplog):
+    sar_dataset = fake_dataset()
+    raster = fake_ecmwf_0100_1h(to180=True)
+    received = []
+
+    with caplog.at_level(logging.INFO, logger="mapraster"):
+        with StageProfiler(
+            callback=received.append, memory=True, logger="mapraster"
+        ) as profiler:
+            with StageProfiler() as inner:
+                blocks = list(iter_map_raster(raster, sar_dataset, burst_lines=20))
+    assert not tracemalloc.is_tracing()
+    assert len(blocks) == 3
+
+    assert received == profiler.records
+    assert stages(inner) == stages(profiler)
+    assert all("peak_bytes" in record for record in profiler.records)
+    assert any(record.getMessage().startswith("stage fit") for record in caplog.records)
+
+    summary = profiler.summary()
+    assert list(summary)[0] == "read_window"
+    assert summary["fit"]["calls"] == 3
+    assert summary["interp"]["peak_bytes"] > 0
+
+
+def test_profiler_disabled():
+    assert _stage("fit", shape=(2, 3)) is _NULL_STAGE
+    with StageProfiler() as profiler:
+        with _stage("fit", shape=(2, 3)) as stage:
+            stage.update(nan_variables=())
+    assert profiler.records[0]["shape"] == (2, 3)
+    assert profiler.records[0]["nan_variables"] == ()
+    assert _stage("fit") is _NULL_STAGE
+
+    with pytest.raises(RuntimeError, match="already active"):
+        with profiler:
+            with profiler:
+                pass
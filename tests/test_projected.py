@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from tools_test import build_footprint, fake_dataset, fake_projected_raster
+
+from mapraster.main import map_raster
+
+
+def test_projected_raster_clipped_before_reprojection():
+    dataset = fake_dataset(cross_antimeridian=False)
+    footprint = build_footprint(dataset)
+    raster = fake_projected_raster("EPSG:3857")
+
+    out = map_raster(raster, dataset, footprint)
+
+    # same as reprojecting the whole raster first
+    full = map_raster(raster.rio.reproject(4326), dataset, footprint)
+    for var in ("U10", "V10"):
+        np.testing.assert_allclose(out[var].values, full[var].values, atol=2e-3)
+
+    # and close to the analytic fields
+    lat = np.deg2rad(dataset["latitude"].values)
+    lon = np.deg2rad(dataset["longitude"].values)
+    np.testing.assert_allclose(out["U10"].values, 5 + 2 * np.cos(lat), atol=1e-3)
+    np.testing.assert_allclose(out["V10"].values, 2 * np.sin(lon), atol=1e-3)
+
+
+def test_projected_raster_across_antimeridian():
+    dataset = fake_dataset(cross_antimeridian=True)
+    footprint = build_footprint(dataset)
+    raster = fake_projected_raster("EPSG:3832", cross_antimeridian=True)
+
+    out = map_raster(raster, dataset, footprint, native_crs=False)
+
+    # reprojected window contiguous across the antimeridian
+    lat = np.deg2rad(dataset["latitude"].values)
+    lon = np.deg2rad(dataset["longitude"].values)
+    assert not np.isnan(out["V10"].values).any()
+    np.testing.assert_allclose(out["U10"].values, 5 + 2 * np.cos(lat), atol=1e-3)
+    np.testing.assert_allclose(out["V10"].values, 2 * np.sin(lon), atol=1e-3)
+
+
+@pytest.mark.parametrize(
+    "crs, cross_antimeridian",
+    [("EPSG:3857", False), ("EPSG:3031", False), ("EPSG:3832", True)],
+)
+def test_native_crs_mode(crs, cross_antimeridian):
+    """
+    Interpolating on the native x/y axes avoids the reprojection error.
+    """
+    dataset = fake_dataset(cross_antimeridian=cross_antimeridian)
+    footprint = build_footprint(dataset)
+    raster = fake_projected_raster(crs, cross_antimeridian=cross_antimeridian)
+
+    out = map_raster(raster, dataset, footprint, native_crs=True)
+
+    lat = np.deg2rad(dataset["latitude"].values)
+    lon = np.deg2rad(dataset["longitude"].values)
+    np.testing.assert_allclose(out["U10"].values, 5 + 2 * np.cos(lat), atol=1e-4)
+    np.testing.assert_allclose(out["V10"].values, 2 * np.sin(lon), atol=1e-4)
@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+import xarray as xr
+from tools_test import (
+    CASES,
+    build_footprint,
+    fake_case,
+    fake_dataset,
+    fake_ecmwf_0100_1h,
+)
+
+from mapraster import SplineCache
+from mapraster.main import _array_token, _raster_identity, map_raster
+
+
+@pytest.mark.parametrize("intermediate_grid", ["image", None])
+@pytest.mark.parametrize("cross_antimeridian, with_nan", CASES)
+def test_spline_cache_4cases(cross_antimeridian, with_nan, intermediate_grid):
+    sar_dataset, raster, footprint = fake_case(cross_antimeridian, with_nan)
+    kwargs = dict(
+        cross_antimeridian=cross_antimeridian, intermediate_grid=intermediate_grid
+    )
+
+    reference = map_raster(raster, sar_dataset, footprint, **kwargs)
+    cache = SplineCache(tile_size=16, halo=12)
+    first = map_raster(raster, sar_dataset, footprint, spline_cache=cache, **kwargs)
+    assert cache.misses > 0 and cache.hits == 0
+    second = map_raster(raster, sar_dataset, footprint, spline_cache=cache, **kwargs)
+    assert cache.hits == cache.misses
+
+    # NaN inpainting is done per fitted region, not on the whole window
+    atol = 1e-4 if with_nan else 1e-8
+    for var in reference:
+        expected = reference[var].values
+        np.testing.assert_array_equal(np.isnan(first[var].values), np.isnan(expected))
+        np.testing.assert_allclose(first[var].values, expected, atol=atol)
+        np.testing.assert_array_equal(second[var].values, first[var].values)
+
+
+def test_spline_cache_eviction():
+    cache = SplineCache(max_bytes=3 * 800, tile_size=10, halo=2)
+    for i in range(5):
+        cache.put(("U10", 0, i, "raster"), np.zeros(100))
+    assert len(cache) == 3
+    assert cache.nbytes == 3 * 800
+    assert ("U10", 0, 0, "raster") not in cache
+    assert cache.get(("U10", 0, 4, "raster")) is not None
+
+    # larger than the whole cache: not stored
+    cache.put("big", np.zeros(1000))
+    assert "big" not in cache
+    assert cache.info()["hit_rate"] == 1.0
+
+
+def test_spline_cache_file(tmp_path):
+    sar_dataset = fake_dataset()
+    footprint = build_footprint(sar_dataset)
+    path = tmp_path / "raster.nc"
+    raster = fake_ecmwf_0100_1h(to180=True)
+    raster.attrs = {}
+    raster.to_netcdf(path)
+
+    identity = _raster_identity(str(path))
+    assert identity.startswith(str(path))
+    # opened without dask: identified by value
+    with xr.open_dataset(path) as lazy:
+        assert _raster_identity(lazy) is None
+
+    cache = SplineCache(tile_size=16, halo=12)
+    first = map_raster(str(path), sar_dataset, footprint, spline_cache=cache)
+    assert all(key[-1] == identity for key in cache._tiles)
+    second = map_raster(str(path), sar_dataset, footprint, spline_cache=cache)
+    assert cache.hits == cache.misses
+    np.testing.assert_array_equal(second["U10"].values, first["U10"].values)
+
+
+def test_spline_cache_in_memory():
+    sar_dataset = fake_dataset()
+    footprint = build_footprint(sar_dataset)
+    raster = fake_ecmwf_0100_1h(to180=True)
+
+    # arrays identified without reading their values
+    identity = _raster_identity(raster)
+    assert identity == _raster_identity(raster)
+    assert _raster_identity(raster.copy(deep=True)) != identity
+    assert _raster_identity(raster.assign_coords(y=raster.y + 1)) != identity
+    chunked = raster.chunk({"x": 100})
+    assert _raster_identity(chunked) == _raster_identity(chunked) != identity
+
+    cache = SplineCache(tile_size=16, halo=12)
+    first = map_raster(raster, sar_dataset, footprint, spline_cache=cache)
+    assert all(key[-1] == identity for key in cache._tiles)
+    map_raster(raster, sar_dataset, footprint, spline_cache=cache)
+    assert cache.hits == cache.misses
+
+    # new arrays, even at the address of freed ones, are new rasters
+    values = np.zeros(1000)
+    token = _array_token(values)
+    assert _array_token(values[1:]) != token
+    del values
+    assert _array_token(np.zeros(1000)) != token
+    for _ in range(3):
+        doubled = raster.copy(deep=True)
+        doubled["U10"] = doubled["U10"] * 2
+        out = map_raster(doubled, sar_dataset, footprint, spline_cache=cache)
+        np.testing.assert_allclose(
+            out["U10"].values, 2 * first["U10"].values, rtol=1e-12
+        )
+        del doubled
+
+
+def test_spline_cache_irregular_raster():
+    sar_dataset = fake_dataset()
+    footprint = build_footprint(sar_dataset)
+    raster = fake_ecmwf_0100_1h(to180=True)
+    # irregular latitudes: tiles can't be anchored, the window is fitted whole
+    y = raster.y.values.copy()
+    y[1::2] += 0.01
+    raster = raster.assign_coords(y=y)
+
+    cache = SplineCache(tile_size=16, halo=12)
+    cached = map_raster(raster, sar_dataset, footprint, spline_cache=cache)
+    assert len(cache) == 0
+    expected = map_raster(raster, sar_dataset, footprint)
+    np.testing.assert_array_equal(cached["U10"].values, expected["U10"].values)
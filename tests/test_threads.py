@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from tools_test import build_footprint, fake_case, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster import MappingPlan, SplinePlan
+from mapraster.main import map_raster
+
+
+@pytest.mark.parametrize("intermediate_grid", ["image", None])
+@pytest.mark.parametrize("with_nan", [False, True])
+@pytest.mark.parametrize("cross_antimeridian", [False, True])
+def test_threads_identical_to_serial(cross_antimeridian, with_nan, intermediate_grid):
+    # enough image points for several tiles
+    dataset, raster, footprint = fake_case(
+        cross_antimeridian, with_nan, shape=(300, 400)
+    )
+    raster["W10"] = np.hypot(raster["U10"], raster["V10"])
+
+    kwargs = dict(
+        cross_antimeridian=cross_antimeridian, intermediate_grid=intermediate_grid
+    )
+    serial = map_raster(raster, dataset, footprint, **kwargs)
+    threaded = map_raster(raster, dataset, footprint, n_workers=4, **kwargs)
+
+    for var in serial:
+        np.testing.assert_array_equal(threaded[var].values, serial[var].values)
+
+
+def test_shared_executor():
+    dataset = fake_dataset(cross_antimeridian=False)
+    footprint = build_footprint(dataset)
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=False)
+    serial = map_raster(raster, dataset, footprint)
+
+    with ThreadPoolExecutor(2) as executor:
+        for _ in range(2):
+            out = map_raster(raster, dataset, footprint, executor=executor)
+            np.testing.assert_array_equal(out["U10"].values, serial["U10"].values)
+
+
+@pytest.mark.parametrize("plan_class", [MappingPlan, SplinePlan])
+def test_plan_apply_tiles(plan_class):
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 10, 12)
+    y = np.linspace(0, 5, 9)
+    tx = rng.uniform(-1, 11, (400, 500))
+    ty = rng.uniform(-1, 6, (400, 500))
+    values = rng.normal(size=(3, y.size, x.size))
+
+    plan = plan_class(x, y, tx, ty)
+    with ThreadPoolExecutor(3) as executor:
+        threaded = plan.apply(values, executor=executor)
+    np.testing.assert_array_equal(threaded, plan.apply(values))
@@ -0,0 +1,32 @@
+import numpy as np
+import xarray as xr
+from tools_test import build_footprint, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster.main import map_raster
+
+
+def test_map_raster_time_stack():
+    """
+    A (time, y, x) raster is mapped in one call, each step matching the 2D call.
+    """
+    dataset = fake_dataset(cross_antimeridian=False)
+    footprint = build_footprint(dataset)
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=False)
+
+    time = xr.DataArray(np.arange(3), dims="time", coords={"time": np.arange(3)})
+    cube = (raster * (1 + time)).rio.write_crs("EPSG:4326")
+    # a static field without time dim alongside
+    cube["mask"] = raster["U10"] > 6
+
+    out = map_raster(cube, dataset, footprint)
+
+    assert out["U10"].dims == ("time", "line", "sample")
+    assert out["mask"].dims == ("line", "sample")
+    np.testing.assert_array_equal(out["time"].values, np.arange(3))
+
+    for k in range(3):
+        ref = map_raster(cube.isel(time=k), dataset, footprint)
+        for var in ("U10", "V10"):
+            np.testing.assert_allclose(
+                out[var].isel(time=k).values, ref[var].values, rtol=1e-10
+            )
@@ -0,0 +1,230 @@
+"""
+Vector mode: (u, v) pairs mapped with shared weights and rotated in the same
+pass into the geographic frame (projected rasters) or the image (range,
+azimuth) frame.
+"""
+
+import numpy as np
+import pytest
+import xarray as xr
+from pyproj import Transformer
+from tools_test import (
+    build_footprint,
+    fake_dataset,
+    fake_ecmwf_0100_1h,
+    fake_projected_raster,
+)
+
+from mapraster import (
+    GeometryPlan,
+    PlanCache,
+    StageProfiler,
+    iter_map_raster,
+    map_raster,
+    map_raster_batch,
+)
+from mapraster.main import _grid_north, _rotate_vectors
+
+VECTORS = [("U10", "V10")]
+
+
+def with_heading(dataset):
+    """Image with a ground heading varying along both image axes."""
+    line, sample = xr.broadcast(dataset.line, dataset.sample)
+    dataset = dataset.copy()
+    dataset["ground_heading"] = -170 + 0.3 * line + 0.1 * sample
+    return dataset
+
+
+def rotate(u, v, angle):
+    return u * np.cos(angle) - v * np.sin(angle), u * np.sin(angle) + v * np.cos(angle)
+
+
+@pytest.mark.parametrize("dtype", ["f8", "f4"])
+def test_rotate_vectors(dtype):
+    rng = np.random.default_rng(0)
+    angle = rng.uniform(-np.pi, np.pi, (7, 9))
+    u = rng.normal(size=(2, 7, 9)).astype(dtype)
+    v = rng.normal(size=(2, 7, 9)).astype(dtype)
+    mapped = dict(u=u.copy(), v=v.copy())
+
+    _rotate_vectors(mapped, [("u", "v")], angle, block_size=10)
+
+    expected = rotate(u.astype("f8"), v.astype("f8"), angle)
+    for var, values in zip("uv", expected):
+        assert mapped[var].dtype == dtype
+        np.testing.assert_allclose(mapped[var], values, atol=1e-6)
+    # a quarter turn: x towards y
+    mapped = dict(u=np.ones((1, 1)), v=np.zeros((1, 1)))
+    _rotate_vectors(mapped, [("u", "v")], np.full((1, 1), np.pi / 2))
+    np.testing.assert_allclose([mapped["u"], mapped["v"]], [[[0]], [[1]]], atol=1e-15)
+
+
+def test_grid_north():
+    # polar stereographic south, central meridian 0: true north points away
+    # from the pole, +y at longitude 0 and +x at longitude 90
+    lon = np.array([0.0, 90.0, -30.0])
+    lat = np.full(3, -70.0)
+    angle = _grid_north("EPSG:3031", lon, lat)
+    np.testing.assert_allclose(np.rad2deg(angle), [0.0, 90.0, -30.0], atol=1e-6)
+    # conformal, cylindrical: no rotation
+    np.testing.assert_allclose(_grid_north("EPSG:3857", lon, lat), 0, atol=1e-9)
+
+
+def test_geographic_no_rotation():
+    sar_dataset = fake_dataset()
+    footprint = build_footprint(sar_dataset)
+    raster = fake_ecmwf_0100_1h(with_nan=True)
+
+    expected = map_raster(raster, sar_dataset, footprint)
+    with StageProfiler() as profiler:
+        out = map_raster(raster, sar_dataset, footprint, vectors=VECTORS)
+    xr.testing.assert_identical(out, expected)
+    assert "rotate" not in {r["stage"] for r in profiler.records}
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+@pytest.mark.parametrize("cross_antimeridian", [False, True])
+def test_heading(cross_antimeridian, dtype):
+    sar_dataset = with_heading(fake_dataset(cross_antimeridian=cross_antimeridian))
+    footprint = build_footprint(sar_dataset)
+    raster = fake_ecmwf_0100_1h(with_nan=True)
+    kwargs = dict(dtype=dtype)
+
+    geographic = map_raster(raster, sar_dataset, footprint, **kwargs)
+    with StageProfiler() as profiler:
+        out = map_raster(
+            raster,
+            sar_dataset,
+            footprint,
+            vectors=VECTORS,
+            heading="ground_heading",
+            **kwargs,
+        )
+
+    angle = np.deg2rad(sar_dataset["ground_heading"].values)
+    expected = rotate(geographic["U10"].values, geographic["V10"].values, angle)
+    for var, values in zip(("U10", "V10"), expected):
+        assert out[var].dtype == dtype
+        np.testing.assert_allclose(out[var].values, values, rtol=1e-6, atol=1e-6)
+        np.testing.assert_array_equal(np.isnan(out[var].values), np.isnan(values))
+    (rotation,) = [r for r in profiler.records if r["stage"] == "rotate"]
+    assert rotation["vectors"] == (("U10", "V10"),)
+
+
+def test_heading_frame():
+    # heading north: range is east; heading east: range is south
+    sar_dataset = fake_dataset()
+    footprint = build_footprint(sar_dataset)
+    raster = fake_ecmwf_0100_1h()
+    geographic = map_raster(raster, sar_dataset, footprint)
+
+    for heading, (range_, azimuth) in (
+        (0.0, (geographic["U10"], geographic["V10"])),
+        (90.0, (-geographic["V10"], geographic["U10"])),
+    ):
+        dataset = sar_dataset.assign(ground_heading=heading)
+        out = map_raster(
+            raster, dataset, footprint, vectors=VECTORS, heading="ground_heading"
+        )
+        np.testing.assert_allclose(out["U10"], range_, atol=1e-12)
+        np.testing.assert_allclose(out["V10"], azimuth, atol=1e-12)
+
+
+@pytest.mark.parametrize("native_crs", [False, True])
+def test_projected_grid_relative(native_crs):
+    # components along the x/y axes of a south polar stereographic grid
+    raster = fake_projected_raster("EPSG:3031", resolution=10000.0)
+    x, y = np.meshgrid(raster.x, raster.y)
+    lon, lat = Transformer.from_crs("EPSG:3031", "EPSG:4326", always_xy=True).transform(
+        x, y
+    )
+    u, v = rotate(
+        raster["U10"].values, raster["V10"].values, -_grid_north("EPSG:3031", lon, lat)
+    )
+    raster["U10"] = (("y", "x"), u)
+    raster["V10"] = (("y", "x"), v)
+
+    sar_dataset = fake_dataset()
+    footprint = build_footprint(sar_dataset)
+    expected = map_raster(fake_ecmwf_0100_1h(), sar_dataset, footprint)
+    kwargs = dict(native_crs=native_crs)
+
+    out = map_raster(raster, sar_dataset, footprint, vectors=VECTORS, **kwargs)
+    for var in VECTORS[0]:
+        # up to the resampling error of the reprojection
+        np.testing.assert_allclose(out[var].values, expected[var].values, atol=1e-2)
+
+    # about 30 degrees off without the rotation
+    grid = map_raster(raster, sar_dataset, footprint, **kwargs)
+    assert float(abs(grid["U10"] - expected["U10"]).max()) > 0.5
+
+    # the rotation is kept with the geometry plan, even one built without it
+    cache = PlanCache()
+    map_raster(raster, sar_dataset, footprint, plan_cache=cache, **kwargs)
+    cached = map_raster(
+        raster, sar_dataset, footprint, plan_cache=cache, vectors=VECTORS, **kwargs
+    )
+    xr.testing.assert_identical(cached, out)
+    (key,) = cache._plans
+    north = cache.get(key).north
+    assert north.shape == sar_dataset["longitude"].shape
+    restored = GeometryPlan.from_arrays(cache.get(key).to_arrays())
+    np.testing.assert_array_equal(restored.north, north)
+
+
+def test_other_entry_points():
+    sar_dataset = with_heading(fake_dataset(shape=(120, 60)))
+    footprint = build_footprint(sar_dataset)
+    raster = fake_ecmwf_0100_1h()
+    kwargs = dict(vectors=VECTORS, heading="ground_heading")
+    expected = map_raster(raster, sar_dataset, footprint, **kwargs)
+
+    lazy = map_raster(raster, sar_dataset, footprint, chunks={"line": 50}, **kwargs)
+    assert lazy["U10"].chunks is not None
+    expected_lazy = map_raster(raster, sar_dataset, footprint, chunks={"line": 50})
+    angle = np.deg2rad(sar_dataset["ground_heading"].values)
+    for var, values in zip(
+        VECTORS[0],
+        rotate(expected_lazy["U10"].values, expected_lazy["V10"].values, angle),
+    ):
+        np.testing.assert_allclose(lazy[var].values, values, atol=1e-12)
+
+    blocks = [
+        block
+        for _, block in iter_map_raster(raster, sar_dataset, burst_lines=50, **kwargs)
+    ]
+    streamed = xr.concat(blocks, "line")
+    plain = xr.concat(
+        [block for _, block in iter_map_raster(raster, sar_dataset, burst_lines=50)],
+        "line",
+    )
+    for var, values in zip(
+        VECTORS[0], rotate(plain["U10"].values, plain["V10"].values, angle)
+    ):
+        np.testing.assert_allclose(streamed[var].values, values, atol=1e-12)
+
+    (plain,) = map_raster_batch(raster, [(sar_dataset, footprint)])
+    for n_processes in (None, 1):
+        (batch,) = map_raster_batch(
+            raster, [(sar_dataset, footprint)], n_processes=n_processes, **kwargs
+        )
+        for var, values in zip(
+            VECTORS[0], rotate(plain["U10"].values, plain["V10"].values, angle)
+        ):
+            np.testing.assert_allclose(batch[var].values, values, atol=1e-12)
+
+
+def test_invalid_vectors():
+    sar_dataset = with_heading(fake_dataset())
+    footprint = build_footprint(sar_dataset)
+    raster = fake_ecmwf_0100_1h(with_classes=True)
+
+    with pytest.raises(ValueError, match="heading requires vectors"):
+        map_raster(raster, sar_dataset, footprint, heading="ground_heading")
+    with pytest.raises(ValueError, match="not in the raster"):
+        map_raster(raster, sar_dataset, footprint, vectors=[("U10", "V100")])
+    with pytest.raises(ValueError, match="pairs"):
+        map_raster(raster, sar_dataset, footprint, vectors=[("U10",)])
+    with pytest.raises(ValueError, match="same method"):
+        map_raster(raster, sar_dataset, footprint, vectors=[("U10", "LAND")])
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from tools_test import build_footprint, fake_dataset, fake_ecmwf_0100_1h
+
+from mapraster.main import map_raster, open_raster, read_footprint_window
+
+
+def test_read_footprint_window_descending_lat():
+    dataset = fake_dataset(cross_antimeridian=False)
+    footprint = build_footprint(dataset)
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=False)
+    raster = raster.isel(y=slice(None, None, -1))
+
+    window = read_footprint_window(raster, footprint, pad=2)
+
+    lon1, lat1, lon2, lat2 = footprint.exterior.bounds
+    assert window.y.values[0] > window.y.values[-1]
+    assert window.x.min() < lon1 and window.x.max() > lon2
+    assert window.y.min() < lat1 and window.y.max() > lat2
+    # bracketing pixels + 2 pixels of pad on each side at 0.1°
+    assert window.sizes["x"] <= (lon2 - lon1) / 0.1 + 2 * 3 + 1
+    assert window.sizes["y"] <= (lat2 - lat1) / 0.1 + 2 * 3 + 1
+
+
+@pytest.mark.parametrize("suffix", [".nc", ".tif"])
+def test_map_raster_from_file(tmp_path, suffix):
+    dataset = fake_dataset(cross_antimeridian=False)
+    footprint = build_footprint(dataset)
+    raster = fake_ecmwf_0100_1h(to180=True, with_nan=False)
+    raster = raster.sel(x=slice(-60, 10), y=slice(-50, 0))
+    raster.attrs = {}
+
+    path = tmp_path / f"raster{suffix}"
+    if suffix == ".tif":
+        raster["U10"].rio.to_raster(path)
+    else:
+        raster.rename(x="longitude", y="latitude").drop_vars("spatial_ref").to_netcdf(
+            path
+        )
+
+    expected = map_raster(raster["U10"], dataset, footprint)
+    out = map_raster(str(path), dataset, footprint)
+
+    mapped = out.squeeze("band") if suffix == ".tif" else out["U10"]
+    np.testing.assert_allclose(mapped.values, expected.values, rtol=1e-12)
+
+    lazy = open_raster(path)
+    assert lazy.sizes["x"] == raster.sizes["x"]
+
+
+def test_map_raster_descending_axes():
+    """
+    Descending lat (and lon) rasters give the same result as increasing ones.
+    """
+    dataset = fake_dataset(cross_antimeridian=True)
+    footprint = build_footprint(dataset)
+    raster = fake_ecmwf_0100_1h(to180=False, with_nan=True)
+
+    expected = map_raster(raster, dataset, footprint, cross_antimeridian=True)
+    flipped = raster.isel(y=slice(None, None, -1), x=slice(None, None, -1))
+    out = map_raster(flipped, dataset, footprint, cross_antimeridian=True)
+
+    for var in ("U10", "V10"):
+        np.testing.assert_array_equal(out[var].values, expected[var].values)
@@ -1,16 +1,18 @@
 import numpy as np
+import pytest
 import rioxarray  # activate .rio accessor
 import xarray as xr
 from shapely.geometry import Polygon
 
 
-def fake_dataset(cross_antimeridian=False):
-    nline, nsample = 50, 60
+def fake_dataset(cross_antimeridian=False, shape=(50, 60)):
+    # same geometry whatever the shape: only the sampling changes
+    nline, nsample = shape
 
     line = np.arange(nline)
     sample = np.arange(nsample)
 
-    L, S = np.meshgrid(line, sample, indexing="ij")
+    L, S = np.meshgrid(line * 50 / nline, sample * 60 / nsample, indexing="ij")
 
     if cross_antimeridian:
         # near +180°, wrapped to [-180, 180]
@@ -45,7 +47,7 @@ def _to_lon360(ds):
     return ds.sortby("x")
 
 
-def fake_ecmwf_0100_1h(*, to180=True, with_nan=False):
+def fake_ecmwf_0100_1h(*, to180=True, with_nan=False, with_classes=False):
     import datetime
 
     lon = np.linspace(0, 360, 360 * 10, endpoint=False)
@@ -97,6 +99,13 @@ def fake_ecmwf_0100_1h(*, to180=True, with_nan=False):
         ds["U10"] = ds["U10"].where(~final_mask)
         ds["V10"] = ds["V10"].where(~final_mask)
 
+    if with_classes:
+        # an int16 class variable and a uint8 land/sea mask, without nodata
+        x = xr.DataArray(np.arange(ds.sizes["x"]), dims="x")
+        y = xr.DataArray(np.arange(ds.sizes["y"]), dims="y")
+        ds["CLASS"] = ((3 * (y // 5) + x // 7) % 11).astype("int16")
+        ds["LAND"] = (ds["V10"] > 0).astype("uint8")
+
     ds.rio.write_crs("EPSG:4326", inplace=True)
     return ds
 
@@ -113,3 +122,77 @@ def build_footprint(ds):
             (lon[-1, 0], lat[-1, 0]),
         ]
     )
+
+
+# the 4 cases of test_map_raster_4cases, as (cross_antimeridian, with_nan)
+CASES = [
+    pytest.param(False, False, id="no_antimeridian_no_nan"),
+    pytest.param(False, True, id="no_antimeridian_with_nan"),
+    pytest.param(True, False, id="with_antimeridian_no_nan"),
+    pytest.param(True, True, id="with_antimeridian_with_nan"),
+]
+
+
+def fake_case(cross_antimeridian, with_nan=False, shape=(50, 60)):
+    # image, raster in the matching longitude convention, and footprint
+    sar_dataset = fake_dataset(cross_antimeridian=cross_antimeridian, shape=shape)
+    raster = fake_ecmwf_0100_1h(to180=not cross_antimeridian, with_nan=with_nan)
+    return sar_dataset, raster, build_footprint(sar_dataset)
+
+
+def fake_projected_raster(crs="EPSG:3857", resolution=5000.0, cross_antimeridian=False):
+    """
+    Raster on a projected grid around the fake_dataset footprints, with the
+    same analytic U10/V10 fields as fake_ecmwf_0100_1h.
+    """
+    from pyproj import Transformer
+
+    to_crs = Transformer.from_crs("EPSG:4326", crs, always_xy=True)
+    if cross_antimeridian:
+        left, bottom, right, top = to_crs.transform_bounds(150, -45, -140, -10)
+    else:
+        left, bottom, right, top = to_crs.transform_bounds(-60, -45, 10, -10)
+
+    x = np.arange(left, right, resolution)
+    y = np.arange(top, bottom, -resolution)
+    X, Y = np.meshgrid(x, y)
+    LON, LAT = to_crs.transform(X, Y, direction="INVERSE")
+
+    ds = xr.Dataset(
+        data_vars={
+            "U10": (("y", "x"), 5 + 2 * np.cos(np.deg2rad(LAT))),
+            "V10": (("y", "x"), 2 * np.sin(np.deg2rad(LON))),
+        },
+        coords={"x": x, "y": y},
+    )
+    ds.rio.write_crs(crs, inplace=True)
+    return ds
+
+
+def fake_polar_dataset(shape=(50, 60), contains_pole=True, south=False):
+    """
+    Image grid over the Arctic (or Antarctic), regular in a polar
+    stereographic plane: 800 km wide, either around the pole or centred
+    about 76°N (76°S).
+    """
+    from pyproj import Transformer
+
+    nline, nsample = shape
+    to_lonlat = Transformer.from_crs(
+        "+proj=stere +lat_0=90 +lon_0=-20 +ellps=WGS84", "EPSG:4326", always_xy=True
+    )
+    L, S = np.meshgrid(
+        np.linspace(-1, 1, nline), np.linspace(-1, 1, nsample), indexing="ij"
+    )
+    y0 = 50e3 if contains_pole else -1450e3
+    lon, lat = to_lonlat.transform(400e3 * S + 100e3 * L, y0 + 400e3 * L - 80e3 * S)
+    if south:
+        lat = -lat
+
+    return xr.Dataset(
+        data_vars={
+            "longitude": (("line", "sample"), lon),
+            "latitude": (("line", "sample"), lat),
+        },
+        coords={"line": np.arange(nline), "sample": np.arange(nsample)},
+    )